@@ -0,0 +1,100 @@
+import argparse
+import csv
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from Rampas import RampaManager
+from Simulador import CONFIG_SIMULACION_DEFAULT, simular_esferas
+
+# Escenarios por unidad de trabajo: todos comparten altura y se simulan en un único motor por lotes
+TAM_BLOQUE_DEFAULT = 64
+
+COLUMNAS_RESULTADOS = ["altura", "rozamiento", "masa", "restitucion", "curva", "primer_impacto", "parada_final"]
+
+def generar_escenarios(alturas, rozamientos, masas, restituciones):
+    """Producto cartesiano de la rejilla como tuplas (altura, rozamiento, masa, restitución)"""
+    return list(itertools.product(alturas, rozamientos, masas, restituciones))
+
+def dividir_en_bloques(escenarios, tam_bloque=TAM_BLOQUE_DEFAULT):
+    """Agrupar escenarios de la misma altura en bloques de como mucho tam_bloque"""
+    por_altura = {}
+    for escenario in escenarios:
+        por_altura.setdefault(escenario[0], []).append(escenario)
+    bloques = []
+    for grupo in por_altura.values():
+        for inicio in range(0, len(grupo), tam_bloque):
+            bloques.append(grupo[inicio:inicio + tam_bloque])
+    return bloques
+
+def simular_bloque(bloque, x_A=1.0, config=None):
+    """Simular en un proceso un bloque de escenarios con la misma altura del punto A"""
+    altura = bloque[0][0]
+    curvas = RampaManager(verbose=False).get_curvas_para_esferas()
+
+    # Una esfera por (escenario, curva), todas en el mismo motor por lotes
+    config_esferas = []
+    for _, rozamiento, masa, restitucion in bloque:
+        for curva in curvas:
+            config_esferas.append(dict(curva, rozamiento=rozamiento, masa=masa, restitution=restitucion))
+    esferas = simular_esferas(dict(config or {}, punto_A=(x_A, altura, 0.0), esferas=config_esferas))
+
+    filas = []
+    for i, (altura, rozamiento, masa, restitucion) in enumerate(bloque):
+        for esfera in esferas[i * len(curvas):(i + 1) * len(curvas)]:
+            filas.append({
+                "altura": altura,
+                "rozamiento": rozamiento,
+                "masa": masa,
+                "restitucion": restitucion,
+                "curva": esfera.name,
+                "primer_impacto": esfera.first_impact_time,
+                "parada_final": esfera.final_stop_time,
+            })
+    return filas
+
+def barrer(alturas, rozamientos, masas, restituciones, procesos=None, tam_bloque=TAM_BLOQUE_DEFAULT,
+           x_A=1.0, config=None):
+    """Barrido de parámetros repartido en un pool de procesos; devuelve la tabla de resultados"""
+    if min(alturas) <= 1.0:
+        raise ValueError("Las alturas del punto A deben ser mayores que 1.0 m (altura del punto B)")
+    bloques = dividir_en_bloques(generar_escenarios(alturas, rozamientos, masas, restituciones), tam_bloque)
+    procesos = procesos or os.cpu_count() or 1
+    if procesos == 1:
+        resultados = [simular_bloque(bloque, x_A, config) for bloque in bloques]
+    else:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            resultados = list(pool.map(simular_bloque, bloques,
+                                       itertools.repeat(x_A), itertools.repeat(config)))
+    return [fila for filas in resultados for fila in filas]
+
+def guardar_csv(filas, archivo):
+    """Guardar la tabla de resultados en CSV"""
+    with open(archivo, "w", newline="") as f:
+        escritor = csv.DictWriter(f, fieldnames=COLUMNAS_RESULTADOS)
+        escritor.writeheader()
+        escritor.writerows(filas)
+
+def main():
+    """Punto de entrada por línea de comandos"""
+    parser = argparse.ArgumentParser(description="Barrido de parámetros de la braquistócrona en paralelo")
+    parser.add_argument("--alturas", type=float, nargs="+", default=[5.0], help="Alturas del punto A")
+    parser.add_argument("--rozamientos", type=float, nargs="+", default=[0.008])
+    parser.add_argument("--masas", type=float, nargs="+", default=[1.0])
+    parser.add_argument("--restituciones", type=float, nargs="+", default=[0.75])
+    parser.add_argument("--x", type=float, default=1.0, help="Coordenada X del punto A")
+    parser.add_argument("--dt", type=float, default=CONFIG_SIMULACION_DEFAULT["dt"], help="Paso de tiempo simulado")
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos del pool (por defecto, todos los núcleos)")
+    parser.add_argument("--tam-bloque", type=int, default=TAM_BLOQUE_DEFAULT, help="Escenarios por unidad de trabajo")
+    parser.add_argument("--csv", default="barrido.csv", help="Archivo CSV de resultados")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    filas = barrer(args.alturas, args.rozamientos, args.masas, args.restituciones,
+                   procesos=args.procesos, tam_bloque=args.tam_bloque, x_A=args.x, config={"dt": args.dt})
+    guardar_csv(filas, args.csv)
+    print(f"{len(filas)} resultados guardados en {args.csv} ({time.perf_counter() - inicio:.2f} s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import argparse
+import csv
+import time
+
+from Esferas import get_esferas
+from Oraculo import tiempo_descenso
+from Rampas import RampaManager
+
+# Rejilla por defecto de ajustes a comparar
+DTS_DEFAULT = [0.05, 0.02, 0.01, 0.005, 0.002, 0.001]
+RESOLUCIONES_DEFAULT = [101, 251, 1001, 4001]
+INTEGRADORES_DEFAULT = ["euler", "rk4", "rk45"]
+
+def medir_descenso(config, dt, resolucion, integrador, tiempo_max=30.0):
+    """Ejecuta el bucle de pasos de Esfera hasta el primer impacto; devuelve (tiempo, CPU)"""
+    inicio_cpu = time.process_time()
+    esfera = get_esferas([dict(config, verbose=False, resolucion_tabla=resolucion, integrador=integrador)])[0]
+    esfera.initialize_position()
+    esfera.release_from_platform()
+    paso = 0
+    while esfera.first_impact_time is None and paso * dt < tiempo_max:
+        paso += 1
+        esfera.update(dt, paso * dt)
+    return esfera.first_impact_time, time.process_time() - inicio_cpu
+
+def ejecutar_benchmark(dts=None, resoluciones=None, integradores=None, punto_A=(1.0, 5.0, 0.0)):
+    """Error frente al oráculo y coste de CPU para cada combinación de ajustes y curva"""
+    rampa_manager = RampaManager(verbose=False)
+    rampa_manager.set_puntos(punto_A)
+    filas = []
+    for config in rampa_manager.get_curvas_para_esferas():
+        # Tiempo de referencia con el rozamiento que usará la esfera
+        referencia = get_esferas([dict(config, verbose=False)])[0]
+        t_oraculo = tiempo_descenso(referencia.curve_func, z_offset=referencia.z_offset,
+                                    mu=referencia.mu, masa=referencia.masa)
+        for integrador in integradores or INTEGRADORES_DEFAULT:
+            for resolucion in resoluciones or RESOLUCIONES_DEFAULT:
+                for dt in dts or DTS_DEFAULT:
+                    t_simulado, cpu = medir_descenso(config, dt, resolucion, integrador)
+                    error = abs(t_simulado - t_oraculo) if t_simulado is not None else float("inf")
+                    filas.append({
+                        "curva": config["name"],
+                        "integrador": integrador,
+                        "resolucion": resolucion,
+                        "dt": dt,
+                        "tiempo_oraculo": t_oraculo,
+                        "tiempo_simulado": t_simulado,
+                        "error_abs": error,
+                        "cpu_s": cpu,
+                    })
+    return filas
+
+def ajustes_mas_baratos(filas, tolerancia):
+    """Para cada curva, la combinación de menor CPU cuyo error está dentro de la tolerancia"""
+    mejores = {}
+    for fila in filas:
+        if fila["error_abs"] > tolerancia:
+            continue
+        actual = mejores.get(fila["curva"])
+        if actual is None or fila["cpu_s"] < actual["cpu_s"]:
+            mejores[fila["curva"]] = fila
+    return mejores
+
+def main():
+    """Punto de entrada por línea de comandos"""
+    parser = argparse.ArgumentParser(description="Precisión frente a coste del bucle de pasos de Esfera")
+    parser.add_argument("--tolerancia", type=float, default=1e-3, help="Error absoluto admitido (s)")
+    parser.add_argument("--csv", default=None, help="Guardar la tabla completa en este archivo CSV")
+    parser.add_argument("--dt", type=float, nargs="+", default=None)
+    parser.add_argument("--resolucion", type=int, nargs="+", default=None)
+    parser.add_argument("--integrador", nargs="+", choices=INTEGRADORES_DEFAULT, default=None)
+    args = parser.parse_args()
+
+    filas = ejecutar_benchmark(args.dt, args.resolucion, args.integrador)
+
+    print(f"{'curva':<12} {'integr.':<7} {'res.':>5} {'dt':>7} {'error (s)':>10} {'CPU (ms)':>9}")
+    for fila in filas:
+        print(f"{fila['curva']:<12} {fila['integrador']:<7} {fila['resolucion']:>5} {fila['dt']:>7.4f} "
+              f"{fila['error_abs']:>10.2e} {fila['cpu_s'] * 1000:>9.1f}")
+
+    print(f"\nAjustes más baratos con error <= {args.tolerancia:g} s:")
+    mejores = ajustes_mas_baratos(filas, args.tolerancia)
+    for curva, fila in mejores.items():
+        print(f"  {curva}: {fila['integrador']}, resolución {fila['resolucion']}, dt {fila['dt']:g} "
+              f"(error {fila['error_abs']:.2e} s, {fila['cpu_s'] * 1000:.1f} ms)")
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            escritor = csv.DictWriter(f, fieldnames=list(filas[0].keys()))
+            escritor.writeheader()
+            escritor.writerows(filas)
+        print(f"Tabla guardada en {args.csv}")
+
+if __name__ == "__main__":
+    main()
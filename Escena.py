@@ -1,31 +1,143 @@
+import ctypes
+import time
+from collections import deque
+from contextlib import nullcontext
+
 import pygame
 import numpy as np
 from OpenGL.GL import *
 from OpenGL.GLU import *
 
-from Rampas import A_METERS, B_METERS, RAMP_SEPARATION, line_curve_3d, parabolic_curve_3d, cycloid_curve_3d
-from Textura import load_ppm_texture, create_improved_wood_texture, create_improved_iron_texture
+import Rampas
+from Rampas import CACHE_GEOMETRIA, line_curve_3d, parabolic_curve_3d, cycloid_curve_3d
+from Sombreadores import POSICIONES_LUCES, BolasInstanciadas
+from Textura import CACHE_TEXTURAS, COLOR_PROVISIONAL, GESTOR_TEXTURAS, TEXTURAS_RAMPA, create_plastic_texture
+
+MARGEN_RAMPAS_Z = 0.5  # Plataforma y muro sobresalen esto de las rampas exteriores (3 m con las tres clásicas)
+FRECUENCIA_RELOJ_HUD = 10.0  # Actualizaciones por segundo del cronómetro del panel
+
+# Cubo unitario (caras como cuadriláteros) compartido por plataforma y muro
+CUBE_VERTICES = [
+    [-0.5, -0.5, 0.5], [0.5, -0.5, 0.5], [0.5, 0.5, 0.5], [-0.5, 0.5, 0.5],
+    [-0.5, -0.5, -0.5], [-0.5, 0.5, -0.5], [0.5, 0.5, -0.5], [0.5, -0.5, -0.5],
+    [-0.5, 0.5, -0.5], [-0.5, 0.5, 0.5], [0.5, 0.5, 0.5], [0.5, 0.5, -0.5],
+    [-0.5, -0.5, -0.5], [0.5, -0.5, -0.5], [0.5, -0.5, 0.5], [-0.5, -0.5, 0.5],
+    [0.5, -0.5, -0.5], [0.5, 0.5, -0.5], [0.5, 0.5, 0.5], [0.5, -0.5, 0.5],
+    [-0.5, -0.5, -0.5], [-0.5, -0.5, 0.5], [-0.5, 0.5, 0.5], [-0.5, 0.5, -0.5]
+]
+
+CUBE_INDICES = [
+    [0, 1, 2, 3], [4, 5, 6, 7], [8, 9, 10, 11],
+    [12, 13, 14, 15], [16, 17, 18, 19], [20, 21, 22, 23]
+]
+
+# Coordenadas de textura de la plataforma
+PLATFORM_TEX_COORDS = [
+    [0, 0], [1, 0], [1, 1], [0, 1],
+    [0, 0], [0, 1], [1, 1], [1, 0],
+    [0, 1], [0, 0], [1, 0], [1, 1],
+    [0, 0], [1, 0], [1, 1], [0, 1],
+    [0, 0], [0, 1], [1, 1], [1, 0],
+    [0, 0], [1, 0], [1, 1], [0, 1]
+]
+
+# Coordenadas de textura escaladas para el muro
+WALL_TEX_COORDS = [
+    [0, 0], [2, 0], [2, 2], [0, 2],
+    [0, 0], [0, 2], [2, 2], [2, 0],
+    [0, 2], [0, 0], [2, 0], [2, 2],
+    [0, 0], [2, 0], [2, 2], [0, 2],
+    [0, 0], [0, 2], [2, 2], [2, 0],
+    [0, 0], [2, 0], [2, 2], [0, 2]
+]
+
+def perspectiva(fovy, aspecto, cerca, lejos):
+    """Matriz de proyección 4×4 (fila mayor) equivalente a gluPerspective"""
+    f = 1.0 / np.tan(np.radians(fovy) / 2.0)
+    return np.array([
+        [f / aspecto, 0.0, 0.0, 0.0],
+        [0.0, f, 0.0, 0.0],
+        [0.0, 0.0, (lejos + cerca) / (cerca - lejos), 2.0 * lejos * cerca / (cerca - lejos)],
+        [0.0, 0.0, -1.0, 0.0],
+    ])
+
+def _traslacion(x, y, z):
+    """Matriz 4×4 equivalente a glTranslatef"""
+    matriz = np.eye(4)
+    matriz[:3, 3] = (x, y, z)
+    return matriz
+
+def _rotacion(grados, eje):
+    """Matriz 4×4 equivalente a glRotatef alrededor de un eje unitario"""
+    x, y, z = eje
+    c, s = np.cos(np.radians(grados)), np.sin(np.radians(grados))
+    matriz = np.eye(4)
+    matriz[:3, :3] = c * np.eye(3) + s * np.array([[0, -z, y], [z, 0, -x], [-y, x, 0]]) + (1 - c) * np.outer(eje, eje)
+    return matriz
+
+def matrices_camara(distancia, angulo_x, angulo_y, posicion, aspecto):
+    """(vista, proyección) de la cámara orbital de main.py, calculadas sin leer el estado de OpenGL"""
+    vista = (_traslacion(0.0, -2.0, -distancia) @ _rotacion(angulo_x, (1.0, 0.0, 0.0))
+             @ _rotacion(angulo_y, (0.0, 1.0, 0.0)) @ _traslacion(-posicion[0], -posicion[1], -posicion[2]))
+    return vista, perspectiva(45, aspecto, 0.1, 100.0)
+
+def cargar_camara(vista, proyeccion):
+    """Cargar las matrices de la cámara en la tubería fija (OpenGL las espera por columnas)"""
+    glMatrixMode(GL_PROJECTION)
+    glLoadMatrixf(np.ascontiguousarray(proyeccion.T, dtype=np.float32))
+    glMatrixMode(GL_MODELVIEW)
+    glLoadMatrixf(np.ascontiguousarray(vista.T, dtype=np.float32))
+
+def configurar_opengl():
+    """Configuración de OpenGL (iluminación, materiales y fondo) del contexto actual"""
+    # Habilitar características
+    glEnable(GL_DEPTH_TEST)  # Prueba de profundidad
+    glEnable(GL_LIGHTING)  # Iluminación
+    glEnable(GL_LIGHT0)  # Luz 0
+    glEnable(GL_LIGHT1)  # Luz 1
+    glEnable(GL_COLOR_MATERIAL)  # Material de color
+    glColorMaterial(GL_FRONT_AND_BACK, GL_AMBIENT_AND_DIFFUSE)
+    
+    # MEJORA: Iluminación más brillante
+    # Luz principal
+    glLightfv(GL_LIGHT0, GL_POSITION, list(POSICIONES_LUCES[0]))
+    glLightfv(GL_LIGHT0, GL_AMBIENT, [0.6, 0.6, 0.6, 1.0])  # Más brillante
+    glLightfv(GL_LIGHT0, GL_DIFFUSE, [1.2, 1.2, 1.2, 1.0])  # Más brillante
+    glLightfv(GL_LIGHT0, GL_SPECULAR, [1.0, 1.0, 1.0, 1.0])
+    
+    # Luz secundaria
+    glLightfv(GL_LIGHT1, GL_POSITION, list(POSICIONES_LUCES[1]))
+    glLightfv(GL_LIGHT1, GL_DIFFUSE, [1.0, 1.0, 1.0, 1.0])  # Más brillante
+    glLightfv(GL_LIGHT1, GL_SPECULAR, [1.0, 1.0, 1.0, 1.0])  # Más brillante
+    
+    # Material especular
+    glMaterialfv(GL_FRONT, GL_SPECULAR, [1.0, 1.0, 1.0, 1.0])
+    glMaterialf(GL_FRONT, GL_SHININESS, 128.0)
+    
+    # MEJORA: Fondo más claro
+    glClearColor(0.5, 0.5, 0.6, 1.0)  # Más claro
+    glEnable(GL_NORMALIZE)  # Normalizar normales
+    glShadeModel(GL_SMOOTH)  # Sombreado suave
 
 class RealTimeReflectionSystem:
-    def __init__(self, cube_size=128):
+    def __init__(self, cube_size=128, verbose=True):
         # Inicializar el sistema de reflejos en tiempo real
         self.cube_size = cube_size  # Tamaño del cubemap para reflejos
+        self.verbose = verbose  # Mostrar mensajes por consola
         self.fbo = None  # Framebuffer object
         self.cube_map = None  # Textura cubemap
+        self.depth_buffer = None  # Renderbuffer de profundidad compartido por las 6 caras
         self.setup_cube_map()  # Configurar el cubemap
         
     def setup_cube_map(self):
         """Configurar cubemap dinámico para reflejos en tiempo real"""
-        # Generar framebuffer y textura cubemap
+        # Generar framebuffer, textura cubemap y buffer de profundidad
         self.fbo = glGenFramebuffers(1)
         self.cube_map = glGenTextures(1)
+        self.depth_buffer = glGenRenderbuffers(1)
+        self._reservar_caras()
         glBindTexture(GL_TEXTURE_CUBE_MAP, self.cube_map)
         
-        # Crear las 6 caras del cubemap vacías
-        for i in range(6):
-            glTexImage2D(GL_TEXTURE_CUBE_MAP_POSITIVE_X + i, 0, GL_RGB, 
-                         self.cube_size, self.cube_size, 0, GL_RGB, GL_UNSIGNED_BYTE, None)
-        
         # Configurar parámetros de textura
         glTexParameteri(GL_TEXTURE_CUBE_MAP, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
         glTexParameteri(GL_TEXTURE_CUBE_MAP, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
@@ -33,16 +145,43 @@ class RealTimeReflectionSystem:
         glTexParameteri(GL_TEXTURE_CUBE_MAP, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
         glTexParameteri(GL_TEXTURE_CUBE_MAP, GL_TEXTURE_WRAP_R, GL_CLAMP_TO_EDGE)
         
-        print(f"Cubemap dinámico creado: {self.cube_size}x{self.cube_size}")
+        if self.verbose:
+            print(f"Cubemap dinámico creado: {self.cube_size}x{self.cube_size}")
+
+    def _reservar_caras(self):
+        """Reservar las 6 caras vacías y el buffer de profundidad al tamaño actual"""
+        glBindTexture(GL_TEXTURE_CUBE_MAP, self.cube_map)
+        for i in range(6):
+            glTexImage2D(GL_TEXTURE_CUBE_MAP_POSITIVE_X + i, 0, GL_RGB, 
+                         self.cube_size, self.cube_size, 0, GL_RGB, GL_UNSIGNED_BYTE, None)
+        glBindRenderbuffer(GL_RENDERBUFFER, self.depth_buffer)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_DEPTH_COMPONENT24, self.cube_size, self.cube_size)
+        glBindRenderbuffer(GL_RENDERBUFFER, 0)
 
-    def render_to_cube_map(self, ball_position, render_scene_function):
+    def resize(self, cube_size):
+        """Cambiar la resolución del cubemap (el contenido se pierde hasta el siguiente render)"""
+        if cube_size != self.cube_size:
+            self.cube_size = cube_size
+            self._reservar_caras()
+
+    def liberar(self):
+        """Liberar los recursos de la GPU"""
+        glDeleteFramebuffers(1, [self.fbo])
+        glDeleteRenderbuffers(1, [self.depth_buffer])
+        glDeleteTextures([self.cube_map])
+        self.fbo = self.cube_map = self.depth_buffer = None
+
+    def render_to_cube_map(self, ball_position, render_scene_function, fondo=None):
         """Renderizar la escena a las 6 caras del cubemap"""
+        # fondo: otro cubemap (entorno estático precalculado) que se copia en cada cara antes de renderizar
         if self.fbo is None or self.cube_map is None:
             return
             
-        # Guardar viewport actual
+        # Guardar viewport y framebuffer actuales (puede ser uno fuera de pantalla, ver Grabador.py)
         old_viewport = glGetIntegerv(GL_VIEWPORT)
+        old_framebuffer = int(glGetIntegerv(GL_FRAMEBUFFER_BINDING))
         glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_RENDERBUFFER, self.depth_buffer)
         
         # Configurar proyección para vistas de 90 grados
         glMatrixMode(GL_PROJECTION)
@@ -68,7 +207,16 @@ class RealTimeReflectionSystem:
                 continue
             
             glViewport(0, 0, self.cube_size, self.cube_size)
-            glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+            if fondo is None:
+                glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+            else:
+                # Copiar (escalando) la cara del entorno estático y dibujar encima solo lo dinámico
+                glBindFramebuffer(GL_READ_FRAMEBUFFER, fondo.fbo)
+                glFramebufferTexture2D(GL_READ_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, face, fondo.cube_map, 0)
+                glBlitFramebuffer(0, 0, fondo.cube_size, fondo.cube_size, 0, 0, self.cube_size, self.cube_size,
+                                  GL_COLOR_BUFFER_BIT, GL_LINEAR)
+                glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+                glClear(GL_DEPTH_BUFFER_BIT)
             
             # Configurar vista desde la posición de la bola
             glMatrixMode(GL_MODELVIEW)
@@ -82,110 +230,512 @@ class RealTimeReflectionSystem:
             render_scene_function(ball_position)
             glPopMatrix()
         
-        # Restaurar configuración anterior
+        # Restaurar configuración anterior (y la matriz de modelo-vista como activa)
         glMatrixMode(GL_PROJECTION)
         glPopMatrix()
-        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        glMatrixMode(GL_MODELVIEW)
+        glBindFramebuffer(GL_FRAMEBUFFER, old_framebuffer)
         glViewport(old_viewport[0], old_viewport[1], old_viewport[2], old_viewport[3])
 
+def radios_en_pantalla(balls, camara=None):
+    """Radio proyectado (píxeles) de cada bola, por id(ball), con la cámara (vista, proyección) o la de la tubería fija"""
+    if camara is not None:
+        modelview, projection = camara
+    else:
+        modelview = np.array(glGetDoublev(GL_MODELVIEW_MATRIX), dtype=float).reshape(4, 4).T
+        projection = np.array(glGetDoublev(GL_PROJECTION_MATRIX), dtype=float).reshape(4, 4).T
+    alto_viewport = glGetIntegerv(GL_VIEWPORT)[3]
+    radios = {}
+    for ball in balls:
+        centro = modelview @ np.append(ball.get_render_position(), 1.0)
+        distancia = max(-centro[2], 1e-3)
+        radios[id(ball)] = ball.radius * projection[1, 1] * alto_viewport / 2.0 / distancia
+    return radios
+
+class ProgramadorReflejos:
+    """Una sonda de reflejo (cubemap) por bola, actualizadas por turnos dentro de un presupuesto por frame"""
+
+    def __init__(self, presupuesto_ms=4.0, umbral_movimiento=0.02, tamanos=(32, 64, 128, 256), pixeles_por_radio=2.0):
+        self.presupuesto_ms = presupuesto_ms  # Tiempo máximo de actualización de sondas por frame
+        self.umbral_movimiento = umbral_movimiento  # Desplazamiento mínimo (m) para volver a renderizar
+        self.tamanos = tamanos  # Resoluciones de cubemap permitidas (de menor a mayor)
+        self.pixeles_por_radio = pixeles_por_radio  # Lado de cara por píxel de radio en pantalla
+        self.sondas = {}  # RealTimeReflectionSystem por id(ball) (dos bolas pueden compartir nombre)
+        self.bolas = {}  # Bola de cada sonda (la referencia impide que su id se reutilice mientras exista)
+        self.ultima_posicion = {}  # Posición de la bola en la última actualización de su sonda
+        self.turno = deque()  # Orden round-robin de las bolas
+        self.ms_por_texel = None  # Coste medio estimado (ms por texel de cara) para prever cada render
+        self.actualizadas = 0  # Sondas renderizadas en el último frame
+
+    def tamano_para(self, radio_pixeles):
+        """Resolución de cubemap según el tamaño de la bola en pantalla"""
+        objetivo = radio_pixeles * self.pixeles_por_radio
+        for tamano in self.tamanos:
+            if tamano >= objetivo:
+                return tamano
+        return self.tamanos[-1]
+
+    def sonda(self, ball):
+        """Sonda de la bola (creada al vuelo con la menor resolución)"""
+        clave = id(ball)
+        sonda = self.sondas.get(clave)
+        if sonda is None:
+            sonda = RealTimeReflectionSystem(cube_size=self.tamanos[0], verbose=False)
+            self.sondas[clave] = sonda
+            self.bolas[clave] = ball
+            self.turno.append(clave)
+        return sonda
+
+    def actualizar(self, balls, render_scene_function, fondo=None, radios=None):
+        """Renderizar las sondas pendientes por turnos sin superar el presupuesto del frame"""
+        # Sin radios (de radios_en_pantalla) debe llamarse con la cámara del frame ya configurada
+        claves = {id(ball) for ball in balls}
+        for clave in [c for c in self.sondas if c not in claves]:
+            self.sondas.pop(clave).liberar()  # Bolas que ya no existen (reinicio)
+            self.bolas.pop(clave)
+            self.ultima_posicion.pop(clave, None)
+            self.turno.remove(clave)
+        for ball in balls:
+            self.sonda(ball)
+
+        if radios is None:
+            radios = radios_en_pantalla(balls)
+        inicio = time.perf_counter()
+        self.actualizadas = 0
+        for _ in range(len(self.turno)):
+            clave = self.turno[0]
+            self.turno.rotate(-1)
+            ball = self.bolas[clave]
+            sonda = self.sondas[clave]
+            posicion = np.array(ball.get_render_position(), dtype=float)
+
+            # Resolución según el tamaño en pantalla; un cambio obliga a renderizar de nuevo
+            tamano = self.tamano_para(radios[clave])
+            anterior = self.ultima_posicion.get(clave)
+            if tamano == sonda.cube_size and anterior is not None \
+                    and np.linalg.norm(posicion - anterior) < self.umbral_movimiento:
+                continue
+
+            # Prever el coste; al menos una sonda por frame para que todas avancen
+            transcurrido = (time.perf_counter() - inicio) * 1000.0
+            estimado = 0.0 if self.ms_por_texel is None else self.ms_por_texel * 6 * tamano ** 2
+            if self.actualizadas and transcurrido + estimado > self.presupuesto_ms:
+                break
+
+            sonda.resize(tamano)
+            t0 = time.perf_counter()
+            sonda.render_to_cube_map(posicion, render_scene_function, fondo)
+            coste = (time.perf_counter() - t0) * 1000.0 / (6 * tamano ** 2)
+            self.ms_por_texel = coste if self.ms_por_texel is None else 0.8 * self.ms_por_texel + 0.2 * coste
+            self.ultima_posicion[clave] = posicion
+            self.actualizadas += 1
+
+class MallaRampa:
+    """Malla de una rampa (superficie, laterales y tapas) teselada una vez en un VBO"""
+    BASE_WIDTH = 0.7  # Ancho de la base de la rampa
+    SEGMENTS = 100  # Número de segmentos para suavizar la curva
+    STRIDE = 8 * 4  # Posición (3), normal (3) y textura (2) en float32
+
+    def __init__(self, curve_func, z_offset, platform_height):
+        self.curve_func = curve_func
+        self.z_offset = z_offset
+        self.platform_height = platform_height
+        self.vbo = None  # None = arrays de cliente (sin soporte de VBO)
+        self.datos = self._teselar()
+        self.n_superficie = 4 * self.SEGMENTS
+        self.n_laterales = 8 * self.SEGMENTS
+        self.n_tapas = 8
+        try:
+            self.vbo = glGenBuffers(1)
+            glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+            glBufferData(GL_ARRAY_BUFFER, self.datos.nbytes, self.datos, GL_STATIC_DRAW)
+            glBindBuffer(GL_ARRAY_BUFFER, 0)
+        except Exception:
+            self.vbo = None
+
+    @staticmethod
+    def _quads(v0, v1, v2, v3, normales, texturas):
+        """Vértices intercalados de N cuadriláteros (v0..v3 de forma (N,3); normales (N,4,3) o (3,))"""
+        posiciones = np.stack([v0, v1, v2, v3], axis=1)
+        normales = np.broadcast_to(normales, posiciones.shape)
+        texturas = np.broadcast_to(texturas, posiciones.shape[:2] + (2,))
+        return np.concatenate([posiciones, normales, texturas], axis=2).reshape(-1, 8)
+
+    def _teselar(self):
+        """Vértices de superficie, laterales y tapas a partir de la geometría compartida"""
+        muestras = CACHE_GEOMETRIA.muestras(self.curve_func, z_offset=self.z_offset, segmentos=self.SEGMENTS)
+        left, right = muestras.rail_left, muestras.rail_right
+        z_left = -self.BASE_WIDTH/2 + self.z_offset
+        z_right = self.BASE_WIDTH/2 + self.z_offset
+        
+        # SUPERFICIE DE RODAMIENTO: textura según la longitud recorrida, normal perpendicular a la curva
+        tex_x = muestras.longitudes / muestras.longitud * 4.0
+        tangente = np.gradient(muestras.centro, axis=0)
+        normal = np.stack([-tangente[:, 1], tangente[:, 0], np.zeros(len(tangente))], axis=1)
+        normal /= np.linalg.norm(normal, axis=1, keepdims=True)
+        ceros, unos = np.zeros(self.SEGMENTS), np.ones(self.SEGMENTS)
+        superficie = self._quads(
+            left[:-1], left[1:], right[1:], right[:-1],
+            np.stack([normal[:-1], normal[1:], normal[1:], normal[:-1]], axis=1),
+            np.stack([np.stack([tex_x[:-1], ceros], axis=1), np.stack([tex_x[1:], ceros], axis=1),
+                      np.stack([tex_x[1:], unos], axis=1), np.stack([tex_x[:-1], unos], axis=1)], axis=1))
+        
+        # CARAS LATERALES: desde el rail hasta el suelo, ligeramente hacia fuera
+        tex_lateral = np.array([[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 1.0]])
+        laterales = []
+        for rail, z, signo in ((left, z_left - 0.01, -1.0), (right, z_right + 0.01, 1.0)):
+            base = np.column_stack([rail[:, 0], rail[:, 1], np.full(len(rail), z)])
+            ground = np.column_stack([rail[:, 0], np.zeros(len(rail)), np.full(len(rail), z)])
+            laterales.append(self._quads(base[:-1], base[1:], ground[1:], ground[:-1],
+                                         np.array([0.0, 0.0, signo]), tex_lateral))
+        
+        # TAPAS: trasera alta (bajo la plataforma) y delantera fija de 0.4 m
+        tapas = []
+        for extremo, wall_height, signo in ((0, self.platform_height - 0.3, -1.0), (-1, 0.4, 1.0)):
+            x = left[extremo][0]
+            bottom_left = [x, 0.0, z_left - 0.01]
+            bottom_right = [x, 0.0, z_right + 0.01]
+            top_right = [x, wall_height, z_right + 0.01]
+            top_left = [x, wall_height, z_left - 0.01]
+            tapas.append(self._quads(*(np.array([v]) for v in (bottom_left, bottom_right, top_right, top_left)),
+                                     np.array([signo, 0.0, 0.0]), tex_lateral))
+        
+        return np.ascontiguousarray(np.concatenate([superficie] + laterales + tapas), dtype=np.float32)
+
+    def dibujar(self, surface_texture, wood_texture):
+        """Dibujar la malla con tres llamadas (superficie, laterales y tapas)"""
+        # Con VBO los punteros son desplazamientos; sin él, direcciones del array en memoria
+        if self.vbo is not None:
+            glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+            base = 0
+        else:
+            base = self.datos.ctypes.data
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_NORMAL_ARRAY)
+        glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+        glVertexPointer(3, GL_FLOAT, self.STRIDE, ctypes.c_void_p(base))
+        glNormalPointer(GL_FLOAT, self.STRIDE, ctypes.c_void_p(base + 12))
+        glTexCoordPointer(2, GL_FLOAT, self.STRIDE, ctypes.c_void_p(base + 24))
+        
+        glEnable(GL_LIGHTING)
+        glEnable(GL_TEXTURE_2D)
+        
+        # SUPERFICIE DE RODAMIENTO - usa textura seleccionada
+        glBindTexture(GL_TEXTURE_2D, surface_texture)
+        glColor3f(1.0, 1.0, 1.0)  # Color blanco para no afectar textura
+        glDrawArrays(GL_QUADS, 0, self.n_superficie)
+        
+        # ESTRUCTURA BASE Y TAPAS - SIEMPRE madera.ppm
+        glBindTexture(GL_TEXTURE_2D, wood_texture)
+        glColor3f(0.7, 0.5, 0.3)  # Color madera
+        glDrawArrays(GL_QUADS, self.n_superficie, self.n_laterales)
+        glColor3f(0.8, 0.6, 0.4)  # Color madera de las tapas
+        glDrawArrays(GL_QUADS, self.n_superficie + self.n_laterales, self.n_tapas)
+        
+        glDisable(GL_TEXTURE_2D)
+        glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+        glDisableClientState(GL_NORMAL_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        if self.vbo is not None:
+            glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def liberar(self):
+        """Liberar el buffer de la GPU"""
+        if self.vbo is not None:
+            glDeleteBuffers(1, [self.vbo])
+            self.vbo = None
+
+class MallaEsfera:
+    """Esfera unitaria teselada una vez (vértices = normales) en buffers de la GPU"""
+
+    def __init__(self, slices, stacks):
+        self.slices = slices
+        self.stacks = stacks
+        # Rejilla de latitud (theta) y longitud (phi); polo norte en +Z como gluSphere
+        theta = np.linspace(0.0, np.pi, stacks + 1)[:, None]
+        phi = np.linspace(0.0, 2.0 * np.pi, slices + 1)[None, :]
+        vertices = np.stack([np.sin(theta) * np.cos(phi), np.sin(theta) * np.sin(phi),
+                             np.broadcast_to(np.cos(theta), (stacks + 1, slices + 1))], axis=-1)
+        self.vertices = np.ascontiguousarray(vertices.reshape(-1, 3), dtype=np.float32)
+        
+        # Dos triángulos por celda, en sentido antihorario visto desde fuera
+        fila = np.arange(stacks)[:, None] * (slices + 1)
+        columna = np.arange(slices)[None, :]
+        a = (fila + columna).ravel()
+        b = a + slices + 1
+        self.indices = np.ascontiguousarray(
+            np.stack([a, b, a + 1, a + 1, b, b + 1], axis=1).ravel(), dtype=np.uint32)
+        
+        self.vbo = None  # None = arrays de cliente (sin soporte de VBO)
+        self.ibo = None
+        try:
+            self.vbo, self.ibo = glGenBuffers(2)
+            glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+            glBufferData(GL_ARRAY_BUFFER, self.vertices.nbytes, self.vertices, GL_STATIC_DRAW)
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ibo)
+            glBufferData(GL_ELEMENT_ARRAY_BUFFER, self.indices.nbytes, self.indices, GL_STATIC_DRAW)
+            glBindBuffer(GL_ARRAY_BUFFER, 0)
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+        except Exception:
+            self.vbo = self.ibo = None
+
+    def dibujar(self, radius):
+        """Dibujar la esfera con el radio dado en la posición actual (GL_NORMALIZE corrige las normales)"""
+        if self.vbo is not None:
+            glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ibo)
+            vertices, indices = ctypes.c_void_p(0), ctypes.c_void_p(0)
+        else:
+            vertices = ctypes.c_void_p(self.vertices.ctypes.data)
+            indices = ctypes.c_void_p(self.indices.ctypes.data)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_NORMAL_ARRAY)
+        glVertexPointer(3, GL_FLOAT, 0, vertices)
+        glNormalPointer(GL_FLOAT, 0, vertices)
+        
+        glPushMatrix()
+        glScalef(radius, radius, radius)
+        glDrawElements(GL_TRIANGLES, len(self.indices), GL_UNSIGNED_INT, indices)
+        glPopMatrix()
+        
+        glDisableClientState(GL_NORMAL_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        if self.vbo is not None:
+            glBindBuffer(GL_ARRAY_BUFFER, 0)
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+
+class MallasEsfera:
+    """Niveles de detalle de la esfera, elegidos por el radio proyectado en pantalla"""
+    NIVELES = ((8, 6), (12, 8), (20, 14), (32, 24))  # (slices, stacks) de menor a mayor detalle
+    UMBRALES_PX = (4.0, 12.0, 30.0)  # Radio en píxeles a partir del cual se pasa al nivel siguiente
+
+    def __init__(self):
+        self.mallas = {}  # MallaEsfera por nivel, creadas la primera vez que se usan
+
+    def nivel_para(self, radio_pixeles):
+        """Índice del nivel de detalle para un radio proyectado"""
+        return int(np.searchsorted(self.UMBRALES_PX, radio_pixeles, side="right"))
+
+    def malla(self, nivel):
+        """MallaEsfera del nivel indicado (creada la primera vez que se pide)"""
+        malla = self.mallas.get(nivel)
+        if malla is None:
+            malla = MallaEsfera(*self.NIVELES[nivel])
+            self.mallas[nivel] = malla
+        return malla
+
+    def dibujar(self, radius, radio_pixeles):
+        """Dibujar una esfera con el nivel de detalle adecuado a su tamaño en pantalla"""
+        self.malla(self.nivel_para(radio_pixeles)).dibujar(radius)
+
+class CacheGlifos:
+    """Glifos ya renderizados por (fuente, carácter, color) para componer texto sin font.render"""
+
+    def __init__(self):
+        self.glifos = {}
+
+    def glifo(self, font, caracter, color):
+        """Superficie del carácter (se renderiza una sola vez)"""
+        clave = (font, caracter, color)
+        superficie = self.glifos.get(clave)
+        if superficie is None:
+            superficie = font.render(caracter, True, color)
+            self.glifos[clave] = superficie
+        return superficie
+
+    def escribir(self, destino, texto, font, color, posicion):
+        """Componer el texto en destino glifo a glifo"""
+        x, y = posicion
+        for caracter in texto:
+            superficie = self.glifo(font, caracter, color)
+            destino.blit(superficie, (x, y))
+            x += superficie.get_width()
+
+class PanelHUD:
+    """Panel de información con superficie y textura persistentes, actualizado por filas"""
+    FONDO = (50, 50, 70, 230)  # Fondo semitransparente
+    BORDE = (120, 120, 170, 255)
+
+    def __init__(self, frecuencia_reloj=FRECUENCIA_RELOJ_HUD, ancho=400, alto=200):
+        self.ancho = ancho  # Tamaño del panel en píxeles
+        self.alto = alto
+        self.frecuencia_reloj = frecuencia_reloj  # Actualizaciones por segundo del cronómetro
+        self.glifos = CacheGlifos()
+        self.superficie = None  # pygame.Surface del panel (se crea en el primer uso)
+        self.textura = None  # Textura OpenGL persistente
+        self.filas = {}  # Contenido dibujado: clave -> (texto, fuente, color, posición)
+        self.subidas = 0  # Filas subidas a la GPU en la última actualización
+
+    def tiempo_mostrado(self, segundos):
+        """Cronómetro redondeado hacia abajo a la frecuencia de actualización"""
+        return np.floor(segundos * self.frecuencia_reloj) / self.frecuencia_reloj
+
+    def _crear(self):
+        """Superficie con fondo y borde, y textura completa (una sola vez)"""
+        self.superficie = pygame.Surface((self.ancho, self.alto), pygame.SRCALPHA)
+        self.superficie.fill(self.FONDO)
+        pygame.draw.rect(self.superficie, self.BORDE, self.superficie.get_rect(), 2)
+        
+        self.textura = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, self.textura)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, self.ancho, self.alto, 0,
+                     GL_RGBA, GL_UNSIGNED_BYTE, pygame.image.tostring(self.superficie, "RGBA", False))
+
+    def _franja(self, fila):
+        """Rectángulo (franja horizontal dentro del borde) que ocupa una fila de texto"""
+        _, font, _, (_, y) = fila
+        return pygame.Rect(2, y, self.ancho - 4, min(font.get_linesize(), self.alto - 2 - y))
+
+    def actualizar(self, filas):
+        """Redibujar y subir con glTexSubImage2D solo las filas nuevas, cambiadas o eliminadas"""
+        if self.superficie is None:
+            self._crear()
+        cambiadas = [clave for clave in set(filas) | set(self.filas) if filas.get(clave) != self.filas.get(clave)]
+        self.subidas = len(cambiadas)
+        if not cambiadas:
+            return
+        
+        # Borrar las franjas afectadas y volver a escribir todas las filas que las tocan
+        franjas = [self._franja(self.filas[c]) for c in cambiadas if c in self.filas]
+        franjas += [self._franja(filas[c]) for c in cambiadas if c in filas]
+        # (recortando a cada franja para no mezclar dos veces el texto que sobresale de ella)
+        for franja in franjas:
+            self.superficie.set_clip(franja)
+            self.superficie.fill(self.FONDO, franja)
+            for fila in filas.values():
+                if self._franja(fila).colliderect(franja):
+                    texto, font, color, posicion = fila
+                    self.glifos.escribir(self.superficie, texto, font, color, posicion)
+        self.superficie.set_clip(None)
+        self.filas = dict(filas)
+        
+        # Subir cada franja completa (filas contiguas en memoria)
+        glBindTexture(GL_TEXTURE_2D, self.textura)
+        for franja in franjas:
+            if franja.height <= 0:
+                continue
+            banda = self.superficie.subsurface((0, franja.y, self.ancho, franja.height))
+            glTexSubImage2D(GL_TEXTURE_2D, 0, 0, franja.y, self.ancho, franja.height,
+                            GL_RGBA, GL_UNSIGNED_BYTE, pygame.image.tostring(banda, "RGBA", False))
+
+    def dibujar(self, x, y):
+        """Dibujar el panel con su textura en coordenadas de pantalla"""
+        glEnable(GL_TEXTURE_2D)
+        glBindTexture(GL_TEXTURE_2D, self.textura)
+        glColor4f(1.0, 1.0, 1.0, 1.0)
+        glBegin(GL_QUADS)
+        glTexCoord2f(0, 0); glVertex2f(x, y)
+        glTexCoord2f(1, 0); glVertex2f(x + self.ancho, y)
+        glTexCoord2f(1, 1); glVertex2f(x + self.ancho, y + self.alto)
+        glTexCoord2f(0, 1); glVertex2f(x, y + self.alto)
+        glEnd()
+        glDisable(GL_TEXTURE_2D)
+
+    def liberar(self):
+        """Liberar la textura del panel"""
+        if self.textura is not None:
+            glDeleteTextures([self.textura])
+            self.textura = None
+
+# Archivo alternativo y textura procedural de las superficies de las curvas por tipo
+TEXTURAS_CURVAS = {
+    "Hierro": ("hierro.ppm", "hierro"),
+    "Madera": ("madera2.ppm", "madera"),  # Para madera, madera2.ppm en las superficies de las rampas
+    "Plástico": ("plastico.ppm", "plastico"),
+}
+
 class Escena:
-    def __init__(self, config_textura):
-        # Inicializar la escena con configuración de texturas
+    def __init__(self, config_textura, usar_glsl=False):
+        # Inicializar la escena con configuración de texturas (usar_glsl: bolas instanciadas con shaders)
         self.config_textura = config_textura
+        self.texturas = GESTOR_TEXTURAS  # Texturas compartidas con contador de referencias
         self.wood_texture = None  # Textura de madera para estructura
         self.ramp_surface_texture = None  # Textura específica para las superficies de las curvas
-        self.reflection_system = RealTimeReflectionSystem(cube_size=128)
+        self.rampas_adicionales = []  # Rampas extra (p. ej. la óptima) como (funcion, color, z_offset)
+        self.mallas_rampa = {}  # MallaRampa por (curve_func, z_offset)
+        self.version_mallas = None  # Versión de la caché de geometría con la que se teselaron
+        self.reflejos = ProgramadorReflejos()  # Sondas de reflejo por bola
+        self.mallas_esfera = MallasEsfera()  # Esferas precalculadas con niveles de detalle
+        self.bolas_glsl = None  # Render instanciado de las bolas (None = tubería fija)
+        self.radios_pantalla = {}  # Radio proyectado de cada bola (por id(ball)) en el frame actual
+        self.camara = None  # (vista, proyección) del frame actual, devueltas por setup_camera_func
+        self.hud = PanelHUD()  # Panel de información persistente
+        self.perfilador = None  # Perfilador de etapas del frame (opcional, ver Perfilador.py)
+        self.hud_perfil = PanelHUD(ancho=420, alto=260)  # Superposición con los percentiles del perfilador
+        self.entorno_estatico = None  # Cubemap con la parte estática de la escena (piso, muro, rampas)
+        self.clave_entorno = None  # Estado de la geometría con el que se horneó el entorno
+        self.platform_position_x = Rampas.A_METERS[0]  # Posición actual de la plataforma (para los reflejos)
+        self.listas = {}  # Display lists de la parte estática de la escena
         self.cargar_texturas()
+        self.compilar_escena_estatica()
+        if usar_glsl:
+            self.activar_glsl()
+
+    def activar_glsl(self):
+        """Dibujar las bolas con el programa GLSL instanciado; si no es posible se sigue con la tubería fija"""
+        try:
+            self.bolas_glsl = BolasInstanciadas(self.mallas_esfera)
+            print("Bolas dibujadas con GLSL en una sola llamada instanciada")
+        except Exception as error:
+            self.bolas_glsl = None
+            print(f"ADVERTENCIA: No se pudo activar el render GLSL ({error}). Usando la tubería fija.")
 
     def cargar_texturas(self):
         """Carga las texturas según la configuración - solo superficies de curvas cambian"""
-        # Cargar textura de madera para estructura (SIEMPRE madera.ppm)
-        self.wood_texture = load_ppm_texture("madera.ppm")
-        if self.wood_texture is None:
-            print("ADVERTENCIA: No se encontró madera.ppm. Usando textura procedural de madera.")
-            self.wood_texture = create_improved_wood_texture()
-        else:
-            print("Textura de madera (estructura) cargada (madera.ppm)")
+        self.liberar_texturas()
+        # Cargar textura de madera para estructura (SIEMPRE madera.ppm; si falta o está dañada, procedural)
+        # Lectura y generación en segundo plano: mientras tanto se ve un texel del color del material
+        self.wood_texture = self.texturas.material(("madera.ppm",), "madera", en_segundo_plano=True,
+                                                   provisional=TEXTURAS_RAMPA[2]["color_base"])
         
-        # Cargar textura específica para las superficies de las curvas según selección
+        # Superficies de las curvas: archivo configurado, archivo alternativo del tipo y, si fallan, procedural
         texture_file = self.config_textura["archivo"]
-        self.ramp_surface_texture = load_ppm_texture(texture_file)
-        
-        if self.ramp_surface_texture is None:
-            # Si no se encuentra el archivo, crear textura procedural según el tipo
-            if self.config_textura["tipo"] == "Hierro":
-                self.ramp_surface_texture = load_ppm_texture("hierro.ppm")
-                if self.ramp_surface_texture is None:
-                    print("ADVERTENCIA: No se encontró hierro.ppm. Usando textura procedural de hierro.")
-                    self.ramp_surface_texture = create_improved_iron_texture()
-                else:
-                    print("Textura de hierro para curvas cargada (hierro.ppm)")
-            elif self.config_textura["tipo"] == "Madera":
-                # Para madera, usar madera2.ppm para las superficies de las rampas
-                self.ramp_surface_texture = load_ppm_texture("madera2.ppm")
-                if self.ramp_surface_texture is None:
-                    print("ADVERTENCIA: No se encontró madera2.ppm. Usando textura procedural de madera.")
-                    self.ramp_surface_texture = create_improved_wood_texture()
-                else:
-                    print("Textura de madera para curvas cargada (madera2.ppm)")
-            elif self.config_textura["tipo"] == "Plástico":
-                self.ramp_surface_texture = load_ppm_texture("plastico.ppm")
-                if self.ramp_surface_texture is None:
-                    print("ADVERTENCIA: No se encontró plastico.ppm. Usando textura procedural de plástico.")
-                    self.ramp_surface_texture = self.create_plastic_texture()
-                else:
-                    print("Textura de plástico para curvas cargada (plastico.ppm)")
-        else:
-            print(f"Textura de {self.config_textura['tipo']} para curvas cargada ({texture_file})")
+        alternativo, procedural = TEXTURAS_CURVAS.get(self.config_textura["tipo"], (texture_file, None))
+        self.ramp_surface_texture = self.texturas.material(
+            (texture_file, alternativo), procedural, en_segundo_plano=True,
+            provisional=self.config_textura.get("color_base", COLOR_PROVISIONAL))
+        
+        # Las texturas procedurales salen de la caché en disco si ya se generaron en otro arranque
+        if CACHE_TEXTURAS.aciertos or CACHE_TEXTURAS.fallos:
+            print(f"Texturas procedurales: {CACHE_TEXTURAS.aciertos} desde la caché, "
+                  f"{CACHE_TEXTURAS.fallos} generadas ({CACHE_TEXTURAS.directorio})")
+        print(f"Texturas residentes: {self.texturas.residentes()} "
+              f"({self.texturas.bytes_residentes / 2 ** 20:.1f} MB de {self.texturas.presupuesto / 2 ** 20:.0f} MB), "
+              f"{self.texturas.cargas_pendientes()} cargando en segundo plano")
+
+    def liberar_texturas(self):
+        """Soltar las texturas de la escena en el gestor (se comparten con otras escenas mientras quepan)"""
+        for textura in (self.wood_texture, self.ramp_surface_texture):
+            self.texturas.soltar(textura)
+        self.wood_texture = self.ramp_surface_texture = None
 
     def create_plastic_texture(self):
         """Crear textura procedural de plástico para superficies de curvas"""
-        texture_id = glGenTextures(1)
-        glBindTexture(GL_TEXTURE_2D, texture_id)
-        
-        # Configurar parámetros de textura
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_REPEAT)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT)
-        
-        # Crear datos de textura procedural
-        width, height = 256, 256
-        texture_data = np.zeros((height, width, 3), dtype=np.uint8)
-        
-        # Color base para plástico (azul grisáceo claro)
-        base_color = [180, 190, 210]
-        
-        for y in range(height):
-            for x in range(width):
-                # Patrón sutil para plástico con ruido y grano
-                noise = np.random.normal(0, 6)
-                grain = np.sin(x * 0.05) * np.cos(y * 0.05) * 8
-                
-                # Calcular componentes de color con variaciones
-                r = max(150, min(220, base_color[0] + grain + noise))
-                g = max(160, min(230, base_color[1] + grain * 0.8 + noise * 0.9))
-                b = max(170, min(240, base_color[2] + grain * 0.6 + noise * 0.8))
-                
-                # Añadir brillo plástico sutil en patrones
-                if (x + y) % 80 < 3:
-                    r = min(255, r + 40)
-                    g = min(255, g + 40)
-                    b = min(255, b + 40)
-                
-                texture_data[y, x] = [int(r), int(g), int(b)]
-        
-        # Cargar textura en OpenGL
-        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGB, width, height, 0, 
-                    GL_RGB, GL_UNSIGNED_BYTE, texture_data)
-        
-        return texture_id
+        return create_plastic_texture()
 
-    def draw_floor(self):
-        """Dibujar plano de referencia con patrón de ajedrez"""
-        glEnable(GL_LIGHTING)
-        glColor4f(0.45, 0.45, 0.5, 1.0)  # Color base del piso
-        
+    def compilar_escena_estatica(self):
+        """Compilar en display lists el piso y las mallas unitarias de plataforma y muro"""
+        self.listas = {}
+        self.listas["piso"] = self._compilar_lista(self._emitir_piso)
+        self.listas["plataforma"] = self._compilar_lista(lambda: self._emitir_cubo(PLATFORM_TEX_COORDS))
+        self.listas["muro"] = self._compilar_lista(lambda: self._emitir_cubo(WALL_TEX_COORDS))
+
+    @staticmethod
+    def _compilar_lista(emitir):
+        """Grabar en una display list las llamadas de dibujo de emitir()"""
+        lista = glGenLists(1)
+        glNewList(lista, GL_COMPILE)
+        emitir()
+        glEndList()
+        return lista
+
+    @staticmethod
+    def _emitir_piso():
+        """Plano de referencia con patrón de ajedrez (se graba una sola vez)"""
         glBegin(GL_QUADS)
         size = 20  # Tamaño del piso
         for x in range(-size, size):
@@ -202,10 +752,31 @@ class Escena:
                 glVertex3f(x, 0, z+1)
         glEnd()
 
+    @staticmethod
+    def _emitir_cubo(tex_coords):
+        """Cubo unitario centrado en el origen con las coordenadas de textura dadas"""
+        glBegin(GL_QUADS)
+        for face in CUBE_INDICES:
+            for vertex_idx in face:
+                glTexCoord2fv(tex_coords[vertex_idx])
+                glVertex3fv(CUBE_VERTICES[vertex_idx])
+        glEnd()
+
+    def draw_floor(self):
+        """Dibujar plano de referencia con patrón de ajedrez"""
+        glEnable(GL_LIGHTING)
+        glCallList(self.listas["piso"])
+
+    def ancho_rampas(self):
+        """(centro z, ancho) que cubre las rampas clásicas y las adicionales con MARGEN_RAMPAS_Z a cada lado"""
+        offsets = [-Rampas.RAMP_SEPARATION, 0.0, Rampas.RAMP_SEPARATION] + [z for _, _, z in self.rampas_adicionales]
+        z_min, z_max = min(offsets), max(offsets)
+        return (z_min + z_max) / 2.0, z_max - z_min + 2.0 * MARGEN_RAMPAS_Z
+
     def draw_platform(self, platform_position_x, platform_height):
         """Dibujar plataforma con textura de madera"""
         # No dibujar si la plataforma se movió demasiado
-        if platform_position_x < A_METERS[0] - 3.0:
+        if platform_position_x < Rampas.A_METERS[0] - 3.0:
             return
             
         glEnable(GL_LIGHTING)
@@ -213,55 +784,16 @@ class Escena:
         glBindTexture(GL_TEXTURE_2D, self.wood_texture)  # SIEMPRE madera.ppm
         glColor3f(0.9, 0.7, 0.5)  # Color de madera
         
-        # Dimensiones de la plataforma
-        platform_width = 3.0
+        # Dimensiones de la plataforma (a lo ancho cubre todas las rampas, incluida la óptima)
+        platform_z, platform_width = self.ancho_rampas()
         platform_length = 2.0
         platform_thickness = 0.1
         
-        x_position = platform_position_x
-        y_position = platform_height
-        z_center = 0.0
-        
-        # Transformar y escalar la plataforma
+        # Malla unitaria precompilada: solo cambia la transformación
         glPushMatrix()
-        glTranslatef(x_position, y_position, z_center)
+        glTranslatef(platform_position_x, platform_height, platform_z)
         glScalef(platform_length, platform_thickness, platform_width)
-        
-        # Definir vértices del cubo
-        size = 0.5
-        vertices = [
-            [-size, -size, size], [size, -size, size], [size, size, size], [-size, size, size],
-            [-size, -size, -size], [-size, size, -size], [size, size, -size], [size, -size, -size],
-            [-size, size, -size], [-size, size, size], [size, size, size], [size, size, -size],
-            [-size, -size, -size], [size, -size, -size], [size, -size, size], [-size, -size, size],
-            [size, -size, -size], [size, size, -size], [size, size, size], [size, -size, size],
-            [-size, -size, -size], [-size, -size, size], [-size, size, size], [-size, size, -size]
-        ]
-        
-        # Coordenadas de textura para cada vértice
-        tex_coords = [
-            [0, 0], [1, 0], [1, 1], [0, 1],
-            [0, 0], [0, 1], [1, 1], [1, 0],
-            [0, 1], [0, 0], [1, 0], [1, 1],
-            [0, 0], [1, 0], [1, 1], [0, 1],
-            [0, 0], [0, 1], [1, 1], [1, 0],
-            [0, 0], [1, 0], [1, 1], [0, 1]
-        ]
-        
-        # Índices de las caras del cubo
-        indices = [
-            [0, 1, 2, 3], [4, 5, 6, 7], [8, 9, 10, 11],
-            [12, 13, 14, 15], [16, 17, 18, 19], [20, 21, 22, 23]
-        ]
-        
-        # Dibujar todas las caras del cubo
-        glBegin(GL_QUADS)
-        for face in indices:
-            for i, vertex_idx in enumerate(face):
-                glTexCoord2fv(tex_coords[vertex_idx])
-                glVertex3fv(vertices[vertex_idx])
-        glEnd()
-        
+        glCallList(self.listas["plataforma"])
         glPopMatrix()
         glDisable(GL_TEXTURE_2D)
 
@@ -273,237 +805,87 @@ class Escena:
         glColor3f(0.8, 0.6, 0.4)  # Color de madera
         
         # Dimensiones del muro
-        wall_x = B_METERS[0] + 0.2  # Posición X del muro
+        wall_x = Rampas.B_METERS[0] + 0.2  # Posición X del muro
         wall_height = 2.0
-        wall_width = 3.0
+        wall_z, wall_width = self.ancho_rampas()  # Detiene las bolas de todas las rampas
         wall_thickness = 0.1
         
-        # Transformar y escalar el muro
+        # Malla unitaria precompilada: solo cambia la transformación
         glPushMatrix()
-        glTranslatef(wall_x, wall_height/2, 0.0)
+        glTranslatef(wall_x, wall_height/2, wall_z)
         glScalef(wall_thickness, wall_height, wall_width)
-        
-        # Vértices del cubo (mismo que plataforma pero con diferentes coordenadas de textura)
-        size = 0.5
-        vertices = [
-            [-size, -size, size], [size, -size, size], [size, size, size], [-size, size, size],
-            [-size, -size, -size], [-size, size, -size], [size, size, -size], [size, -size, -size],
-            [-size, size, -size], [-size, size, size], [size, size, size], [size, size, -size],
-            [-size, -size, -size], [size, -size, -size], [size, -size, size], [-size, -size, size],
-            [size, -size, -size], [size, size, -size], [size, size, size], [size, -size, size],
-            [-size, -size, -size], [-size, -size, size], [-size, size, size], [-size, size, -size]
-        ]
-        
-        # Coordenadas de textura escaladas para el muro
-        tex_coords = [
-            [0, 0], [2, 0], [2, 2], [0, 2],
-            [0, 0], [0, 2], [2, 2], [2, 0],
-            [0, 2], [0, 0], [2, 0], [2, 2],
-            [0, 0], [2, 0], [2, 2], [0, 2],
-            [0, 0], [0, 2], [2, 2], [2, 0],
-            [0, 0], [2, 0], [2, 2], [0, 2]
-        ]
-        
-        indices = [
-            [0, 1, 2, 3], [4, 5, 6, 7], [8, 9, 10, 11],
-            [12, 13, 14, 15], [16, 17, 18, 19], [20, 21, 22, 23]
-        ]
-        
-        # Dibujar el muro
-        glBegin(GL_QUADS)
-        for face in indices:
-            for i, vertex_idx in enumerate(face):
-                glTexCoord2fv(tex_coords[vertex_idx])
-                glVertex3fv(vertices[vertex_idx])
-        glEnd()
-        
+        glCallList(self.listas["muro"])
         glPopMatrix()
         glDisable(GL_TEXTURE_2D)
 
     def draw_ramp_base(self, curve_func, color, z_offset=0.0, platform_height=None):
         """Dibujar base de rampa - SOLO la superficie de la curva cambia de textura"""
-        base_width = 0.7  # Ancho de la base de la rampa
-        segments = 100    # Número de segmentos para suavizar la curva
-        
-        # SUPERFICIE DE RODAMIENTO - usa textura seleccionada
-        glEnable(GL_LIGHTING)
-        glEnable(GL_TEXTURE_2D)
-        glBindTexture(GL_TEXTURE_2D, self.ramp_surface_texture)  # Textura seleccionada
-        glColor3f(1.0, 1.0, 1.0)  # Color blanco para no afectar textura
-        
-        # Calcular longitud total de la curva para mapeo de textura
-        total_length = 0
-        prev_point = None
-        for i in range(segments + 1):
-            t = i / segments
-            left, right = curve_func(t, z_offset=z_offset)
-            center = (left + right) / 2.0
-            if prev_point is not None:
-                total_length += np.linalg.norm(center - prev_point)
-            prev_point = center
-        
-        # Dibujar superficie de rodamiento con textura seleccionada
-        glBegin(GL_QUADS)
-        current_length = 0
-        prev_point = None
-        
-        for i in range(segments):
-            t1 = i / segments
-            t2 = (i + 1) / segments
-            
-            # Obtener puntos de la curva
-            left1, right1 = curve_func(t1, z_offset=z_offset)
-            left2, right2 = curve_func(t2, z_offset=z_offset)
-            
-            # Calcular centros para longitud
-            center1 = (left1 + right1) / 2.0
-            center2 = (left2 + right2) / 2.0
-            if prev_point is not None:
-                segment_length = np.linalg.norm(center1 - prev_point)
-                current_length += segment_length
-            prev_point = center1
-            
-            # Calcular coordenadas de textura basadas en longitud
-            tex_x1 = current_length / total_length * 4.0
-            tex_x2 = (current_length + np.linalg.norm(center2 - center1)) / total_length * 4.0
-            
-            # Dibujar cuadrilátero de la superficie
-            glTexCoord2f(tex_x1, 0.0); glVertex3f(left1[0], left1[1], left1[2])
-            glTexCoord2f(tex_x2, 0.0); glVertex3f(left2[0], left2[1], left2[2])
-            glTexCoord2f(tex_x2, 1.0); glVertex3f(right2[0], right2[1], right2[2])
-            glTexCoord2f(tex_x1, 1.0); glVertex3f(right1[0], right1[1], right1[2])
-        glEnd()
-        
-        glDisable(GL_TEXTURE_2D)
-        
-        # ESTRUCTURA BASE - SIEMPRE usa textura de madera (madera.ppm)
-        glEnable(GL_TEXTURE_2D)
-        glBindTexture(GL_TEXTURE_2D, self.wood_texture)  # SIEMPRE madera.ppm
-        glColor3f(0.7, 0.5, 0.3)  # Color madera
-        
-        for i in range(segments):
-            t1 = i / segments
-            t2 = (i + 1) / segments
-            
-            left1, right1 = curve_func(t1, z_offset=z_offset)
-            left2, right2 = curve_func(t2, z_offset=z_offset)
-            
-            # Calcular puntos base y en el suelo
-            base_left1 = np.array([left1[0], left1[1], -base_width/2 + z_offset])
-            base_right1 = np.array([right1[0], right1[1], base_width/2 + z_offset])
-            base_left2 = np.array([left2[0], left2[1], -base_width/2 + z_offset])
-            base_right2 = np.array([right2[0], right2[1], base_width/2 + z_offset])
-            
-            ground_left1 = np.array([left1[0], 0, -base_width/2 + z_offset])
-            ground_right1 = np.array([right1[0], 0, base_width/2 + z_offset])
-            ground_left2 = np.array([left2[0], 0, -base_width/2 + z_offset])
-            ground_right2 = np.array([right2[0], 0, base_width/2 + z_offset])
-            
-            # Caras laterales - SIEMPRE madera.ppm
-            glBegin(GL_QUADS)
-            # Cara lateral izquierda
-            glTexCoord2f(0.0, 0.0); glVertex3f(base_left1[0], base_left1[1], base_left1[2] - 0.01)
-            glTexCoord2f(1.0, 0.0); glVertex3f(base_left2[0], base_left2[1], base_left2[2] - 0.01)
-            glTexCoord2f(1.0, 1.0); glVertex3f(ground_left2[0], ground_left2[1], ground_left2[2] - 0.01)
-            glTexCoord2f(0.0, 1.0); glVertex3f(ground_left1[0], ground_left1[1], ground_left1[2] - 0.01)
-            
-            # Cara lateral derecha
-            glTexCoord2f(0.0, 0.0); glVertex3f(base_right1[0], base_right1[1], base_right1[2] + 0.01)
-            glTexCoord2f(1.0, 0.0); glVertex3f(base_right2[0], base_right2[1], base_right2[2] + 0.01)
-            glTexCoord2f(1.0, 1.0); glVertex3f(ground_right2[0], ground_right2[1], ground_right2[2] + 0.01)
-            glTexCoord2f(0.0, 1.0); glVertex3f(ground_right1[0], ground_right1[1], ground_right1[2] + 0.01)
-            glEnd()
-        
-        glDisable(GL_TEXTURE_2D)
-        
-        # Dibujar tapas - SIEMPRE madera.ppm
-        self.draw_back_cap(curve_func, z_offset, platform_height)
-        self.draw_front_cap(curve_func, z_offset)
-
-    def draw_back_cap(self, curve_func, z_offset=0.0, platform_height=None):
-        """Dibujar tapa trasera ALTA con textura de madera"""
-        glEnable(GL_LIGHTING)
-        glEnable(GL_TEXTURE_2D)
-        glBindTexture(GL_TEXTURE_2D, self.wood_texture)  # SIEMPRE madera.ppm
-        glColor3f(0.8, 0.6, 0.4)  # Color madera
-        
-        base_width = 0.7
-        
-        # Calcular altura de la tapa
         if platform_height is None:
-            wall_height = A_METERS[1] + 0.3
-        else:
-            wall_height = platform_height - 0.3  # Ajustar altura
-        
-        # Obtener punto inicial de la curva
-        left_start, right_start = curve_func(0.0, z_offset=z_offset)
-        
-        # Calcular vértices de la tapa
-        bottom_left = np.array([left_start[0], 0, -base_width/2 - 0.01 + z_offset])
-        bottom_right = np.array([right_start[0], 0, base_width/2 + 0.01 + z_offset])
-        top_left = np.array([left_start[0], wall_height, -base_width/2 - 0.01 + z_offset])
-        top_right = np.array([right_start[0], wall_height, base_width/2 + 0.01 + z_offset])
-        
-        # Dibujar tapa
-        glBegin(GL_QUADS)
-        glTexCoord2f(0.0, 0.0); glVertex3f(bottom_left[0], bottom_left[1], bottom_left[2])
-        glTexCoord2f(1.0, 0.0); glVertex3f(bottom_right[0], bottom_right[1], bottom_right[2])
-        glTexCoord2f(1.0, 1.0); glVertex3f(top_right[0], top_right[1], top_right[2])
-        glTexCoord2f(0.0, 1.0); glVertex3f(top_left[0], top_left[1], top_left[2])
-        glEnd()
-        
-        glDisable(GL_TEXTURE_2D)
-
-    def draw_front_cap(self, curve_func, z_offset=0.0):
-        """Dibujar tapa delantera con textura de madera"""
-        glEnable(GL_LIGHTING)
-        glEnable(GL_TEXTURE_2D)
-        glBindTexture(GL_TEXTURE_2D, self.wood_texture)  # SIEMPRE madera.ppm
-        glColor3f(0.8, 0.6, 0.4)  # Color madera
-        
-        base_width = 0.7
-        wall_height = 0.4  # Altura fija para tapa delantera
-        
-        # Obtener punto final de la curva
-        left_end, right_end = curve_func(1.0, z_offset=z_offset)
-        
-        # Calcular vértices de la tapa
-        bottom_left = np.array([left_end[0], 0, -base_width/2 - 0.01 + z_offset])
-        bottom_right = np.array([right_end[0], 0, base_width/2 + 0.01 + z_offset])
-        top_left = np.array([left_end[0], wall_height, -base_width/2 - 0.01 + z_offset])
-        top_right = np.array([right_end[0], wall_height, base_width/2 + 0.01 + z_offset])
-        
-        # Dibujar tapa
-        glBegin(GL_QUADS)
-        glTexCoord2f(0.0, 0.0); glVertex3f(bottom_left[0], bottom_left[1], bottom_left[2])
-        glTexCoord2f(1.0, 0.0); glVertex3f(bottom_right[0], bottom_right[1], bottom_right[2])
-        glTexCoord2f(1.0, 1.0); glVertex3f(top_right[0], top_right[1], top_right[2])
-        glTexCoord2f(0.0, 1.0); glVertex3f(top_left[0], top_left[1], top_left[2])
-        glEnd()
-        
-        glDisable(GL_TEXTURE_2D)
+            platform_height = Rampas.A_METERS[1] + 0.6  # Tapa trasera a A + 0.3
+        
+        # Las mallas se teselan de nuevo solo si set_puntos cambió la geometría
+        if self.version_mallas != CACHE_GEOMETRIA.version:
+            for malla in self.mallas_rampa.values():
+                malla.liberar()
+            self.mallas_rampa = {}
+            self.version_mallas = CACHE_GEOMETRIA.version
+        
+        clave = (curve_func, z_offset)
+        malla = self.mallas_rampa.get(clave)
+        if malla is None or malla.platform_height != platform_height:
+            if malla is not None:
+                malla.liberar()
+            malla = MallaRampa(curve_func, z_offset, platform_height)
+            self.mallas_rampa[clave] = malla
+        malla.dibujar(self.ramp_surface_texture, self.wood_texture)
 
-    def render_scene_for_reflection(self, exclude_ball_position=None, balls=None):
-        """Renderizar la escena para reflejos (excluyendo bola actual)"""
+    def render_static_for_reflection(self, platform_height):
+        """Parte estática de la escena para el entorno de los reflejos (piso, muro y rampas)"""
         self.draw_floor()
-        self.draw_platform(A_METERS[0], A_METERS[1] + 0.3)
         self.draw_wall()
         
         # Dibujar bases de las rampas
-        platform_height_reflection = A_METERS[1] + 0.3
-        self.draw_ramp_base(line_curve_3d, (1.0, 1.0, 0.0), z_offset=-RAMP_SEPARATION, platform_height=platform_height_reflection)
-        self.draw_ramp_base(parabolic_curve_3d, (0.0, 0.0, 1.0), z_offset=0.0, platform_height=platform_height_reflection)
-        self.draw_ramp_base(cycloid_curve_3d, (1.0, 0.0, 0.0), z_offset=RAMP_SEPARATION, platform_height=platform_height_reflection)
+        self.draw_ramp_base(line_curve_3d, (1.0, 1.0, 0.0), z_offset=-Rampas.RAMP_SEPARATION, platform_height=platform_height)
+        self.draw_ramp_base(parabolic_curve_3d, (0.0, 0.0, 1.0), z_offset=0.0, platform_height=platform_height)
+        self.draw_ramp_base(cycloid_curve_3d, (1.0, 0.0, 0.0), z_offset=Rampas.RAMP_SEPARATION, platform_height=platform_height)
+        for curve_func, color, z_offset in self.rampas_adicionales:
+            self.draw_ramp_base(curve_func, color, z_offset=z_offset, platform_height=platform_height)
+
+    def render_scene_for_reflection(self, exclude_ball_position=None, balls=None, platform_height=None):
+        """Renderizar la parte dinámica de la escena para reflejos (excluyendo bola actual)"""
+        # Lo estático llega ya copiado del entorno horneado (ver entorno_para_reflejos)
+        if platform_height is None:
+            platform_height = Rampas.A_METERS[1] + 0.3
+        self.draw_platform(self.platform_position_x, platform_height)
         
         # Dibujar otras bolas (excluyendo la actual si se especifica)
         if balls is not None:
             for ball in balls:
                 ball_pos = ball.get_render_position()
-                if exclude_ball_position is None or np.linalg.norm(ball_pos - exclude_ball_position) > 0.5:
+                if exclude_ball_position is None:
                     self.draw_ball_for_reflection(ball)
+                    continue
+                distancia = np.linalg.norm(ball_pos - exclude_ball_position)
+                if distancia > 0.5:
+                    self.draw_ball_for_reflection(ball, distancia)
 
-    def draw_ball_for_reflection(self, ball):
-        """Dibujar bola para el mapa de reflejos"""
+    def entorno_para_reflejos(self, platform_height):
+        """Cubemap del entorno estático; se hornea de nuevo solo si cambia la geometría"""
+        # (y cuando termina de cargarse una textura: el primer horneado puede tener los texels provisionales)
+        clave = (CACHE_GEOMETRIA.version, tuple((f, z) for f, _, z in self.rampas_adicionales), platform_height,
+                 self.texturas.version)
+        if self.entorno_estatico is None or clave != self.clave_entorno:
+            if self.entorno_estatico is None:
+                self.entorno_estatico = RealTimeReflectionSystem(cube_size=self.reflejos.tamanos[-1], verbose=False)
+            # Punto de captura: centro del recorrido de las rampas
+            centro = [(Rampas.A_METERS[0] + Rampas.B_METERS[0]) / 2.0, (Rampas.A_METERS[1] + Rampas.B_METERS[1]) / 2.0, 0.0]
+            self.entorno_estatico.render_to_cube_map(
+                centro, lambda exclude_pos: self.render_static_for_reflection(platform_height))
+            self.clave_entorno = clave
+        return self.entorno_estatico
+
+    def draw_ball_for_reflection(self, ball, distancia=1.0):
+        """Dibujar bola para el mapa de reflejos (distancia a la sonda, para el nivel de detalle)"""
         glPushMatrix()
         render_pos = ball.get_render_position()
         glTranslatef(render_pos[0], render_pos[1], render_pos[2])
@@ -515,22 +897,15 @@ class Escena:
         glMaterialfv(GL_FRONT, GL_AMBIENT, mat_ambient)
         glMaterialfv(GL_FRONT, GL_DIFFUSE, mat_diffuse)
         
-        # Dibujar esfera
-        radius = ball.radius
-        gluSphere(gluNewQuadric(), radius, 16, 16)
+        # Dibujar esfera (cara de cubemap de 90°: radio proyectado = r·(tamaño/2)/distancia)
+        radio_pixeles = ball.radius * self.reflejos.tamanos[-1] / 2.0 / max(distancia, 1e-3)
+        self.mallas_esfera.dibujar(ball.radius, radio_pixeles)
         
         glPopMatrix()
 
     def draw_ball_3d(self, ball, balls):
         """Versión simple - color con reflejos sutiles"""
-        # Actualizar cubemap
-        if pygame.time.get_ticks() % 60 == 0:
-            ball_position = ball.get_render_position()
-            self.reflection_system.render_to_cube_map(
-                ball_position, 
-                lambda exclude_pos: self.render_scene_for_reflection(exclude_pos, balls)
-            )
-        
+        # El cubemap de la bola lo mantiene al día ProgramadorReflejos (en render)
         glPushMatrix()
         ball_position = ball.get_render_position()
         glTranslatef(ball_position[0], ball_position[1], ball_position[2])
@@ -551,7 +926,7 @@ class Escena:
         
         # Habilitar reflejos
         glEnable(GL_TEXTURE_CUBE_MAP)
-        glBindTexture(GL_TEXTURE_CUBE_MAP, self.reflection_system.cube_map)
+        glBindTexture(GL_TEXTURE_CUBE_MAP, self.reflejos.sonda(ball).cube_map)
         glEnable(GL_TEXTURE_GEN_S)
         glEnable(GL_TEXTURE_GEN_T)
         glEnable(GL_TEXTURE_GEN_R)
@@ -559,8 +934,8 @@ class Escena:
         glTexGeni(GL_T, GL_TEXTURE_GEN_MODE, GL_REFLECTION_MAP)
         glTexGeni(GL_R, GL_TEXTURE_GEN_MODE, GL_REFLECTION_MAP)
         
-        # Dibujar esfera
-        gluSphere(gluNewQuadric(), ball.radius, 32, 32)
+        # Dibujar esfera con el nivel de detalle de su tamaño en pantalla
+        self.mallas_esfera.dibujar(ball.radius, self.radios_pantalla.get(id(ball), np.inf))
         
         # Limpiar
         glDisable(GL_TEXTURE_GEN_S)
@@ -570,32 +945,72 @@ class Escena:
         glPopMatrix()
 
     def render(self, setup_camera_func, platform_position_x, platform_height, balls, simulation_started, start_time, 
-               all_balls_stopped, last_ball_stop_time, font, small_font):
-        """Renderizar toda la escena"""
+               all_balls_stopped, last_ball_stop_time, font, small_font, tiempo_simulado=None):
+        """Renderizar toda la escena (tiempo_simulado: reloj del panel en lugar del de pygame)"""
         # Limpiar buffers
         glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
         
+        # Subir una porción de las texturas cargadas en segundo plano
+        with self._etapa("texturas"):
+            self.texturas.procesar_cargas()
+        
         # Configurar cámara
-        setup_camera_func()
+        # (setup_camera_func devuelve (vista, proyección) para el render GLSL; None = leerlas de la tubería fija)
+        self.camara = setup_camera_func()
         
         # Renderizar escena 3D
-        self.draw_floor()
-        self.draw_platform(platform_position_x, platform_height)
-        self.draw_wall()
+        with self._etapa("piso"):
+            self.draw_floor()
+        with self._etapa("plataforma"):
+            self.draw_platform(platform_position_x, platform_height)
+            self.draw_wall()
         
         # Dibujar bases de las rampas
-        self.draw_ramp_base(line_curve_3d, (1.0, 1.0, 0.0), z_offset=-RAMP_SEPARATION, platform_height=platform_height)
-        self.draw_ramp_base(parabolic_curve_3d, (0.0, 0.0, 1.0), z_offset=0.0, platform_height=platform_height)
-        self.draw_ramp_base(cycloid_curve_3d, (1.0, 0.0, 0.0), z_offset=RAMP_SEPARATION, platform_height=platform_height)
+        with self._etapa("rampas"):
+            self.draw_ramp_base(line_curve_3d, (1.0, 1.0, 0.0), z_offset=-Rampas.RAMP_SEPARATION, platform_height=platform_height)
+            self.draw_ramp_base(parabolic_curve_3d, (0.0, 0.0, 1.0), z_offset=0.0, platform_height=platform_height)
+            self.draw_ramp_base(cycloid_curve_3d, (1.0, 0.0, 0.0), z_offset=Rampas.RAMP_SEPARATION, platform_height=platform_height)
+            for curve_func, color, z_offset in self.rampas_adicionales:
+                self.draw_ramp_base(curve_func, color, z_offset=z_offset, platform_height=platform_height)
+        
+        # Tamaño en pantalla de cada bola con la cámara de setup_camera (LOD y resolución de sondas)
+        self.radios_pantalla = radios_en_pantalla(balls, self.camara)
+        
+        # Actualizar sondas de reflejo dentro del presupuesto del frame (sobre el entorno estático horneado)
+        with self._etapa("reflejos"):
+            self.platform_position_x = platform_position_x
+            fondo = self.entorno_para_reflejos(platform_height)
+            self.reflejos.actualizar(
+                balls, lambda exclude_pos: self.render_scene_for_reflection(exclude_pos, balls, platform_height),
+                fondo=fondo, radios=self.radios_pantalla)
         
         # Dibujar bolas con reflejos en tiempo real
-        for ball in balls:
-            self.draw_ball_3d(ball, balls)
+        with self._etapa("bolas"):
+            if self.bolas_glsl is not None:
+                self.bolas_glsl.dibujar(balls, self.radios_pantalla, self.reflejos, fondo, self.camara)
+            else:
+                for ball in balls:
+                    self.draw_ball_3d(ball, balls)
         
         # Dibujar panel de información
-        self.draw_text_panel(simulation_started, start_time, all_balls_stopped, last_ball_stop_time, balls, font, small_font)
+        with self._etapa("hud"):
+            self.draw_text_panel(simulation_started, start_time, all_balls_stopped, last_ball_stop_time, balls, font, small_font,
+                                 tiempo_simulado)
+
+    def _etapa(self, nombre):
+        """Medir una etapa del frame si hay perfilador"""
+        return self.perfilador.etapa(nombre) if self.perfilador is not None else nullcontext()
 
-    def draw_text_panel(self, simulation_started, start_time, all_balls_stopped, last_ball_stop_time, balls, font, small_font):
+    def draw_profiler_overlay(self, small_font):
+        """Superposición con los percentiles móviles del perfilador (en proyección 2D)"""
+        filas = {}
+        for i, linea in enumerate(self.perfilador.resumen()):
+            filas[i] = (linea, small_font, (220, 255, 220), (12, 10 + 20 * i))
+        self.hud_perfil.actualizar(filas)
+        self.hud_perfil.dibujar(1200 - 10 - self.hud_perfil.ancho, 10)
+
+    def draw_text_panel(self, simulation_started, start_time, all_balls_stopped, last_ball_stop_time, balls, font, small_font,
+                        tiempo_simulado=None):
         """Dibujar panel de información superpuesto"""
         # Cambiar a proyección 2D para el panel
         glMatrixMode(GL_PROJECTION)
@@ -613,72 +1028,37 @@ class Escena:
         glEnable(GL_BLEND)
         glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
         
-        # Crear superficie para el panel
-        panel_width, panel_height = 400, 200
-        info_surface = pygame.Surface((panel_width, panel_height), pygame.SRCALPHA)
-        info_surface.fill((50, 50, 70, 230))  # Fondo semitransparente
-        
-        # Renderizar textos en la superficie
-        title_text = font.render("BRAQUISTÓCRONA 3D", True, (255, 255, 100))
-        info_surface.blit(title_text, (20, 15))
-        
+        # Panel persistente: solo se suben las filas cuyo texto cambió
+        filas = {"titulo": ("BRAQUISTÓCRONA 3D", font, (255, 255, 100), (20, 15))}
         if simulation_started:
-            current_time = (pygame.time.get_ticks() - start_time) / 1000.0
+            if tiempo_simulado is None:
+                tiempo_simulado = (pygame.time.get_ticks() - start_time) / 1000.0
+            current_time = self.hud.tiempo_mostrado(tiempo_simulado)
             
             if all_balls_stopped:
-                time_text = font.render(f"Tiempo final: {last_ball_stop_time:.2f} s", True, (100, 255, 100))
-                info_surface.blit(time_text, (20, 50))
+                filas["tiempo"] = (f"Tiempo final: {last_ball_stop_time:.2f} s", font, (100, 255, 100), (20, 50))
             else:
-                time_text = font.render(f"Tiempo: {current_time:.2f} s", True, (255, 255, 255))
-                info_surface.blit(time_text, (20, 50))
+                filas["tiempo"] = (f"Tiempo: {current_time:.2f} s", font, (255, 255, 255), (20, 50))
             
             # Mostrar tiempos de impacto
             impact_y = 85
-            impact_title = small_font.render("Primeros impactos:", True, (255, 255, 255))
-            info_surface.blit(impact_title, (20, impact_y))
-            
+            filas["impactos"] = ("Primeros impactos:", small_font, (255, 255, 255), (20, impact_y))
             impact_y += 25
             
             for ball in balls:
                 if ball.first_impact_time is not None:
                     color_tuple = tuple(min(255, int(c * 300)) for c in ball.color)
-                    impact_text = small_font.render(
-                        f"{ball.name}: {ball.first_impact_time:.2f} s", 
-                        True, color_tuple
-                    )
-                    info_surface.blit(impact_text, (30, impact_y))
+                    filas[f"impacto {impact_y}"] = (f"{ball.name}: {ball.first_impact_time:.2f} s",
+                                                    small_font, color_tuple, (30, impact_y))
                     impact_y += 22
         else:
-            waiting_text = font.render("Presiona ESPACIO (start)", True, (255, 200, 100))
-            info_surface.blit(waiting_text, (20, 50))
-        
-        # Añadir borde al panel
-        pygame.draw.rect(info_surface, (120, 120, 170, 255), info_surface.get_rect(), 2)
-        
-        # Convertir superficie a textura OpenGL
-        texture_data = pygame.image.tostring(info_surface, "RGBA", False)
-        texture_id = glGenTextures(1)
-        glBindTexture(GL_TEXTURE_2D, texture_id)
-        
-        # Configurar textura
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
-        
-        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, panel_width, panel_height, 0, 
-                    GL_RGBA, GL_UNSIGNED_BYTE, texture_data)
+            filas["tiempo"] = ("Presiona ESPACIO (start)", font, (255, 200, 100), (20, 50))
+        self.hud.actualizar(filas)
         
         # Dibujar panel como textura 2D
-        glEnable(GL_TEXTURE_2D)
-        glBegin(GL_QUADS)
-        glTexCoord2f(0, 0); glVertex2f(10, 10)
-        glTexCoord2f(1, 0); glVertex2f(10 + panel_width, 10)
-        glTexCoord2f(1, 1); glVertex2f(10 + panel_width, 10 + panel_height)
-        glTexCoord2f(0, 1); glVertex2f(10, 10 + panel_height)
-        glEnd()
-        glDisable(GL_TEXTURE_2D)
-        glDeleteTextures([texture_id])
+        self.hud.dibujar(10, 10)
+        if self.perfilador is not None and self.perfilador.mostrar:
+            self.draw_profiler_overlay(small_font)
         
         # Restaurar configuración 3D
         glDisable(GL_BLEND)
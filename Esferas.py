@@ -1,5 +1,6 @@
 import numpy as np
-from Rampas import line_curve_3d, parabolic_curve_3d, cycloid_curve_3d, RAMP_SEPARATION, A_METERS
+from Integradores import crear_integrador, localizar_evento
+from Rampas import line_curve_3d, parabolic_curve_3d, cycloid_curve_3d, RAMP_SEPARATION, A_METERS, RESOLUCION_TABLA_ARCO, CACHE_GEOMETRIA
 
 # Constantes físicas
 g = 9.8  # Gravedad en m/s²
@@ -7,26 +8,31 @@ MU_BASE = 0.008  # Coeficiente de fricción base
 MU_RAMP_BASE = 0.016  # Coeficiente de fricción en rampa
 
 class Esfera:
-    def __init__(self, curve_func, color, name, z_offset=0.0, radius=0.15, masa=1.0, rozamiento_base=None):
+    def __init__(self, curve_func, color, name, z_offset=0.0, radius=0.15, masa=1.0, rozamiento_base=None, verbose=True,
+                 resolucion_tabla=RESOLUCION_TABLA_ARCO, integrador="euler", restitution=0.75):
         # Propiedades de la curva y apariencia
         self.curve_func = curve_func  # Función que define la curva de la rampa
         self.color = color  # Color RGB de la bola
         self.name = name  # Nombre identificador
         self.z_offset = z_offset  # Desplazamiento en Z para separar rampas
+        self.verbose = verbose  # Mostrar mensajes de depuración por consola
         
         # Atributos modificables
         self.radius = radius  # Radio de la bola
         self.masa = masa  # Masa de la bola
         
         # Parámetros de física y estado
-        self.t = 0.0  # Parámetro de posición en la curva (0-1)
+        self.t = 0.0  # Fracción de longitud de arco recorrida en la curva (0-1)
         self.finished = False  # Si la bola terminó su recorrido
         self.v = 0.0  # Velocidad actual
         self.direction = 1  # Dirección del movimiento (1 adelante, -1 atrás)
+        self.integrador = crear_integrador(integrador)  # Esquema de integración ("euler", "rk4", "rk45")
         self.first_impact_time = None  # Tiempo del primer impacto con el muro
         self.final_stop_time = None  # Tiempo cuando se detuvo completamente
         
-        # Listas para precomputar geometría de la curva
+        # Tabla de longitud de arco y geometría precomputada de la curva
+        self.resolucion_tabla = resolucion_tabla  # Nodos de la tabla de longitud de arco
+        self.tabla = None  # TablaArco de la curva (se crea en initialize_position)
         self.points_left = []  # Puntos del rail izquierdo
         self.points_right = []  # Puntos del rail derecho
         self.points_center = []  # Puntos del centro (para física)
@@ -58,12 +64,13 @@ class Esfera:
             self.mu_ramp = MU_RAMP_BASE * 0.9
         
         # Parámetros de rebote
-        self.restitution = 0.75  # Coeficiente de restitución (rebote)
+        self.restitution = restitution  # Coeficiente de restitución (rebote)
         self.max_rebounds = 4  # Máximo número de rebotes
         self.rebounded = False  # Si ya rebotó al menos una vez
         self.rebound_count = 0  # Contador de rebotes
         self.min_velocity = 0.05  # Velocidad mínima para seguir rebotando
         self.wall_stopped = False  # Si se detuvo por el muro
+        self.en_reposo = False  # Si se detuvo en la rampa porque el rozamiento vence a la gravedad
 
     def _forzar_posicion_inicial(self):
         """FORZAR posición inicial en la plataforma usando la altura ACTUAL de A_METERS"""
@@ -74,6 +81,9 @@ class Esfera:
         # Posicionar en el inicio de la curva con radio incluido
         self.base_pos = np.array([A_METERS[0], platform_height + self.radius, self.z_offset])
         
+        if not self.verbose:
+            return
+        
         # Debug información
         print(f"{self.name} forzada a posición:")
         print(f"   - X: {self.base_pos[0]:.2f} (A_METERS[0])")
@@ -84,22 +94,14 @@ class Esfera:
 
     def initialize_position(self):
         """Inicializar posición completa - SOLUCIÓN DEFINITIVA"""
-        # Precomputar puntos con la altura actual
-        self.points_left = []
-        self.points_right = []
-        self.points_center = []
-        # Generar 1001 puntos a lo largo de la curva
-        for i in range(1001):
-            left, right = self.curve_func(i/1000.0, z_offset=self.z_offset)
-            self.points_left.append(left)
-            self.points_right.append(right)
-            center = (left + right) / 2.0  # Punto central para física
-            self.points_center.append(center)
-            
-        # Precomputar longitudes y pendientes
-        self.lengths = self.precompute_lengths()
-        self.length_meters = self.lengths[-1] if self.lengths else 0  # Longitud total
-        self.slopes = self.precompute_slopes()
+        # Tabla de longitud de arco con la altura actual (compartida por la caché de geometría)
+        self.tabla = CACHE_GEOMETRIA.tabla_arco(self.curve_func, z_offset=self.z_offset, resolucion=self.resolucion_tabla)
+        self.points_left = self.tabla.rail_left
+        self.points_right = self.tabla.rail_right
+        self.points_center = self.tabla.posiciones  # Centro (para física)
+        self.lengths = self.tabla.s  # Longitudes acumuladas
+        self.length_meters = self.tabla.longitud  # Longitud total
+        self.slopes = self.tabla.pendientes
         
         # FORZAR POSICIÓN CORRECTA
         self._forzar_posicion_inicial()
@@ -109,62 +111,11 @@ class Esfera:
         platform_height = A_METERS[1] + 0.3
         return np.array([A_METERS[0], platform_height + self.radius, self.z_offset])
 
-    def precompute_lengths(self):
-        """Precalcular longitudes acumuladas a lo largo de la curva"""
-        lengths = [0]  # Empezar en longitud 0
-        if not self.points_center:
-            return lengths
-            
-        prev = self.points_center[0]
-        # Calcular longitud entre puntos consecutivos
-        for i in range(1, len(self.points_center)):
-            curr = self.points_center[i]
-            segment_length = np.linalg.norm(curr - prev)  # Distancia euclidiana
-            lengths.append(lengths[-1] + segment_length)  # Acumular
-            prev = curr
-        return lengths
-
-    def precompute_slopes(self):
-        """Precalcular pendientes en cada punto de la curva"""
-        slopes = []
-        if not self.points_center:
-            return slopes
-            
-        for i in range(len(self.points_center)):
-            # Calcular derivada (pendiente) usando diferencias finitas
-            if i < len(self.points_center) - 1:
-                dx = self.points_center[i+1][0] - self.points_center[i][0]
-                dy = self.points_center[i+1][1] - self.points_center[i][1]
-            else:
-                # Para el último punto, usar diferencia hacia atrás
-                dx = self.points_center[i][0] - self.points_center[i-1][0]
-                dy = self.points_center[i][1] - self.points_center[i-1][1]
-            
-            # Evitar división por cero
-            if abs(dx) > 1e-6:
-                slope = dy / dx  # Pendiente = Δy/Δx
-            else:
-                slope = 1e6 if dy > 0 else -1e6  # Pendiente vertical
-            slopes.append(slope)
-        return slopes
-
     def get_center_position_at_t(self, t):
-        """Obtener posición en el centro de la curva para parámetro t (0-1)"""
-        if not self.points_center:
+        """Obtener posición en el centro de la curva para la fracción de arco t (0-1)"""
+        if self.tabla is None:
             return np.array([0, 0, 0])
-            
-        # Convertir parámetro continuo a índice discreto
-        idx = int(t * (len(self.points_center) - 1))
-        idx = min(idx, len(self.points_center) - 2)  # Evitar desborde
-        
-        # Interpolar entre puntos
-        t_segment = t * (len(self.points_center) - 1) - idx
-        pos_center_prev = self.points_center[idx]
-        pos_center_next = self.points_center[idx + 1]
-        
-        # Interpolación lineal
-        pos_center = pos_center_prev + t_segment * (pos_center_next - pos_center_prev)
-        return pos_center
+        return self.tabla.posicion(t * self.length_meters)
 
     def release_from_platform(self):
         """Liberar la bola de la plataforma"""
@@ -174,92 +125,113 @@ class Esfera:
         self.base_pos = self.get_center_position_at_t(0.0)  # Posición en curva
         self.base_pos[1] += self.radius  # Ajustar por radio
 
+    def aceleracion(self, s, v):
+        """Aceleración a lo largo de la curva en la distancia s con velocidad v"""
+        # Ángulo de la pendiente, precalculado en la tabla (siempre en valor absoluto)
+        sin_angle, cos_angle = self.tabla.angulo(s)
+        
+        # Aceleración debido a la gravedad (siempre positiva)
+        acceleration = g * sin_angle
+        
+        # Fricción en dirección opuesta al movimiento (np.sign(0) = 0: sin fricción en reposo)
+        current_friction = (self.mu_ramp if self.rebounded else self.mu) * g * cos_angle
+        acceleration -= np.sign(v) * current_friction
+        
+        # Afectada por la masa
+        return acceleration / self.masa
+
+    def queda_en_reposo(self, s):
+        """Si el rozamiento basta para mantener la bola quieta en la distancia s"""
+        sin_angle, cos_angle = self.tabla.angulo(s)
+        return sin_angle <= (self.mu_ramp if self.rebounded else self.mu) * cos_angle
+
     def update(self, dt, current_time):
         """Actualizar física de la bola - FÍSICA NORMAL PARA TODAS"""
         # No actualizar si terminó, está en plataforma o detenida
         if self.finished or self.on_platform or self.wall_stopped:
             return
 
-        # Obtener posición y pendiente actual
-        current_pos, current_slope = self.get_position_and_slope(self.t)
-        
-        # Calcular ángulo de la pendiente (siempre usar valor absoluto para gravedad)
-        angle = np.arctan(abs(current_slope))
-        
-        # Aceleración debido a la gravedad (siempre positiva)
-        acceleration = g * np.sin(angle)
-        
-        # Fricción (afectada por la masa)
-        current_friction = (self.mu_ramp if self.rebounded else self.mu) * g * np.cos(angle)
-        
-        # Aplicar fricción en dirección opuesta al movimiento
-        if abs(self.v) > 0:
-            if self.v > 0:
-                acceleration -= current_friction  # Frenar si va adelante
+        # Integrar el paso; si hay choque se localiza el instante exacto y se sigue con el resto de dt
+        remaining = dt
+        for _ in range(self.max_rebounds + 2):  # Número de eventos por paso acotado
+            distance = self.t * self.length_meters  # Distancia recorrida
+            new_distance, new_v = self.integrador.paso(self.aceleracion, distance, self.v, remaining)
+            
+            if new_distance >= self.length_meters:  # Golpea el muro final
+                target = self.length_meters
+            elif new_distance < 0.0:  # Vuelve al inicio
+                target = 0.0
             else:
-                acceleration += current_friction  # Frenar si va atrás
-        
-        # Actualizar velocidad (afectada por la masa)
-        self.v += acceleration * dt * (1.0 / self.masa)
-        
-        # MOVIMIENTO A LO LARGO DE LA CURVA
-        current_distance = self.t * self.length_meters  # Distancia recorrida
-        new_distance = current_distance + self.v * dt  # Nueva distancia
-        new_t = new_distance / self.length_meters  # Nuevo parámetro t
-        
-        # DETECCIÓN DE COLISIONES
-        if new_t >= 1.0:  # Golpea el muro final
-            if not self.rebounded:
+                # Movimiento normal
+                self.t = new_distance / self.length_meters  # Nueva fracción de arco (exacta: tabla en s)
+                if self.v != 0 and np.sign(new_v) != np.sign(self.v) and self.queda_en_reposo(new_distance):
+                    # La velocidad cruza cero donde el rozamiento vence a la gravedad: queda en reposo
+                    stop_time = float(current_time - remaining + remaining * self.v / (self.v - new_v))
+                    self.v = 0
+                    self.finished = True
+                    self.en_reposo = True
+                    self.final_stop_time = stop_time
+                    if self.verbose:
+                        print(f"{self.name} DETENIDA por rozamiento! Tiempo final: {stop_time:.2f}s")
+                    break
+                self.v = new_v
+                break
+            
+            # DETECCIÓN DE COLISIONES: instante exacto del choque dentro del paso
+            tau, _, impact_v = localizar_evento(self.integrador, self.aceleracion, distance, self.v, remaining, target)
+            event_time = float(current_time - remaining + tau)
+            remaining -= tau
+            
+            if target == 0.0:
+                self.v = abs(impact_v) * self.restitution  # Rebote hacia adelante
+                self.t = 0.0
+            elif not self.rebounded:
                 # Primer impacto
                 self.rebounded = True
                 self.rebound_count = 1
-                self.first_impact_time = current_time
-                self.v = -abs(self.v) * self.restitution  # Rebote
-                self.t = 0.98  # Retroceder un poco
-                print(f"{self.name} IMPACTO! t={current_time:.2f}s")
-            elif self.rebound_count < self.max_rebounds and abs(self.v) > self.min_velocity:
+                self.first_impact_time = event_time
+                self.v = -abs(impact_v) * self.restitution  # Rebote
+                self.t = 1.0
+                if self.verbose:
+                    print(f"{self.name} IMPACTO! t={event_time:.2f}s")
+            elif self.rebound_count < self.max_rebounds and abs(impact_v) > self.min_velocity:
                 # Rebotes subsiguientes
                 self.rebound_count += 1
-                self.v = -abs(self.v) * (self.restitution ** self.rebound_count)  # Rebote más débil
-                self.t = 1.0 - (0.1 / self.rebound_count)  # Retroceder según rebote
+                self.v = -abs(impact_v) * (self.restitution ** self.rebound_count)  # Rebote más débil
+                self.t = 1.0
             else:
                 # Detenerse completamente
                 self.v = 0
                 self.t = 1.0
                 self.finished = True
                 self.wall_stopped = True
-                self.final_stop_time = current_time
-                print(f"{self.name} DETENIDA! Tiempo final: {current_time:.2f}s")
-        
-        elif new_t <= 0.0:  # Vuelve al inicio
-            self.v = abs(self.v) * self.restitution  # Rebote hacia adelante
-            self.t = 0.01  # Avanzar un poco
-        
+                self.final_stop_time = event_time
+                if self.verbose:
+                    print(f"{self.name} DETENIDA! Tiempo final: {event_time:.2f}s")
+                break
         else:
-            self.t = new_t  # Movimiento normal
-        
+            # Se agotaron los eventos del paso (p. ej. rebotes en el inicio con un dt muy grande):
+            # el resto del paso se integra sin localizar más choques, sin salir de la curva
+            if remaining > 0.0:
+                distance = self.t * self.length_meters
+                new_distance, self.v = self.integrador.paso(self.aceleracion, distance, self.v, remaining)
+                self.t = min(max(new_distance / self.length_meters, 0.0), 1.0)
+                if self.verbose:
+                    print(f"ADVERTENCIA: {self.name}: más de {self.max_rebounds + 2} eventos en un paso; "
+                          f"los últimos {remaining:.4f}s se integran sin detectar choques")
+
         # Actualizar posición visual
         if not self.finished and 0 <= self.t <= 1:
             self.base_pos = self.get_center_position_at_t(self.t)
             self.base_pos[1] += self.radius  # Ajustar por radio
 
     def get_position_and_slope(self, t):
-        """Obtener posición y pendiente para parámetro t"""
+        """Obtener posición y pendiente para la fracción de arco t"""
         pos = self.get_center_position_at_t(t)
         
-        if not self.slopes:
+        if self.tabla is None:
             return pos, 0
-            
-        # Interpolar pendiente
-        idx = int(t * (len(self.points_center) - 1))
-        idx = min(idx, len(self.points_center) - 2)
-        
-        t_segment = t * (len(self.points_center) - 1) - idx
-        slope_prev = self.slopes[idx]
-        slope_next = self.slopes[idx + 1]
-        slope = slope_prev + t_segment * (slope_next - slope_prev)
-        
-        return pos, slope
+        return pos, self.tabla.pendiente(t * self.length_meters)
 
     def get_render_position(self):
         """Obtener posición para renderizado"""
@@ -288,6 +260,7 @@ class Esfera:
         self.rebounded = False
         self.rebound_count = 0
         self.wall_stopped = False
+        self.en_reposo = False
         self.first_impact_time = None
         self.final_stop_time = None
         self._forzar_posicion_inicial()
@@ -312,7 +285,11 @@ def get_esferas(config_esferas=None):
                 z_offset=config.get('z_offset', 0.0),
                 radius=config.get('radius', 0.15),
                 masa=config.get('masa', 1.0),
-                rozamiento_base=config.get('rozamiento')
+                rozamiento_base=config.get('rozamiento'),
+                verbose=config.get('verbose', True),
+                resolucion_tabla=config.get('resolucion_tabla', RESOLUCION_TABLA_ARCO),
+                integrador=config.get('integrador', "euler"),
+                restitution=config.get('restitution', 0.75)
             )
             esferas.append(esfera)
         return esferas
\ No newline at end of file
@@ -0,0 +1,398 @@
+import threading
+import time
+
+import numpy as np
+from Esferas import g
+
+class MotorFisicoLote:
+    """Motor de física vectorizado: avanza todas las esferas con un único kernel NumPy"""
+
+    def __init__(self, esferas, verbose=True):
+        # Esferas ya inicializadas (initialize_position) que se simulan en bloque
+        esferas = list(esferas)
+        if not esferas:
+            raise ValueError("Se necesita al menos una esfera para el motor por lotes")
+
+        # GEOMETRÍA: una fila por tabla de arco distinta (las esferas pueden compartirla)
+        tablas = []
+        curva = []
+        for esfera in esferas:
+            for i, tabla in enumerate(tablas):
+                if tabla is esfera.tabla:
+                    curva.append(i)
+                    break
+            else:
+                curva.append(len(tablas))
+                tablas.append(esfera.tabla)
+
+        self._inicializar(
+            tablas, curva,
+            radios=[esfera.radius for esfera in esferas],
+            masa=[esfera.masa for esfera in esferas],
+            mu=[esfera.mu for esfera in esferas],
+            mu_ramp=[esfera.mu_ramp for esfera in esferas],
+            restitution=[esfera.restitution for esfera in esferas],
+            max_rebounds=[esfera.max_rebounds for esfera in esferas],
+            min_velocity=[esfera.min_velocity for esfera in esferas],
+            verbose=verbose,
+        )
+
+        # ESTADO inicial tomado de las esferas
+        self.t[:] = [esfera.t for esfera in esferas]
+        self.v[:] = [esfera.v for esfera in esferas]
+        self.rebound_count[:] = [esfera.rebound_count for esfera in esferas]
+        self.on_platform[:] = [esfera.on_platform for esfera in esferas]
+        self.platform_released[:] = [esfera.platform_released for esfera in esferas]
+        self.finished[:] = [esfera.finished for esfera in esferas]
+        self.rebounded[:] = [esfera.rebounded for esfera in esferas]
+        self.wall_stopped[:] = [esfera.wall_stopped for esfera in esferas]
+        self.en_reposo[:] = [esfera.en_reposo for esfera in esferas]
+
+        # Posiciones de render: cada esfera ve su fila (vista, sin copias por frame)
+        self.esferas = esferas
+        self.posiciones[:] = [esfera.base_pos for esfera in esferas]
+        for i, esfera in enumerate(esferas):
+            esfera.base_pos = self.posiciones[i]
+
+    @classmethod
+    def desde_parametros(cls, tablas, curva, masa, mu, mu_ramp, restitution, radios=0.15,
+                         max_rebounds=4, min_velocity=0.05, verbose=False, calcular_posiciones=False):
+        """Motor sin objetos Esfera: parámetros por bola en arrays y tablas compartidas por índice"""
+        motor = cls.__new__(cls)
+        motor._inicializar(tablas, curva, radios, masa, mu, mu_ramp, restitution,
+                           max_rebounds, min_velocity, verbose)
+        motor.calcular_posiciones = calcular_posiciones
+        return motor
+
+    def _inicializar(self, tablas, curva, radios, masa, mu, mu_ramp, restitution,
+                     max_rebounds, min_velocity, verbose):
+        """Reservar arrays de geometría, parámetros y estado (todas las bolas en la plataforma)"""
+        self.esferas = []  # Objetos Esfera asociados (vacío en conjuntos sin objetos)
+        self.verbose = verbose  # Mostrar impactos y paradas por consola
+        self.calcular_posiciones = True  # Posiciones de render en cada paso (innecesarias en conjuntos)
+        self.curva = np.asarray(curva, dtype=int)  # Tabla de arco de cada bola
+        n = len(self.curva)
+
+        # GEOMETRÍA: tablas de longitud de arco apiladas, todas con la misma resolución
+        if len({len(tabla.s) for tabla in tablas}) != 1:
+            raise ValueError("Todas las esferas deben usar la misma resolución de tabla de arco")
+        self.centros = np.stack([tabla.posiciones for tabla in tablas])  # (curvas, M, 3)
+        self.seno = np.stack([tabla.seno for tabla in tablas])  # (curvas, M)
+        self.coseno = np.stack([tabla.coseno for tabla in tablas])  # (curvas, M)
+        self.longitudes = np.array([tabla.longitud for tabla in tablas], dtype=float)[self.curva]
+        self.n_puntos = self.centros.shape[1]
+
+        # PARÁMETROS físicos de cada bola (escalares se replican)
+        self.radios = np.broadcast_to(np.asarray(radios, dtype=float), (n,)).copy()
+        self.masa = np.broadcast_to(np.asarray(masa, dtype=float), (n,)).copy()
+        self.mu = np.broadcast_to(np.asarray(mu, dtype=float), (n,)).copy()
+        self.mu_ramp = np.broadcast_to(np.asarray(mu_ramp, dtype=float), (n,)).copy()
+        self.restitution = np.broadcast_to(np.asarray(restitution, dtype=float), (n,)).copy()
+        self.max_rebounds = np.broadcast_to(np.asarray(max_rebounds, dtype=int), (n,)).copy()
+        self.min_velocity = np.broadcast_to(np.asarray(min_velocity, dtype=float), (n,)).copy()
+
+        # ESTADO dinámico en arrays contiguos
+        self.t = np.zeros(n)
+        self.v = np.zeros(n)
+        self.rebound_count = np.zeros(n, dtype=int)
+        self.on_platform = np.ones(n, dtype=bool)
+        self.platform_released = np.zeros(n, dtype=bool)
+        self.finished = np.zeros(n, dtype=bool)
+        self.rebounded = np.zeros(n, dtype=bool)
+        self.wall_stopped = np.zeros(n, dtype=bool)
+        self.en_reposo = np.zeros(n, dtype=bool)  # Detenidas en la rampa por rozamiento
+        self.first_impact_time = np.full(n, np.nan)  # NaN = todavía sin impacto
+        self.final_stop_time = np.full(n, np.nan)  # NaN = todavía en movimiento
+        self.posiciones = np.zeros((n, 3))
+
+    def _interpolar(self, t):
+        """Índice de segmento y fracción para la fracción de arco t (nodos equiespaciados en s)"""
+        idx_continuo = t * (self.n_puntos - 1)
+        idx = np.minimum(idx_continuo.astype(int), self.n_puntos - 2)  # Evitar desborde
+        return idx, idx_continuo - idx
+
+    def _posiciones_en(self, filas, t):
+        """Posición central (con radio) de las filas indicadas para su fracción de arco t"""
+        idx, frac = self._interpolar(t)
+        curvas = self.curva[filas]
+        prev = self.centros[curvas, idx]
+        sig = self.centros[curvas, idx + 1]
+        pos = prev + frac[:, None] * (sig - prev)
+        pos[:, 1] += self.radios[filas]  # Ajustar por radio
+        return pos
+
+    def liberar(self, mascara=None):
+        """Liberar de la plataforma las esferas indicadas; devuelve sus índices"""
+        pendientes = ~self.platform_released
+        if mascara is not None:
+            pendientes &= mascara
+        indices = np.flatnonzero(pendientes)
+        if indices.size == 0:
+            return indices
+
+        self.on_platform[indices] = False
+        self.platform_released[indices] = True
+        self.t[indices] = 0.0  # Empezar desde el inicio
+        self.posiciones[indices] = self._posiciones_en(indices, self.t[indices])
+
+        for i in indices if self.esferas else ():
+            esfera = self.esferas[i]
+            esfera.on_platform = False
+            esfera.platform_released = True
+            esfera.t = 0.0
+        return indices
+
+    def _angulo(self, filas, t):
+        """Seno y coseno de la pendiente, interpolados de las tablas (sin trigonometría por paso)"""
+        idx, frac = self._interpolar(t)
+        curvas = self.curva[filas]
+        seno_prev = self.seno[curvas, idx]
+        seno = seno_prev + frac * (self.seno[curvas, idx + 1] - seno_prev)
+        coseno_prev = self.coseno[curvas, idx]
+        coseno = coseno_prev + frac * (self.coseno[curvas, idx + 1] - coseno_prev)
+        return seno, coseno
+
+    def _mu_actual(self, filas):
+        """Coeficiente de rozamiento vigente (en rampa tras el primer rebote)"""
+        return np.where(self.rebounded[filas], self.mu_ramp[filas], self.mu[filas])
+
+    def _aceleracion(self, filas, t, v):
+        """Aceleración (ya dividida por la masa) de las filas indicadas en la fracción de arco t"""
+        seno, coseno = self._angulo(filas, t)
+
+        # Gravedad y fricción (siempre opuesta al movimiento; np.sign(0) = 0)
+        aceleracion = g * seno
+        aceleracion -= np.sign(v) * self._mu_actual(filas) * g * coseno
+        return aceleracion / self.masa[filas]
+
+    @staticmethod
+    def _tiempo_evento(s, v, aceleracion, s_objetivo, dt, iteraciones=50):
+        """Instante en [0, dt] en que el subpaso de Euler semi-implícito alcanza s_objetivo"""
+        # s(tau) = s + (v + a·tau)·tau; bisección vectorizada sobre las filas con evento
+        bajo = np.zeros_like(s)
+        alto = np.full_like(s, dt)
+        signo_alto = np.sign(s + (v + aceleracion * dt) * dt - s_objetivo)
+        for _ in range(iteraciones):
+            medio = 0.5 * (bajo + alto)
+            f_medio = s + (v + aceleracion * medio) * medio - s_objetivo
+            mismo = np.sign(f_medio) == signo_alto
+            alto = np.where(mismo, medio, alto)
+            bajo = np.where(mismo, bajo, medio)
+        return alto
+
+    def paso(self, dt, current_time):
+        """Avanzar todas las esferas activas un paso dt (misma física que Esfera.update con Euler)"""
+        # Solo se operan las filas activas; las detenidas no cuestan nada
+        filas = np.flatnonzero(~(self.finished | self.on_platform | self.wall_stopped))
+        if filas.size == 0:
+            return
+        t = self.t[filas]
+        v = self.v[filas]
+        longitudes = self.longitudes[filas]
+
+        # Euler semi-implícito: velocidad y después distancia recorrida
+        aceleracion = self._aceleracion(filas, t, v)
+        distancia = t * longitudes
+        v_nueva = v + aceleracion * dt
+        distancia_nueva = distancia + v_nueva * dt
+
+        # MÁSCARAS de colisión
+        golpe = distancia_nueva >= longitudes
+        inicio = distancia_nueva < 0.0
+        normal = ~golpe & ~inicio
+
+        # Movimiento normal
+        t[normal] = distancia_nueva[normal] / longitudes[normal]
+
+        # Reposo: la velocidad cruza cero donde el rozamiento vence a la gravedad
+        reposo = normal & (v != 0) & (np.sign(v_nueva) != np.sign(v))
+        if reposo.any():
+            locales = np.flatnonzero(reposo)
+            seno, coseno = self._angulo(filas[locales], t[locales])
+            reposo[locales] = seno <= self._mu_actual(filas[locales]) * coseno
+            locales = np.flatnonzero(reposo)
+            self.final_stop_time[filas[locales]] = (current_time - dt
+                                                   + dt * v[locales] / (v[locales] - v_nueva[locales]))
+            self.finished[filas[locales]] = True
+            self.en_reposo[filas[locales]] = True
+        primero = filas[:0]
+        parada = filas[reposo]
+        v_final = np.where(normal, v_nueva, v)
+        v_final[reposo] = 0.0
+
+        eventos = np.flatnonzero(golpe | inicio)
+        if eventos.size:
+            # Instante exacto del choque dentro del paso y velocidad en ese instante
+            filas_ev = filas[eventos]
+            golpe_ev = golpe[eventos]
+            inicio_ev = inicio[eventos]
+            longitudes_ev = longitudes[eventos]
+            objetivo = np.where(golpe_ev, longitudes_ev, 0.0)
+            tau = self._tiempo_evento(distancia[eventos], v[eventos], aceleracion[eventos], objetivo, dt)
+            v_evento = v[eventos] + aceleracion[eventos] * tau
+            tiempo_evento = current_time - dt + tau
+            restante = dt - tau
+
+            rebotada = self.rebounded[filas_ev]
+            es_primero = golpe_ev & ~rebotada
+            rebote = (golpe_ev & rebotada & (self.rebound_count[filas_ev] < self.max_rebounds[filas_ev])
+                      & (np.abs(v_evento) > self.min_velocity[filas_ev]))
+            parada_muro = golpe_ev & rebotada & ~rebote
+            v_tras = np.zeros_like(v_evento)
+
+            # Primer impacto
+            primero = filas_ev[es_primero]
+            self.rebounded[primero] = True
+            self.rebound_count[primero] = 1
+            self.first_impact_time[primero] = tiempo_evento[es_primero]
+            v_tras[es_primero] = -np.abs(v_evento[es_primero]) * self.restitution[primero]
+
+            # Rebotes subsiguientes (cada vez más débiles)
+            filas_rebote = filas_ev[rebote]
+            self.rebound_count[filas_rebote] += 1
+            v_tras[rebote] = (-np.abs(v_evento[rebote])
+                              * self.restitution[filas_rebote] ** self.rebound_count[filas_rebote])
+            t_tras = np.where(golpe_ev, 1.0, 0.0)
+
+            # Detención completa en el muro (velocidad ya a cero)
+            filas_muro = filas_ev[parada_muro]
+            self.finished[filas_muro] = True
+            self.wall_stopped[filas_muro] = True
+            self.final_stop_time[filas_muro] = tiempo_evento[parada_muro]
+            parada = np.concatenate((parada, filas_muro))
+
+            # Rebote hacia adelante al volver al inicio
+            v_tras[inicio_ev] = np.abs(v_evento[inicio_ev]) * self.restitution[filas_ev[inicio_ev]]
+
+            # Resto del paso tras el choque (un subpaso; un segundo choque se resuelve en el siguiente paso)
+            siguen = ~parada_muro
+            if siguen.any():
+                h = restante[siguen]
+                longitudes_sig = longitudes_ev[siguen]
+                v_sig = v_tras[siguen] + self._aceleracion(filas_ev[siguen], t_tras[siguen], v_tras[siguen]) * h
+                distancia_sig = np.clip(t_tras[siguen] * longitudes_sig + v_sig * h, 0.0, longitudes_sig)
+                v_tras[siguen] = v_sig
+                t_tras[siguen] = distancia_sig / longitudes_sig
+            t[eventos] = t_tras
+            v_final[eventos] = v_tras
+
+        self.t[filas] = t
+        self.v[filas] = v_final
+
+        # Actualizar posición visual de las que siguen en movimiento
+        if self.calcular_posiciones:
+            mover = filas[~self.finished[filas]]
+            if mover.size:
+                self.posiciones[mover] = self._posiciones_en(mover, self.t[mover])
+
+        # Propagar eventos a los objetos Esfera (solo las filas que cambiaron)
+        if not self.esferas:
+            return
+        for i in primero:
+            esfera = self.esferas[i]
+            esfera.rebounded = True
+            esfera.rebound_count = 1
+            esfera.first_impact_time = float(self.first_impact_time[i])
+            if self.verbose:
+                print(f"{esfera.name} IMPACTO! t={esfera.first_impact_time:.2f}s")
+        for i in parada:
+            esfera = self.esferas[i]
+            esfera.finished = True
+            esfera.wall_stopped = bool(self.wall_stopped[i])
+            esfera.en_reposo = bool(self.en_reposo[i])
+            esfera.final_stop_time = float(self.final_stop_time[i])
+            if self.verbose:
+                causa = " por rozamiento" if esfera.en_reposo else ""
+                print(f"{esfera.name} DETENIDA{causa}! Tiempo final: {esfera.final_stop_time:.2f}s")
+
+    def sincronizar(self):
+        """Copiar el estado completo de los arrays a los objetos Esfera"""
+        for i, esfera in enumerate(self.esferas):
+            esfera.t = float(self.t[i])
+            esfera.v = float(self.v[i])
+            esfera.rebound_count = int(self.rebound_count[i])
+            esfera.on_platform = bool(self.on_platform[i])
+            esfera.platform_released = bool(self.platform_released[i])
+            esfera.finished = bool(self.finished[i])
+            esfera.rebounded = bool(self.rebounded[i])
+            esfera.wall_stopped = bool(self.wall_stopped[i])
+            esfera.en_reposo = bool(self.en_reposo[i])
+            esfera.first_impact_time = None if np.isnan(self.first_impact_time[i]) else float(self.first_impact_time[i])
+            esfera.final_stop_time = None if np.isnan(self.final_stop_time[i]) else float(self.final_stop_time[i])
+            esfera.base_pos = self.posiciones[i]
+
+class BucleFisico:
+    """Física a paso fijo desacoplada del render: acumulador de tiempo real e interpolación de estados"""
+
+    def __init__(self, paso, estado, dt=1.0 / 240.0, max_pasos=60, en_hilo=False):
+        self.paso = paso  # paso(dt, tiempo_simulado): avanza la simulación un paso fijo
+        self.estado = estado  # estado(): {nombre: array} con lo que se dibuja (posiciones, plataforma...)
+        self.dt = dt  # Paso fijo de tiempo simulado
+        self.max_pasos = max_pasos  # Pasos como mucho por llamada; el retraso sobrante se descarta
+        self.en_hilo = en_hilo  # Integrar en un hilo propio en lugar de desde el bucle de render
+        self.pasos = 0  # Pasos dados: el tiempo simulado es pasos·dt, sin depender del reloj
+        self.origen = None  # Instante real (perf_counter) que corresponde al tiempo simulado 0
+        self.anterior = None  # Estado tras el penúltimo paso
+        self.actual = None  # Estado tras el último paso
+        self.cerrojo = threading.Lock()  # Protege el paso frente a la lectura de estados del render
+        self._parar = threading.Event()
+        self._hilo = None
+
+    @property
+    def iniciado(self):
+        """Si ya se llamó a iniciar"""
+        return self.origen is not None
+
+    @property
+    def tiempo(self):
+        """Tiempo simulado del último paso"""
+        return self.pasos * self.dt
+
+    def iniciar(self):
+        """Empezar a contar tiempo real (y arrancar el hilo de física si procede)"""
+        self.pasos = 0
+        self.origen = time.perf_counter()
+        self.anterior = self.actual = self.estado()
+        if self.en_hilo:
+            self._parar.clear()
+            self._hilo = threading.Thread(target=self._bucle, name="fisica", daemon=True)
+            self._hilo.start()
+
+    def detener(self):
+        """Parar el hilo de física (si lo hay) y esperar a que termine su paso"""
+        if self._hilo is not None:
+            self._parar.set()
+            self._hilo.join()
+            self._hilo = None
+
+    def _bucle(self):
+        """Cuerpo del hilo de física: dar los pasos pendientes y dormir hasta el siguiente"""
+        while not self._parar.is_set():
+            self.avanzar()
+            espera = self.origen + (self.pasos + 1) * self.dt - time.perf_counter()
+            if espera > 0.0:
+                self._parar.wait(espera)
+
+    def avanzar(self):
+        """Dar los pasos fijos que el tiempo real transcurrido ha acumulado; devuelve cuántos"""
+        if not self.iniciado:
+            return 0
+        pendientes = int((time.perf_counter() - self.origen) / self.dt) - self.pasos
+        if pendientes > self.max_pasos:
+            # La física no da abasto: se descarta el retraso (cámara lenta) en lugar de acumularlo
+            self.origen += (pendientes - self.max_pasos) * self.dt
+            pendientes = self.max_pasos
+        for _ in range(pendientes):
+            with self.cerrojo:
+                self.pasos += 1
+                self.paso(self.dt, self.pasos * self.dt)
+                self.anterior, self.actual = self.actual, self.estado()
+        return max(pendientes, 0)
+
+    def interpolado(self):
+        """(estado, tiempo simulado) entre los dos últimos pasos según el tiempo real acumulado"""
+        # Se dibuja un paso por detrás de la física para no extrapolar nunca
+        with self.cerrojo:
+            alfa = min(max((time.perf_counter() - self.origen) / self.dt - self.pasos, 0.0), 1.0)
+            estado = {nombre: valor + alfa * (self.actual[nombre] - valor) for nombre, valor in self.anterior.items()}
+            return estado, max(self.pasos - 1 + alfa, 0.0) * self.dt
@@ -0,0 +1,373 @@
+import argparse
+import ctypes
+import os
+import struct
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# PyOpenGL elige la plataforma al importarse: sin pantalla se usa EGL (o OSMesa) por software (llvmpipe)
+os.environ.setdefault("PYOPENGL_PLATFORM", "egl")
+if os.environ["PYOPENGL_PLATFORM"] == "egl":
+    os.environ.setdefault("EGL_PLATFORM", "surfaceless")
+
+import pygame
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.GLU import *
+
+from Esferas import get_esferas
+from Fisica import MotorFisicoLote
+from Rampas import RampaManager
+from Escena import Escena, cargar_camara, configurar_opengl, matrices_camara
+from Simulador import CONFIG_SIMULACION_DEFAULT
+from Textura import TEXTURAS_RAMPA
+
+# Configuración por defecto de una grabación sin ventana
+CONFIG_GRABACION_DEFAULT = {
+    "punto_A": (1.0, 5.0, 0.0),  # Punto inicial alto de las rampas
+    "textura": "Hierro",  # Material de las superficies de las rampas (ver TEXTURAS_GRABACION)
+    "rampa_optima": False,  # Añadir la rampa de tiempo mínimo
+    "glsl": False,  # Bolas instanciadas con shaders (Sombreadores.py); tubería fija si no hay soporte
+    "ancho": 1200,  # Resolución de las imágenes
+    "alto": 800,
+    "fps": 30.0,  # Frames por segundo de tiempo simulado
+    "dt": CONFIG_SIMULACION_DEFAULT["dt"],  # Paso de física (se redondea a un número entero de pasos por frame)
+    "duracion_max": CONFIG_SIMULACION_DEFAULT["tiempo_max"],  # Límite de tiempo simulado
+    "cola": 1.0,  # Segundos grabados tras detenerse todas las bolas
+    "retardo_plataforma": CONFIG_SIMULACION_DEFAULT["retardo_plataforma"],
+    "velocidad_plataforma": CONFIG_SIMULACION_DEFAULT["velocidad_plataforma"],
+    "camara": (18.0, 35.0, -30.0, (0.0, 2.0, 0.0)),  # Distancia, ángulos X/Y y posición (como main.py)
+    "directorio": "frames",  # Carpeta de salida
+    "formato": "png",  # "png" o "ppm"
+    "hilos": None,  # Hilos de codificación (None = según núcleos)
+    "buffers_lectura": 3,  # PBO en vuelo: la lectura de un frame se recoge este número de frames después
+}
+
+# Texturas de las rampas por tipo (las mismas opciones que el menú de Textura.seleccionar_textura)
+TEXTURAS_GRABACION = {textura["tipo"]: textura for textura in TEXTURAS_RAMPA.values()}
+
+def crear_contexto(ancho, alto):
+    """Contexto OpenGL sin ventana según PYOPENGL_PLATFORM; devuelve los objetos que deben seguir vivos"""
+    plataforma = os.environ["PYOPENGL_PLATFORM"]
+    if plataforma == "osmesa":
+        from OpenGL import arrays, osmesa
+        contexto = osmesa.OSMesaCreateContextExt(osmesa.OSMESA_RGBA, 24, 0, 0, None)
+        if not contexto:
+            raise RuntimeError("No se pudo crear el contexto OSMesa")
+        buffer = arrays.GLubyteArray.zeros((alto, ancho, 4))
+        if not osmesa.OSMesaMakeCurrent(contexto, buffer, GL_UNSIGNED_BYTE, ancho, alto):
+            raise RuntimeError("No se pudo activar el contexto OSMesa")
+        return contexto, buffer
+    if plataforma == "egl":
+        from OpenGL import EGL
+        pantalla = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+        mayor, menor = EGL.EGLint(), EGL.EGLint()
+        if not EGL.eglInitialize(pantalla, ctypes.pointer(mayor), ctypes.pointer(menor)):
+            raise RuntimeError("No se pudo inicializar EGL")
+        atributos = [EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT, EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT,
+                     EGL.EGL_RED_SIZE, 8, EGL.EGL_GREEN_SIZE, 8, EGL.EGL_BLUE_SIZE, 8, EGL.EGL_DEPTH_SIZE, 24,
+                     EGL.EGL_NONE]
+        config, n_configs = EGL.EGLConfig(), EGL.EGLint()
+        if not EGL.eglChooseConfig(pantalla, (EGL.EGLint * len(atributos))(*atributos),
+                                   ctypes.pointer(config), 1, ctypes.pointer(n_configs)) or n_configs.value == 0:
+            raise RuntimeError("EGL no ofrece ninguna configuración con pbuffer y OpenGL")
+        dimensiones = [EGL.EGL_WIDTH, ancho, EGL.EGL_HEIGHT, alto, EGL.EGL_NONE]
+        superficie = EGL.eglCreatePbufferSurface(pantalla, config, (EGL.EGLint * len(dimensiones))(*dimensiones))
+        EGL.eglBindAPI(EGL.EGL_OPENGL_API)  # Perfil de compatibilidad: la escena usa la tubería fija
+        contexto = EGL.eglCreateContext(pantalla, config, EGL.EGL_NO_CONTEXT, None)
+        if not EGL.eglMakeCurrent(pantalla, superficie, superficie, contexto):
+            raise RuntimeError("No se pudo activar el contexto EGL")
+        return pantalla, superficie, contexto
+    raise ValueError(f"Plataforma sin ventana no soportada: {plataforma} (use PYOPENGL_PLATFORM=egl u osmesa)")
+
+class FramebufferOffscreen:
+    """Framebuffer propio (color RGBA8 y profundidad) en el que se renderiza cada frame"""
+
+    def __init__(self, ancho, alto):
+        self.ancho = ancho
+        self.alto = alto
+        self.fbo = glGenFramebuffers(1)
+        self.color, self.profundidad = glGenRenderbuffers(2)
+        glBindRenderbuffer(GL_RENDERBUFFER, self.color)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_RGBA8, ancho, alto)
+        glBindRenderbuffer(GL_RENDERBUFFER, self.profundidad)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_DEPTH_COMPONENT24, ancho, alto)
+        glBindRenderbuffer(GL_RENDERBUFFER, 0)
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_RENDERBUFFER, self.color)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_RENDERBUFFER, self.profundidad)
+        if glCheckFramebufferStatus(GL_FRAMEBUFFER) != GL_FRAMEBUFFER_COMPLETE:
+            raise RuntimeError("El framebuffer fuera de pantalla está incompleto")
+
+    def activar(self):
+        """Dirigir el render (y glReadPixels) a este framebuffer"""
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+        glViewport(0, 0, self.ancho, self.alto)
+
+    def liberar(self):
+        """Liberar los recursos de la GPU"""
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        glDeleteFramebuffers(1, [self.fbo])
+        glDeleteRenderbuffers(2, [self.color, self.profundidad])
+
+class LectorPBO:
+    """Lectura asíncrona de frames con un anillo de pixel buffer objects"""
+
+    def __init__(self, ancho, alto, n_buffers=3):
+        self.ancho = ancho
+        self.alto = alto
+        self.tamano = ancho * alto * 4  # Bytes de un frame RGBA
+        self.pendientes = deque()  # (número de frame, PBO) con la copia encargada a la GPU
+        try:
+            self.libres = [int(pbo) for pbo in np.atleast_1d(glGenBuffers(n_buffers))]
+            for pbo in self.libres:
+                glBindBuffer(GL_PIXEL_PACK_BUFFER, pbo)
+                glBufferData(GL_PIXEL_PACK_BUFFER, self.tamano, None, GL_STREAM_READ)
+            glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        except Exception:
+            self.libres = None  # Sin PBO: lectura síncrona
+
+    def leer(self, numero):
+        """Encargar la copia del frame actual; devuelve los frames ya disponibles como [(número, imagen RGBA)]"""
+        if self.libres is None:
+            datos = glReadPixels(0, 0, self.ancho, self.alto, GL_RGBA, GL_UNSIGNED_BYTE)
+            return [(numero, np.frombuffer(datos, dtype=np.uint8).reshape(self.alto, self.ancho, 4))]
+        # Con el anillo lleno se recoge el frame más antiguo, que la GPU ya habrá terminado de copiar
+        listos = [self._recoger()] if not self.libres else []
+        pbo = self.libres.pop()
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, pbo)
+        glReadPixels(0, 0, self.ancho, self.alto, GL_RGBA, GL_UNSIGNED_BYTE, ctypes.c_void_p(0))
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        self.pendientes.append((numero, pbo))
+        return listos
+
+    def _recoger(self):
+        """Copiar a memoria el frame pendiente más antiguo y devolver su PBO al anillo"""
+        numero, pbo = self.pendientes.popleft()
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, pbo)
+        puntero = glMapBufferRange(GL_PIXEL_PACK_BUFFER, 0, self.tamano, GL_MAP_READ_BIT)
+        imagen = np.frombuffer((ctypes.c_ubyte * self.tamano).from_address(puntero), dtype=np.uint8).copy()
+        glUnmapBuffer(GL_PIXEL_PACK_BUFFER)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        self.libres.append(pbo)
+        return numero, imagen.reshape(self.alto, self.ancho, 4)
+
+    def vaciar(self):
+        """Recoger todos los frames pendientes (al terminar la grabación)"""
+        return [self._recoger() for _ in range(len(self.pendientes))]
+
+    def liberar(self):
+        """Liberar los recursos de la GPU"""
+        if self.libres:
+            glDeleteBuffers(len(self.libres), self.libres)
+        self.libres = None
+
+def codificar_ppm(imagen):
+    """Imagen RGB (filas de arriba abajo) como PPM binario (P6)"""
+    alto, ancho = imagen.shape[:2]
+    return b"P6\n%d %d\n255\n" % (ancho, alto) + np.ascontiguousarray(imagen).tobytes()
+
+def codificar_png(imagen, nivel=6):
+    """Imagen RGB (filas de arriba abajo) como PNG de 8 bits sin filtros"""
+    alto, ancho = imagen.shape[:2]
+    filas = np.empty((alto, 1 + 3 * ancho), dtype=np.uint8)
+    filas[:, 0] = 0  # Filtro "None" en cada fila
+    filas[:, 1:] = imagen.reshape(alto, -1)
+
+    def bloque(tipo, datos):
+        return struct.pack(">I", len(datos)) + tipo + datos + struct.pack(">I", zlib.crc32(tipo + datos))
+
+    cabecera = struct.pack(">IIBBBBB", ancho, alto, 8, 2, 0, 0, 0)  # 8 bits, RGB
+    return (b"\x89PNG\r\n\x1a\n" + bloque(b"IHDR", cabecera)
+            + bloque(b"IDAT", zlib.compress(filas.tobytes(), nivel)) + bloque(b"IEND", b""))
+
+class EscritorImagenes:
+    """Codificación y escritura de frames en un pool de hilos (zlib y la E/S liberan el GIL)"""
+
+    def __init__(self, directorio, formato="png", hilos=None, max_pendientes=None):
+        if formato not in ("png", "ppm"):
+            raise ValueError(f"Formato de imagen no soportado: {formato}")
+        os.makedirs(directorio, exist_ok=True)
+        self.directorio = directorio
+        self.formato = formato
+        self.hilos = hilos or os.cpu_count() or 1
+        self.pool = ThreadPoolExecutor(max_workers=self.hilos)
+        # Frames en cola como mucho: acota la memoria si la codificación va más lenta que el render
+        self.max_pendientes = max_pendientes or 2 * self.hilos
+        self.pendientes = deque()
+
+    def guardar(self, numero, imagen):
+        """Encargar la escritura de un frame RGBA leído de OpenGL (filas de abajo arriba)"""
+        while len(self.pendientes) >= self.max_pendientes:
+            self.pendientes.popleft().result()
+        archivo = os.path.join(self.directorio, f"frame_{numero:05d}.{self.formato}")
+        self.pendientes.append(self.pool.submit(self._escribir, archivo, imagen))
+
+    def _escribir(self, archivo, imagen):
+        """Voltear, quitar el alfa, codificar y escribir (en un hilo del pool)"""
+        rgb = imagen[::-1, :, :3]
+        datos = codificar_png(rgb) if self.formato == "png" else codificar_ppm(rgb)
+        with open(archivo, "wb") as f:
+            f.write(datos)
+
+    def cerrar(self):
+        """Esperar a que se escriban todos los frames encargados"""
+        while self.pendientes:
+            self.pendientes.popleft().result()
+        self.pool.shutdown()
+
+class GrabadorOffscreen:
+    """Simulación renderizada sin ventana a paso fijo de tiempo simulado, guardada como secuencia de imágenes"""
+
+    def __init__(self, config=None):
+        cfg = dict(CONFIG_GRABACION_DEFAULT)
+        if config is not None:
+            cfg.update(config)
+        self.cfg = cfg
+        self.ancho, self.alto = cfg["ancho"], cfg["alto"]
+
+        # Contexto por software y framebuffer propio; pygame solo se usa para las fuentes del panel
+        self.contexto = crear_contexto(self.ancho, self.alto)
+        pygame.font.init()
+        self.framebuffer = FramebufferOffscreen(self.ancho, self.alto)
+        self.framebuffer.activar()
+        configurar_opengl()
+
+        # Rampas, escena y esferas igual que en main.py, sin preguntas por consola
+        self.punto_A = cfg["punto_A"]
+        self.rampa_manager = RampaManager(verbose=False)
+        self.rampa_manager.set_puntos(self.punto_A)
+        if cfg["rampa_optima"]:
+            self.rampa_manager.activar_rampa_optima()
+        self.escena = Escena(TEXTURAS_GRABACION[cfg["textura"]], usar_glsl=cfg["glsl"])
+        self.escena.texturas.completar()  # Sin texels provisionales en los primeros frames
+        self.escena.rampas_adicionales = self.rampa_manager.get_rampas_adicionales()
+        # Todas las sondas de reflejo cada frame: la imagen no depende de la velocidad de la máquina
+        self.escena.reflejos.presupuesto_ms = float("inf")
+        self.balls = get_esferas([dict(c, verbose=False) for c in self.rampa_manager.get_curvas_para_esferas()])
+        for ball in self.balls:
+            ball.initialize_position()
+        self.motor = MotorFisicoLote(self.balls)
+
+        self.font = pygame.font.Font(None, 36)
+        self.small_font = pygame.font.Font(None, 24)
+
+        # Estado de la simulación (empieza al instante, como si se pulsara ESPACIO en el primer frame)
+        self.tiempo = 0.0
+        self.platform_position_x = self.punto_A[0]
+        self.platform_height = self.punto_A[1] + 0.3
+        self.platform_moving = False
+        self.all_balls_stopped = False
+        self.last_ball_stop_time = None
+
+        self.lector = LectorPBO(self.ancho, self.alto, cfg["buffers_lectura"])
+        self.escritor = EscritorImagenes(cfg["directorio"], cfg["formato"], cfg["hilos"])
+
+    def setup_camera(self):
+        """Cámara fija con los valores iniciales de main.py"""
+        distancia, angulo_x, angulo_y, posicion = self.cfg["camara"]
+        camara = matrices_camara(distancia, angulo_x, angulo_y, posicion, self.ancho / self.alto)
+        cargar_camara(*camara)
+        return camara
+
+    def avanzar(self, dt):
+        """Un paso de física con la plataforma de main.py, en tiempo simulado"""
+        self.tiempo += dt
+        if self.tiempo >= self.cfg["retardo_plataforma"]:
+            self.platform_moving = True
+        if self.platform_moving and self.platform_position_x > self.punto_A[0] - 3.0:
+            self.platform_position_x -= self.cfg["velocidad_plataforma"] * dt
+        if self.platform_position_x <= self.punto_A[0] - 1.5 and not self.motor.platform_released.all():
+            self.motor.liberar()
+        self.motor.paso(dt, self.tiempo)
+        if not self.all_balls_stopped and self.motor.finished.all():
+            self.all_balls_stopped = True
+            self.last_ball_stop_time = self.tiempo
+
+    def render(self):
+        """Renderizar el frame actual en el framebuffer fuera de pantalla"""
+        self.framebuffer.activar()
+        self.escena.render(
+            setup_camera_func=self.setup_camera,
+            platform_position_x=self.platform_position_x,
+            platform_height=self.platform_height,
+            balls=self.balls,
+            simulation_started=True,
+            start_time=0,
+            all_balls_stopped=self.all_balls_stopped,
+            last_ball_stop_time=self.last_ball_stop_time,
+            font=self.font,
+            small_font=self.small_font,
+            tiempo_simulado=self.tiempo,
+        )
+
+    def grabar(self):
+        """Renderizar y guardar frames hasta que las bolas se detengan (más la cola) o se agote el tiempo"""
+        # El render de un frame se solapa con la copia por PBO del anterior y la codificación de los previos
+        intervalo = 1.0 / self.cfg["fps"]
+        pasos_por_frame = max(1, int(round(intervalo / self.cfg["dt"])))
+        dt = intervalo / pasos_por_frame
+        numero = 0
+        while True:
+            self.render()
+            for n, imagen in self.lector.leer(numero):
+                self.escritor.guardar(n, imagen)
+            numero += 1
+            if self.tiempo >= self.cfg["duracion_max"] or \
+                    (self.all_balls_stopped and self.tiempo >= self.last_ball_stop_time + self.cfg["cola"]):
+                break
+            for _ in range(pasos_por_frame):
+                self.avanzar(dt)
+        for n, imagen in self.lector.vaciar():
+            self.escritor.guardar(n, imagen)
+        self.escritor.cerrar()
+        return numero
+
+    def liberar(self):
+        """Liberar los recursos de la GPU propios de la grabación"""
+        self.lector.liberar()
+        self.framebuffer.liberar()
+
+def main():
+    """Punto de entrada por línea de comandos"""
+    parser = argparse.ArgumentParser(description="Render sin ventana de la braquistócrona a una secuencia de imágenes")
+    parser.add_argument("--x", type=float, default=1.0, help="Coordenada X del punto A")
+    parser.add_argument("--y", type=float, default=5.0, help="Altura del punto A")
+    parser.add_argument("--textura", choices=list(TEXTURAS_GRABACION), default=CONFIG_GRABACION_DEFAULT["textura"])
+    parser.add_argument("--optima", action="store_true", help="Añadir la rampa óptima como cuarta curva")
+    parser.add_argument("--glsl", action="store_true", help="Dibujar las bolas con shaders instanciados")
+    parser.add_argument("--ancho", type=int, default=CONFIG_GRABACION_DEFAULT["ancho"])
+    parser.add_argument("--alto", type=int, default=CONFIG_GRABACION_DEFAULT["alto"])
+    parser.add_argument("--fps", type=float, default=CONFIG_GRABACION_DEFAULT["fps"], help="Frames por segundo simulado")
+    parser.add_argument("--dt", type=float, default=CONFIG_GRABACION_DEFAULT["dt"], help="Paso de tiempo simulado")
+    parser.add_argument("--duracion-max", type=float, default=CONFIG_GRABACION_DEFAULT["duracion_max"])
+    parser.add_argument("--formato", choices=["png", "ppm"], default=CONFIG_GRABACION_DEFAULT["formato"])
+    parser.add_argument("--hilos", type=int, default=None, help="Hilos de codificación de imágenes")
+    parser.add_argument("--salida", default=CONFIG_GRABACION_DEFAULT["directorio"], help="Carpeta de las imágenes")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    grabador = GrabadorOffscreen({
+        "punto_A": (args.x, args.y, 0.0),
+        "textura": args.textura,
+        "rampa_optima": args.optima,
+        "glsl": args.glsl,
+        "ancho": args.ancho,
+        "alto": args.alto,
+        "fps": args.fps,
+        "dt": args.dt,
+        "duracion_max": args.duracion_max,
+        "formato": args.formato,
+        "hilos": args.hilos,
+        "directorio": args.salida,
+    })
+    n_frames = grabador.grabar()
+    grabador.liberar()
+    duracion = time.perf_counter() - inicio
+    print(f"{n_frames} frames ({n_frames / args.fps:.1f} s simulados) guardados en {args.salida} "
+          f"en {duracion:.1f} s ({n_frames / duracion:.1f} frames/s)")
+
+if __name__ == "__main__":
+    main()
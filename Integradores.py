@@ -0,0 +1,121 @@
+import numpy as np
+
+# Integradores para el estado (s, v) de una esfera sobre su curva:
+# ds/dt = v, dv/dt = aceleracion(s, v)
+
+class EulerSemiImplicito:
+    """Euler semi-implícito: v += a·dt y después s += v·dt (esquema original de Esfera)"""
+
+    def paso(self, aceleracion, s, v, dt):
+        v_nueva = v + aceleracion(s, v) * dt
+        return s + v_nueva * dt, v_nueva
+
+class RK4:
+    """Runge-Kutta clásico de orden 4 con paso fijo"""
+
+    def paso(self, aceleracion, s, v, dt):
+        k1_s, k1_v = v, aceleracion(s, v)
+        k2_s, k2_v = v + 0.5 * dt * k1_v, aceleracion(s + 0.5 * dt * k1_s, v + 0.5 * dt * k1_v)
+        k3_s, k3_v = v + 0.5 * dt * k2_v, aceleracion(s + 0.5 * dt * k2_s, v + 0.5 * dt * k2_v)
+        k4_s, k4_v = v + dt * k3_v, aceleracion(s + dt * k3_s, v + dt * k3_v)
+        s_nueva = s + dt / 6.0 * (k1_s + 2 * k2_s + 2 * k3_s + k4_s)
+        v_nueva = v + dt / 6.0 * (k1_v + 2 * k2_v + 2 * k3_v + k4_v)
+        return s_nueva, v_nueva
+
+# Tabla de Butcher de Dormand-Prince 5(4)
+_DP_C = (0.0, 1/5, 3/10, 4/5, 8/9, 1.0, 1.0)
+_DP_A = (
+    (),
+    (1/5,),
+    (3/40, 9/40),
+    (44/45, -56/15, 32/9),
+    (19372/6561, -25360/2187, 64448/6561, -212/729),
+    (9017/3168, -355/33, 46732/5247, 49/176, -5103/18656),
+    (35/384, 0.0, 500/1113, 125/192, -2187/6784, 11/84),
+)
+_DP_B5 = (35/384, 0.0, 500/1113, 125/192, -2187/6784, 11/84, 0.0)
+_DP_B4 = (5179/57600, 0.0, 7571/16695, 393/640, -92097/339200, 187/2100, 1/40)
+
+class RK45Adaptativo:
+    """Dormand-Prince 5(4) con control de error: subdivide dt en subpasos adaptativos"""
+
+    def __init__(self, rtol=1e-6, atol=1e-9, h_min=1e-7):
+        self.rtol = rtol  # Tolerancia relativa
+        self.atol = atol  # Tolerancia absoluta
+        self.h_min = h_min  # Subpaso mínimo (se acepta aunque no cumpla la tolerancia)
+        self.h = None  # Último subpaso aceptado, se reutiliza en la siguiente llamada
+
+    def _dormand_prince(self, aceleracion, s, v, h):
+        """Un subpaso de orden 5 y la estimación de error frente al de orden 4"""
+        ks, kv = [], []
+        for etapa in range(7):
+            s_etapa = s + h * sum(a * k for a, k in zip(_DP_A[etapa], ks))
+            v_etapa = v + h * sum(a * k for a, k in zip(_DP_A[etapa], kv))
+            ks.append(v_etapa)
+            kv.append(aceleracion(s_etapa, v_etapa))
+        s5 = s + h * sum(b * k for b, k in zip(_DP_B5, ks))
+        v5 = v + h * sum(b * k for b, k in zip(_DP_B5, kv))
+        error_s = h * sum((b5 - b4) * k for b5, b4, k in zip(_DP_B5, _DP_B4, ks))
+        error_v = h * sum((b5 - b4) * k for b5, b4, k in zip(_DP_B5, _DP_B4, kv))
+        escala_s = self.atol + self.rtol * max(abs(s), abs(s5))
+        escala_v = self.atol + self.rtol * max(abs(v), abs(v5))
+        return s5, v5, max(abs(error_s) / escala_s, abs(error_v) / escala_v)
+
+    def paso(self, aceleracion, s, v, dt):
+        t = 0.0
+        h = dt if self.h is None else min(self.h, dt)
+        while dt - t > 1e-15:
+            h = min(h, dt - t)
+            s_nueva, v_nueva, error = self._dormand_prince(aceleracion, s, v, h)
+            if error <= 1.0 or h <= self.h_min:
+                t += h
+                s, v = s_nueva, v_nueva
+            # Ajuste clásico del subpaso con factor de seguridad
+            factor = 5.0 if error == 0.0 else min(5.0, max(0.2, 0.9 * error ** -0.2))
+            h = max(self.h_min, h * factor)
+        self.h = h
+        return s, v
+
+INTEGRADORES = {
+    "euler": EulerSemiImplicito,
+    "rk4": RK4,
+    "rk45": RK45Adaptativo,
+}
+
+def crear_integrador(integrador):
+    """Devuelve una instancia de integrador a partir de su nombre (o la propia instancia)"""
+    if isinstance(integrador, str):
+        try:
+            return INTEGRADORES[integrador]()
+        except KeyError:
+            raise ValueError(f"Integrador desconocido: {integrador} (opciones: {', '.join(INTEGRADORES)})")
+    return integrador
+
+def localizar_evento(integrador, aceleracion, s, v, dt, s_objetivo, tol=1e-10, max_iter=60):
+    """Instante tau en [0, dt] en que s alcanza s_objetivo (regula falsi de Illinois)"""
+    # Devuelve (tau, s(tau), v(tau)); el llamador garantiza que s cruza s_objetivo en el paso
+    a, f_a = 0.0, s - s_objetivo
+    b = dt
+    s_b, v_b = integrador.paso(aceleracion, s, v, dt)
+    f_b = s_b - s_objetivo
+    c, s_c, v_c = b, s_b, v_b
+    lado = 0
+    for _ in range(max_iter):
+        if f_b == f_a:
+            break
+        c = (a * f_b - b * f_a) / (f_b - f_a)
+        s_c, v_c = integrador.paso(aceleracion, s, v, c)
+        f_c = s_c - s_objetivo
+        if abs(f_c) < tol or b - a < tol:
+            break
+        if np.sign(f_c) == np.sign(f_b):
+            b, f_b = c, f_c
+            if lado == -1:
+                f_a /= 2.0  # Illinois: evitar que un extremo quede estancado
+            lado = -1
+        else:
+            a, f_a = c, f_c
+            if lado == 1:
+                f_b /= 2.0
+            lado = 1
+    return c, s_c, v_c
@@ -0,0 +1,201 @@
+import argparse
+import time
+
+import numpy as np
+
+from Esferas import get_esferas
+from Fisica import MotorFisicoLote
+from Rampas import RampaManager
+from Simulador import CONFIG_SIMULACION_DEFAULT
+
+# Configuración por defecto de un conjunto Monte Carlo
+CONFIG_MONTECARLO_DEFAULT = {
+    "n": 100000,  # Miembros del conjunto por curva
+    "punto_A": (1.0, 5.0, 0.0),  # Punto inicial alto de las rampas
+    "sigma_mu": 0.10,  # Dispersión relativa del rozamiento (log-normal)
+    "sigma_masa": 0.05,  # Dispersión relativa de la masa (log-normal)
+    "sigma_lanzamiento": 0.02,  # Dispersión del instante de liberación en segundos (normal)
+    "dt": CONFIG_SIMULACION_DEFAULT["dt"],
+    "tiempo_max": CONFIG_SIMULACION_DEFAULT["tiempo_max"],
+    "tam_lote": 50000,  # Bolas por motor; acota la memoria con independencia de n
+    "bins": 200,  # Intervalos de los histogramas
+    "semilla": None,  # Semilla del generador aleatorio (None = no reproducible)
+}
+
+class EstadisticasStreaming:
+    """Media, varianza, extremos e histograma de una magnitud, acumulados por lotes"""
+
+    def __init__(self, bins=200):
+        self.bins = bins
+        self.n = 0  # Muestras finitas acumuladas
+        self.sin_evento = 0  # Miembros en los que el evento no llegó a ocurrir
+        self.media = 0.0
+        self._m2 = 0.0  # Suma de cuadrados de desviaciones (Welford/Chan)
+        self.minimo = np.inf
+        self.maximo = -np.inf
+        self.bordes = None  # Rango fijado con el primer lote
+        self.cuentas = None
+        self.por_debajo = 0  # Muestras fuera del rango del histograma
+        self.por_encima = 0
+
+    def agregar(self, valores):
+        """Incorporar un lote de valores (NaN = evento no ocurrido)"""
+        valores = np.asarray(valores, dtype=float)
+        finitos = valores[np.isfinite(valores)]
+        self.sin_evento += valores.size - finitos.size
+        if finitos.size == 0:
+            return
+
+        # Combinar media y varianza del lote con las acumuladas (Chan et al.)
+        n_lote = finitos.size
+        media_lote = finitos.mean()
+        m2_lote = np.sum((finitos - media_lote) ** 2)
+        total = self.n + n_lote
+        delta = media_lote - self.media
+        self.media += delta * n_lote / total
+        self._m2 += m2_lote + delta ** 2 * self.n * n_lote / total
+        self.n = total
+        self.minimo = min(self.minimo, finitos.min())
+        self.maximo = max(self.maximo, finitos.max())
+
+        # Histograma de rango fijo con un margen sobre el primer lote
+        if self.bordes is None:
+            margen = max(0.25 * (finitos.max() - finitos.min()), 1e-6)
+            self.bordes = np.linspace(finitos.min() - margen, finitos.max() + margen, self.bins + 1)
+            self.cuentas = np.zeros(self.bins, dtype=np.int64)
+        self.cuentas += np.histogram(finitos, bins=self.bordes)[0]
+        self.por_debajo += int(np.count_nonzero(finitos < self.bordes[0]))
+        self.por_encima += int(np.count_nonzero(finitos > self.bordes[-1]))
+
+    @property
+    def desviacion(self):
+        """Desviación típica muestral"""
+        return float(np.sqrt(self._m2 / (self.n - 1))) if self.n > 1 else 0.0
+
+    def cuantil(self, q):
+        """Cuantil aproximado por interpolación lineal en el histograma acumulado"""
+        if self.n == 0:
+            return np.nan
+        # Las muestras fuera de rango se asignan a los extremos exactos
+        acumulado = np.concatenate(([self.por_debajo], self.por_debajo + np.cumsum(self.cuentas)))
+        objetivo = q * self.n
+        if objetivo <= self.por_debajo:
+            return self.minimo
+        if objetivo >= acumulado[-1]:
+            return self.maximo
+        return float(np.clip(np.interp(objetivo, acumulado, self.bordes), self.minimo, self.maximo))
+
+    def resumen(self, cuantiles=(0.05, 0.5, 0.95)):
+        """Diccionario con las estadísticas acumuladas"""
+        datos = {
+            "n": self.n,
+            "sin_evento": self.sin_evento,
+            "media": self.media if self.n else np.nan,
+            "desviacion": self.desviacion,
+            "minimo": self.minimo if self.n else np.nan,
+            "maximo": self.maximo if self.n else np.nan,
+        }
+        for q in cuantiles:
+            datos[f"q{int(round(q * 100)):02d}"] = self.cuantil(q)
+        return datos
+
+def _simular_lote(tablas, curva, masa, mu, mu_ramp, restitution, radios, dt, tiempo_max):
+    """Integrar un lote de bolas sin objetos Esfera desde la liberación (t=0)"""
+    motor = MotorFisicoLote.desde_parametros(tablas, curva, masa, mu, mu_ramp, restitution, radios=radios)
+    motor.liberar()
+    n_pasos = int(round(tiempo_max / dt))
+    for paso in range(1, n_pasos + 1):
+        motor.paso(dt, paso * dt)
+        if motor.finished.all():
+            break
+    return motor.first_impact_time, motor.final_stop_time
+
+def simular_conjunto(config=None):
+    """Conjunto Monte Carlo con rozamiento, masa e instante de lanzamiento perturbados"""
+    # Devuelve {curva: {"primer_impacto": EstadisticasStreaming, "parada_final": EstadisticasStreaming}}
+    cfg = dict(CONFIG_MONTECARLO_DEFAULT)
+    if config is not None:
+        cfg.update(config)
+    rng = np.random.default_rng(cfg["semilla"])
+
+    # Una esfera plantilla por curva: aporta la tabla de arco y los parámetros nominales
+    rampa_manager = RampaManager(verbose=False)
+    rampa_manager.set_puntos(cfg["punto_A"])
+    plantillas = get_esferas([dict(c, verbose=False) for c in rampa_manager.get_curvas_para_esferas()])
+    for esfera in plantillas:
+        esfera.initialize_position()
+    tablas = [esfera.tabla for esfera in plantillas]
+
+    # La dinámica no depende del instante absoluto: se liberan todas a la vez
+    # y a sus tiempos se suma la liberación nominal de la plataforma más su desfase
+    tiempo_liberacion = (CONFIG_SIMULACION_DEFAULT["retardo_plataforma"]
+                         + 1.5 / CONFIG_SIMULACION_DEFAULT["velocidad_plataforma"])
+
+    estadisticas = {
+        esfera.name: {
+            "primer_impacto": EstadisticasStreaming(cfg["bins"]),
+            "parada_final": EstadisticasStreaming(cfg["bins"]),
+        }
+        for esfera in plantillas
+    }
+    total = cfg["n"] * len(plantillas)
+    for inicio in range(0, total, cfg["tam_lote"]):
+        # Miembros intercalados por curva para que cada lote mezcle todas
+        miembros = np.arange(inicio, min(inicio + cfg["tam_lote"], total))
+        curva = miembros % len(plantillas)
+        n = miembros.size
+
+        factor_mu = np.exp(cfg["sigma_mu"] * rng.standard_normal(n))
+        factor_masa = np.exp(cfg["sigma_masa"] * rng.standard_normal(n))
+        desfase = cfg["sigma_lanzamiento"] * rng.standard_normal(n)
+        mu = np.array([e.mu for e in plantillas])[curva] * factor_mu
+        mu_ramp = np.array([e.mu_ramp for e in plantillas])[curva] * factor_mu
+        masa = np.array([e.masa for e in plantillas])[curva] * factor_masa
+        restitution = np.array([e.restitution for e in plantillas])[curva]
+        radios = np.array([e.radius for e in plantillas])[curva]
+
+        primer_impacto, parada_final = _simular_lote(tablas, curva, masa, mu, mu_ramp, restitution,
+                                                     radios, cfg["dt"], cfg["tiempo_max"])
+        for i, esfera in enumerate(plantillas):
+            filas = curva == i
+            estadisticas[esfera.name]["primer_impacto"].agregar(
+                primer_impacto[filas] + tiempo_liberacion + desfase[filas])
+            estadisticas[esfera.name]["parada_final"].agregar(
+                parada_final[filas] + tiempo_liberacion + desfase[filas])
+    return estadisticas
+
+def main():
+    """Punto de entrada por línea de comandos"""
+    parser = argparse.ArgumentParser(description="Conjunto Monte Carlo de esferas perturbadas")
+    parser.add_argument("--n", type=int, default=CONFIG_MONTECARLO_DEFAULT["n"], help="Miembros por curva")
+    parser.add_argument("--x", type=float, default=1.0, help="Coordenada X del punto A")
+    parser.add_argument("--y", type=float, default=5.0, help="Altura del punto A")
+    parser.add_argument("--sigma-mu", type=float, default=CONFIG_MONTECARLO_DEFAULT["sigma_mu"])
+    parser.add_argument("--sigma-masa", type=float, default=CONFIG_MONTECARLO_DEFAULT["sigma_masa"])
+    parser.add_argument("--sigma-lanzamiento", type=float, default=CONFIG_MONTECARLO_DEFAULT["sigma_lanzamiento"])
+    parser.add_argument("--dt", type=float, default=CONFIG_MONTECARLO_DEFAULT["dt"], help="Paso de tiempo simulado")
+    parser.add_argument("--tam-lote", type=int, default=CONFIG_MONTECARLO_DEFAULT["tam_lote"])
+    parser.add_argument("--semilla", type=int, default=None)
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    estadisticas = simular_conjunto({
+        "n": args.n,
+        "punto_A": (args.x, args.y, 0.0),
+        "sigma_mu": args.sigma_mu,
+        "sigma_masa": args.sigma_masa,
+        "sigma_lanzamiento": args.sigma_lanzamiento,
+        "dt": args.dt,
+        "tam_lote": args.tam_lote,
+        "semilla": args.semilla,
+    })
+    print(f"{'curva':<12} {'evento':<15} {'media':>8} {'desv.':>7} {'q05':>8} {'q50':>8} {'q95':>8} {'sin ev.':>8}")
+    for nombre, eventos in estadisticas.items():
+        for evento, acumulado in eventos.items():
+            r = acumulado.resumen()
+            print(f"{nombre:<12} {evento:<15} {r['media']:>8.3f} {r['desviacion']:>7.3f} "
+                  f"{r['q05']:>8.3f} {r['q50']:>8.3f} {r['q95']:>8.3f} {r['sin_evento']:>8}")
+    print(f"{args.n * len(estadisticas)} bolas simuladas en {time.perf_counter() - inicio:.2f} s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import argparse
+import time
+
+import numpy as np
+
+from Esferas import MU_BASE, g
+
+# Refinamiento progresivo del perfil: cada nivel parte del anterior interpolado
+NIVELES_DEFAULT = (8, 16, 32, 64)
+
+def nodos_perfil(segmentos):
+    """Abscisas normalizadas u en [0, 1], más densas cerca de A (donde la curva es casi vertical)"""
+    return (np.arange(segmentos + 1) / segmentos) ** 2
+
+def tiempos_perfiles(alturas, u, punto_A, punto_B, mu=0.0, masa=1.0):
+    """Tiempo de descenso de una o varias poligonales (una fila de alturas interiores por perfil)"""
+    # Alturas normalizadas: 1 en A y 0 en B; cada tramo recto tiene aceleración constante
+    # a = g·(sen θ - mu·cos θ)/masa (modelo de Esfera), así que t = 2·L/(v_ini + v_fin) es exacto
+    alturas = np.atleast_2d(alturas)
+    n = alturas.shape[0]
+    perfil = np.empty((n, len(u)))
+    perfil[:, 0] = 1.0
+    perfil[:, -1] = 0.0
+    perfil[:, 1:-1] = alturas
+
+    dx = np.diff(u) * (punto_B[0] - punto_A[0])
+    dy = np.diff(perfil, axis=1) * (punto_A[1] - punto_B[1])
+    longitud = np.hypot(dx, dy)
+    aceleracion = g * (-dy - mu * dx) / longitud / masa
+    v2 = np.concatenate((np.zeros((n, 1)), np.cumsum(2.0 * aceleracion * longitud, axis=1)), axis=1)
+    v = np.sqrt(np.maximum(v2, 0.0))
+    with np.errstate(divide="ignore"):
+        tiempos = np.sum(2.0 * longitud / (v[:, :-1] + v[:, 1:]), axis=1)
+    # La bola se detiene antes de llegar al final
+    tiempos[np.any(v2[:, 1:] <= 0.0, axis=1)] = np.inf
+    return tiempos
+
+def _gradiente(objetivo, alturas, h=1e-7):
+    """Gradiente por diferencias centradas, con todas las perturbaciones evaluadas en un solo lote"""
+    m = alturas.size
+    perturbacion = h * np.eye(m)
+    valores = objetivo(np.vstack((alturas + perturbacion, alturas - perturbacion)))
+    adelante, atras = valores[:m], valores[m:]
+    # Cerca de un perfil inviable se usa la diferencia por el lado finito
+    centro = objetivo(alturas)[0]
+    return np.where(np.isfinite(adelante) & np.isfinite(atras), (adelante - atras) / (2 * h),
+                    np.where(np.isfinite(adelante), (adelante - centro) / h, (centro - atras) / h))
+
+def _lbfgs(objetivo, alturas, max_iter=200, tol=1e-12, memoria=8):
+    """Minimización L-BFGS con búsqueda lineal de Armijo; devuelve (alturas, valor, iteraciones)"""
+    valor = objetivo(alturas)[0]
+    gradiente = _gradiente(objetivo, alturas)
+    pasos, cambios = [], []
+    for iteracion in range(1, max_iter + 1):
+        # Dirección por la recursión de dos bucles
+        direccion = -gradiente
+        alfas = []
+        for s, y in reversed(list(zip(pasos, cambios))):
+            alfa = s @ direccion / (y @ s)
+            direccion = direccion - alfa * y
+            alfas.append(alfa)
+        if pasos:
+            direccion *= (pasos[-1] @ cambios[-1]) / (cambios[-1] @ cambios[-1])
+        else:
+            direccion *= 0.01 / max(np.max(np.abs(gradiente)), 1e-300)  # Primer paso: 1% de la altura
+        for (s, y), alfa in zip(zip(pasos, cambios), reversed(alfas)):
+            beta = y @ direccion / (y @ s)
+            direccion = direccion + (alfa - beta) * s
+        pendiente = gradiente @ direccion
+        if pendiente >= 0.0:
+            pasos, cambios = [], []
+            direccion = -gradiente * 0.01 / max(np.max(np.abs(gradiente)), 1e-300)
+            pendiente = gradiente @ direccion
+
+        # Búsqueda lineal con retroceso (los perfiles inviables valen inf y se rechazan)
+        factor = 1.0
+        while True:
+            nuevas = alturas + factor * direccion
+            nuevo_valor = objetivo(nuevas)[0]
+            if nuevo_valor <= valor + 1e-4 * factor * pendiente:
+                break
+            factor *= 0.5
+            if factor < 1e-10:
+                return alturas, valor, iteracion
+
+        nuevo_gradiente = _gradiente(objetivo, nuevas)
+        s, y = nuevas - alturas, nuevo_gradiente - gradiente
+        if s @ y > 1e-16:
+            pasos.append(s)
+            cambios.append(y)
+            if len(pasos) > memoria:
+                pasos.pop(0)
+                cambios.pop(0)
+        mejora = valor - nuevo_valor
+        alturas, valor, gradiente = nuevas, nuevo_valor, nuevo_gradiente
+        if mejora <= tol * valor:
+            break
+    return alturas, valor, iteracion
+
+def _perfil_inicial(u):
+    """Alturas de la cicloide de las rampas (normalizada) en los nodos u"""
+    theta = np.linspace(0.0, np.pi, 2001)
+    return 1.0 - np.interp(u, (theta - np.sin(theta)) / np.pi, (1.0 - np.cos(theta)) / 2.0)
+
+class PerfilOptimo:
+    """Perfil de alturas de tiempo mínimo entre A y B (alturas normalizadas: 1 en A, 0 en B)"""
+
+    def __init__(self, u, altura, punto_A, punto_B, mu, masa, tiempo, iteraciones):
+        self.u = u  # Abscisas normalizadas de los nodos
+        self.altura = altura  # Alturas normalizadas en los nodos
+        self.punto_A = np.array(punto_A, dtype=float)
+        self.punto_B = np.array(punto_B, dtype=float)
+        self.mu = mu
+        self.masa = masa
+        self.tiempo = tiempo  # Tiempo de descenso de la poligonal
+        self.iteraciones = iteraciones  # Iteraciones L-BFGS sumadas en todos los niveles
+
+    @property
+    def x(self):
+        """Coordenadas X de los nodos en metros"""
+        return self.punto_A[0] + self.u * (self.punto_B[0] - self.punto_A[0])
+
+    @property
+    def y(self):
+        """Coordenadas Y de los nodos en metros"""
+        return self.punto_B[1] + self.altura * (self.punto_A[1] - self.punto_B[1])
+
+def optimizar_perfil(punto_A, punto_B, mu=MU_BASE, masa=1.0, niveles=NIVELES_DEFAULT, max_iter=200, tol=1e-12):
+    """Curva de descenso más rápido entre A y B con el modelo de rozamiento de Esfera"""
+    punto_A = np.asarray(punto_A, dtype=float)
+    punto_B = np.asarray(punto_B, dtype=float)
+    if punto_A[1] <= punto_B[1] or punto_B[0] <= punto_A[0]:
+        raise ValueError("El punto A debe estar más alto y a la izquierda del punto B")
+
+    alturas = None
+    u_anterior = None
+    iteraciones = 0
+    for segmentos in niveles:
+        u = nodos_perfil(segmentos)
+        if alturas is None:
+            alturas = _perfil_inicial(u)[1:-1]
+        else:
+            alturas = np.interp(u, u_anterior, np.concatenate(([1.0], alturas, [0.0])))[1:-1]
+        def objetivo(a, u=u):
+            return tiempos_perfiles(a, u, punto_A, punto_B, mu, masa)
+        if not np.isfinite(objetivo(alturas)[0]):
+            alturas = 1.0 - u[1:-1]  # Línea recta si la cicloide no llega al final con este rozamiento
+            if not np.isfinite(objetivo(alturas)[0]):
+                raise ValueError("El rozamiento es demasiado alto: la bola no llega a B ni en línea recta")
+        alturas, tiempo, n_iter = _lbfgs(objetivo, alturas, max_iter=max_iter, tol=tol)
+        iteraciones += n_iter
+        u_anterior = u
+
+    altura = np.concatenate(([1.0], alturas, [0.0]))
+    return PerfilOptimo(u_anterior, altura, punto_A, punto_B, mu, masa, tiempo, iteraciones)
+
+def main():
+    """Punto de entrada por línea de comandos"""
+    parser = argparse.ArgumentParser(description="Braquistócrona numérica con rozamiento")
+    parser.add_argument("--x", type=float, default=1.0, help="Coordenada X del punto A")
+    parser.add_argument("--y", type=float, default=5.0, help="Altura del punto A")
+    parser.add_argument("--mu", type=float, default=MU_BASE, help="Coeficiente de rozamiento")
+    parser.add_argument("--masa", type=float, default=1.0)
+    parser.add_argument("--segmentos", type=int, default=NIVELES_DEFAULT[-1], help="Tramos del perfil final")
+    args = parser.parse_args()
+
+    niveles = tuple(n for n in NIVELES_DEFAULT if n < args.segmentos) + (args.segmentos,)
+    punto_A = (args.x, args.y, 0.0)
+    punto_B = (args.x + 6.0, 1.0, 0.0)  # Mismo punto B que RampaManager
+    inicio = time.perf_counter()
+    perfil = optimizar_perfil(punto_A, punto_B, mu=args.mu, masa=args.masa, niveles=niveles)
+    duracion = time.perf_counter() - inicio
+    print(f"Tiempo de descenso óptimo: {perfil.tiempo:.5f} s "
+          f"({perfil.iteraciones} iteraciones, {duracion * 1000:.1f} ms)")
+    for x, y in zip(perfil.x, perfil.y):
+        print(f"  x={x:7.3f}  y={y:7.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import numpy as np
+
+from Esferas import Esfera, g
+from Rampas import TablaArco
+
+def tiempo_descenso(curve_func, z_offset=0.0, mu=0.0, masa=1.0, resolucion=20001, paneles=64, orden=8):
+    """Tiempo de descenso desde el reposo hasta el muro por cuadratura directa de ds/v"""
+    # Mismo modelo que Esfera: a(s) = g·(sen θ - mu·cos θ) / masa, con sen/cos interpolados en la tabla
+    tabla = TablaArco(curve_func, z_offset=z_offset, resolucion=resolucion)
+    s = tabla.s
+    aceleracion = g * (tabla.seno - mu * tabla.coseno) / masa
+
+    # v²(s) = 2·∫a ds; con a lineal por tramos el trapecio es exacto en los nodos
+    ds = np.diff(s)
+    pendiente_a = np.diff(aceleracion) / ds
+    v2_nodos = np.concatenate(([0.0], np.cumsum(ds * (aceleracion[:-1] + aceleracion[1:]))))
+    if np.any(v2_nodos[1:] <= 0.0):
+        return np.inf  # La fricción detiene la bola antes de llegar al muro
+
+    # Sustitución s = L·u² (elimina la singularidad 1/√s del arranque) y Gauss-Legendre compuesto
+    nodos, pesos = np.polynomial.legendre.leggauss(orden)
+    bordes = np.linspace(0.0, 1.0, paneles + 1)
+    mitad = 0.5 * np.diff(bordes)
+    u = (bordes[:-1, None] + mitad[:, None] * (nodos[None, :] + 1.0)).ravel()
+    w = (mitad[:, None] * pesos[None, :]).ravel()
+    s_u = tabla.longitud * u ** 2
+
+    # v² exacto dentro de cada tramo (integral de una aceleración lineal)
+    idx = np.clip(np.searchsorted(s, s_u, side="right") - 1, 0, len(s) - 2)
+    x = s_u - s[idx]
+    v2 = v2_nodos[idx] + 2.0 * (aceleracion[idx] * x + 0.5 * pendiente_a[idx] * x ** 2)
+    return float(np.sum(w * 2.0 * tabla.longitud * u / np.sqrt(v2)))
+
+def tiempos_descenso(config_esferas, friccion=True, **kwargs):
+    """Tiempo de descenso de referencia para cada configuración de get_esferas"""
+    # Con friccion=False se ignora el rozamiento (caso ideal sin pérdidas)
+    resultados = {}
+    for config in config_esferas:
+        esfera = Esfera(config['curve_func'], config['color'], config['name'],
+                        z_offset=config.get('z_offset', 0.0), masa=config.get('masa', 1.0),
+                        rozamiento_base=config.get('rozamiento'), verbose=False)
+        resultados[esfera.name] = tiempo_descenso(
+            esfera.curve_func, z_offset=esfera.z_offset,
+            mu=esfera.mu if friccion else 0.0, masa=esfera.masa, **kwargs)
+    return resultados
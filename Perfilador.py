@@ -0,0 +1,167 @@
+import csv
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    from OpenGL.GL import (glGenQueries, glQueryCounter, glGetQueryObjectiv, glGetQueryObjectui64v,
+                           GL_TIMESTAMP, GL_QUERY_RESULT, GL_QUERY_RESULT_AVAILABLE)
+except ImportError:
+    glGenQueries = glQueryCounter = glGetQueryObjectui64v = None  # Sin PyOpenGL: solo tiempos de CPU
+
+# Percentiles que se muestran en pantalla
+PERCENTILES_DEFAULT = (50, 95, 99)
+
+def soporta_timestamps():
+    """Si el contexto GL actual tiene consultas GL_TIMESTAMP (OpenGL 3.3 o ARB_timer_query)"""
+    try:
+        return bool(glGenQueries) and bool(glQueryCounter) and bool(glGetQueryObjectui64v)
+    except Exception:
+        return False  # Sin PyOpenGL o sin contexto
+
+class Perfilador:
+    """Tiempos por etapa de cada frame: CPU y, si hay soporte, GPU con consultas de timestamp"""
+
+    def __init__(self, ventana=300, usar_gl=True, max_frames=100000, intervalo_resumen=0.5):
+        self.ventana = ventana  # Frames usados para los percentiles móviles
+        self.usar_gl = usar_gl and soporta_timestamps()  # Requiere el contexto GL ya creado
+        self.intervalo_resumen = intervalo_resumen  # Segundos entre recálculos del resumen en pantalla
+        self.mostrar = False  # Superposición en pantalla activada
+        self.frames = deque(maxlen=max_frames)  # Registros completos (para exportar a CSV)
+        self.etapas = []  # Nombres de etapa en orden de aparición
+        self._frame = None  # Registro del frame en curso
+        self._numero = 0
+        self._consultas = []  # Consultas GL del frame en curso: (etapa, inicio, fin)
+        self._pendientes = deque()  # Frames con consultas GL aún sin resultado
+        self._libres = []  # Consultas GL reutilizables
+        self._resumen = []
+        self._instante_resumen = 0.0
+
+    def inicio_frame(self):
+        """Empezar a medir un frame nuevo"""
+        self._numero += 1
+        self._frame = {"frame": self._numero, "total": 0.0, "cpu": {}, "gpu": {}}
+        self._frame_inicio = time.perf_counter()
+        self._consultas = []
+
+    def _consulta(self):
+        """Consulta GL libre (o None si no hay soporte de timer queries)"""
+        if not self.usar_gl:
+            return None
+        try:
+            return self._libres.pop() if self._libres else int(glGenQueries(1))
+        except Exception:
+            self._desactivar_gl()  # No se pudo crear la consulta
+            return None
+
+    def _desactivar_gl(self):
+        """Pasar a solo tiempos de CPU tras cualquier error de las consultas GL"""
+        if self.usar_gl:
+            print("ADVERTENCIA: Consultas de tiempo GL no disponibles; el perfilador usa solo tiempos de CPU.")
+        self.usar_gl = False
+        self._consultas = []
+        self._pendientes.clear()
+        self._libres = []
+
+    def _marcar(self, consulta):
+        """Registrar un timestamp GL (False si falla y se desactiva la medición en GPU)"""
+        try:
+            glQueryCounter(consulta, GL_TIMESTAMP)
+            return True
+        except Exception:
+            self._desactivar_gl()
+            return False
+
+    @contextmanager
+    def etapa(self, nombre):
+        """Medir el bloque como etapa del frame (las repeticiones se acumulan)"""
+        if self._frame is None:
+            yield
+            return
+        if nombre not in self.etapas:
+            self.etapas.append(nombre)
+        consultas = (self._consulta(), self._consulta())
+        con_gpu = consultas[1] is not None and self._marcar(consultas[0])
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            cpu = self._frame["cpu"]
+            cpu[nombre] = cpu.get(nombre, 0.0) + (time.perf_counter() - inicio) * 1000.0
+            if con_gpu and self.usar_gl and self._marcar(consultas[1]):
+                self._consultas.append((nombre, consultas[0], consultas[1]))
+
+    def fin_frame(self):
+        """Cerrar el frame y recoger los resultados GL ya disponibles de frames anteriores"""
+        if self._frame is None:
+            return
+        self._frame["total"] = (time.perf_counter() - self._frame_inicio) * 1000.0
+        self.frames.append(self._frame)
+        if self._consultas and self.usar_gl:
+            self._pendientes.append((self._frame, self._consultas))
+        self._frame = None
+        self._recoger_gpu()
+
+    def _recoger_gpu(self):
+        """Leer las consultas terminadas sin bloquear (la GPU va unos frames por detrás)"""
+        try:
+            while self._pendientes:
+                frame, consultas = self._pendientes[0]
+                if not glGetQueryObjectiv(consultas[-1][2], GL_QUERY_RESULT_AVAILABLE):
+                    return
+                self._pendientes.popleft()
+                for nombre, inicio, fin in consultas:
+                    nanosegundos = glGetQueryObjectui64v(fin, GL_QUERY_RESULT) - glGetQueryObjectui64v(inicio, GL_QUERY_RESULT)
+                    frame["gpu"][nombre] = frame["gpu"].get(nombre, 0.0) + nanosegundos / 1e6
+                    self._libres.extend((inicio, fin))
+        except Exception:
+            self._desactivar_gl()
+
+    def percentiles(self, campo="cpu", q=PERCENTILES_DEFAULT):
+        """{etapa: [percentiles en ms]} de los últimos frames (etapa ausente en un frame = 0 ms)"""
+        recientes = list(self.frames)[-self.ventana:]
+        if not recientes:
+            return {}
+        resultado = {}
+        for nombre in self.etapas:
+            valores = np.array([frame[campo].get(nombre, 0.0) for frame in recientes])
+            resultado[nombre] = np.percentile(valores, q)
+        resultado["total"] = np.percentile([frame["total"] for frame in recientes], q)
+        return resultado
+
+    def resumen(self, q=PERCENTILES_DEFAULT):
+        """Líneas de texto con los percentiles móviles (recalculadas cada intervalo_resumen)"""
+        ahora = time.perf_counter()
+        if ahora - self._instante_resumen < self.intervalo_resumen and self._resumen:
+            return self._resumen
+        self._instante_resumen = ahora
+        cpu = self.percentiles("cpu", q)
+        gpu = self.percentiles("gpu", q) if self.usar_gl else {}
+        cabecera = "etapa        " + " ".join(f"{'p' + str(p):>6}" for p in q) + (" gpu p50" if gpu else "")
+        lineas = [cabecera]
+        for nombre, valores in cpu.items():
+            linea = f"{nombre:<12} " + " ".join(f"{v:6.2f}" for v in valores)
+            if gpu and nombre in gpu:
+                linea += f" {gpu[nombre][0]:7.2f}"
+            lineas.append(linea)
+        self._resumen = lineas
+        return lineas
+
+    def exportar_csv(self, archivo):
+        """Guardar todos los frames registrados (ms por etapa, CPU y GPU) en CSV"""
+        columnas = ["frame", "total_ms"]
+        columnas += [f"{nombre}_cpu_ms" for nombre in self.etapas]
+        columnas += [f"{nombre}_gpu_ms" for nombre in self.etapas] if self.usar_gl else []
+        with open(archivo, "w", newline="") as f:
+            escritor = csv.DictWriter(f, fieldnames=columnas)
+            escritor.writeheader()
+            for frame in self.frames:
+                fila = {"frame": frame["frame"], "total_ms": round(frame["total"], 4)}
+                for nombre in self.etapas:
+                    fila[f"{nombre}_cpu_ms"] = round(frame["cpu"].get(nombre, 0.0), 4)
+                    if self.usar_gl:
+                        fila[f"{nombre}_gpu_ms"] = round(frame["gpu"][nombre], 4) if nombre in frame["gpu"] else ""
+                escritor.writerow(fila)
+        return len(self.frames)
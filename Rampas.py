@@ -1,37 +1,48 @@
+from collections import OrderedDict
+
 import numpy as np
 
 # Valores por defecto para puntos A y B
 A_METERS_DEFAULT = np.array([1.0, 5.0, 0.0], dtype=float)  # Punto inicial alto
 B_METERS_DEFAULT = np.array([7.0, 1.0, 0.0], dtype=float)  # Punto final bajo (altura fija 1m)
 RAMP_SEPARATION_DEFAULT = 1.0  # Separación entre rampas
+RESOLUCION_TABLA_ARCO = 1001  # Nodos por defecto de las tablas de longitud de arco
+CAPACIDAD_CACHE_GEOMETRIA = 32  # Entradas máximas de la caché de geometría (LRU)
 
 # Variables globales que se actualizarán dinámicamente
 A_METERS = A_METERS_DEFAULT.copy()
 B_METERS = B_METERS_DEFAULT.copy()
 RAMP_SEPARATION = RAMP_SEPARATION_DEFAULT
 
+def _crear_rieles(x_meters, y_meters, width, z_offset):
+    """Crear rails izquierdo y derecho: (3,) para t escalar o (N,3) para un array de t"""
+    x_meters, y_meters = np.broadcast_arrays(x_meters, y_meters)
+    left_rail = np.stack([x_meters, y_meters, np.full_like(x_meters, -width/2 + z_offset)], axis=-1)
+    right_rail = np.stack([x_meters, y_meters, np.full_like(x_meters, width/2 + z_offset)], axis=-1)
+    return left_rail, right_rail
+
 def line_curve_3d(t, width=0.5, z_offset=0.0):
     """Línea recta - de A (alto) a B (bajo)"""
+    t = np.asarray(t, dtype=float)
     # Interpolación lineal entre A y B
-    pos_meters = A_METERS + t * (B_METERS - A_METERS)
+    x_meters = A_METERS[0] + t * (B_METERS[0] - A_METERS[0])
+    y_meters = A_METERS[1] + t * (B_METERS[1] - A_METERS[1])
     # Crear rails izquierdo y derecho
-    left_rail = np.array([pos_meters[0], pos_meters[1], -width/2 + z_offset])
-    right_rail = np.array([pos_meters[0], pos_meters[1], width/2 + z_offset])
-    return left_rail, right_rail
+    return _crear_rieles(x_meters, y_meters, width, z_offset)
 
 def parabolic_curve_3d(t, width=0.5, z_offset=0.0):
     """Parábola - de A (alto) a B (bajo) con caída vertical inicial"""
+    t = np.asarray(t, dtype=float)
     # Interpolación lineal en X
     x_meters = A_METERS[0] + t * (B_METERS[0] - A_METERS[0])
     # Interpolación en Y con término parabólico para caída inicial
     y_meters = A_METERS[1] + t * (B_METERS[1] - A_METERS[1]) - 3.0 * t * (1 - t)
     # Crear rails
-    left_rail = np.array([x_meters, y_meters, -width/2 + z_offset])
-    right_rail = np.array([x_meters, y_meters, width/2 + z_offset])
-    return left_rail, right_rail
+    return _crear_rieles(x_meters, y_meters, width, z_offset)
 
 def cycloid_curve_3d(t, width=0.5, z_offset=0.0):
     """Cicloide - de A (alto) a B (bajo) con pendiente vertical inicial"""
+    t = np.asarray(t, dtype=float)
     # Calcular diferencias entre A y B
     dx_meters = B_METERS[0] - A_METERS[0]  # Diferencia en X
     dy_meters = A_METERS[1] - B_METERS[1]  # Diferencia en Y (positiva)
@@ -53,17 +64,149 @@ def cycloid_curve_3d(t, width=0.5, z_offset=0.0):
     y_meters = A_METERS[1] + y_cycloid
     
     # Crear rails
-    left_rail = np.array([x_meters, y_meters, -width/2 + z_offset])
-    right_rail = np.array([x_meters, y_meters, width/2 + z_offset])
-    
-    return left_rail, right_rail
+    return _crear_rieles(x_meters, y_meters, width, z_offset)
+
+def crear_curva_perfil(u_nodos, altura):
+    """Curva de rampa a partir de un perfil de alturas normalizado (1 en A, 0 en B)"""
+    def perfil_curve_3d(t, width=0.5, z_offset=0.0):
+        """Perfil optimizado - de A (alto) a B (bajo), lineal entre nodos"""
+        t = np.asarray(t, dtype=float)
+        # Interpolación lineal en X y perfil de alturas escalado entre B y A
+        x_meters = A_METERS[0] + t * (B_METERS[0] - A_METERS[0])
+        y_meters = B_METERS[1] + np.interp(t, u_nodos, altura) * (A_METERS[1] - B_METERS[1])
+        # Crear rails
+        return _crear_rieles(x_meters, y_meters, width, z_offset)
+    return perfil_curve_3d
+
+class TablaArco:
+    """Tabla precomputada de longitud de arco: s -> posición, tangente y pendiente"""
+
+    def __init__(self, curve_func, z_offset=0.0, resolucion=RESOLUCION_TABLA_ARCO, sobremuestreo=8):
+        # Muestreo denso del parámetro t para invertir s(t)
+        t_denso = np.linspace(0.0, 1.0, (resolucion - 1) * sobremuestreo + 1)
+        left, right = curve_func(t_denso, z_offset=z_offset)
+        centro = (left + right) / 2.0
+        s_denso = np.concatenate(([0.0], np.cumsum(np.linalg.norm(np.diff(centro, axis=0), axis=1))))
+        self.longitud = s_denso[-1]  # Longitud total de la curva
+
+        # Nodos equiespaciados en longitud de arco y su parámetro t equivalente
+        self.s = np.linspace(0.0, self.longitud, resolucion)
+        self.t = np.interp(self.s, s_denso, t_denso)
+        self.rail_left, self.rail_right = curve_func(self.t, z_offset=z_offset)
+        self.posiciones = (self.rail_left + self.rail_right) / 2.0  # Centro (para física)
+
+        # Tangente unitaria por diferencias centradas respecto a s
+        derivada = np.gradient(self.posiciones, self.s, axis=0)
+        self.tangentes = derivada / np.linalg.norm(derivada, axis=1, keepdims=True)
+        dx = self.tangentes[:, 0]
+        dy = self.tangentes[:, 1]
+
+        # Pendiente Δy/Δx (evitando división por cero) y ángulo de la pendiente precalculado
+        vertical = np.abs(dx) <= 1e-6
+        self.pendientes = np.divide(dy, dx, out=np.zeros_like(dy), where=~vertical)
+        self.pendientes[vertical] = np.where(dy[vertical] > 0, 1e6, -1e6)
+        plano = np.hypot(dx, dy)
+        self.seno = np.abs(dy) / plano  # sin(arctan|pendiente|)
+        self.coseno = np.abs(dx) / plano  # cos(arctan|pendiente|)
+
+    def _segmento(self, s):
+        """Índice del nodo anterior (búsqueda binaria) y fracción dentro del segmento"""
+        s = np.clip(s, 0.0, self.longitud)
+        idx = np.clip(np.searchsorted(self.s, s, side="right") - 1, 0, len(self.s) - 2)
+        frac = (s - self.s[idx]) / (self.s[idx + 1] - self.s[idx])
+        return idx, frac
+
+    def _interpolar(self, valores, s):
+        """Interpolación lineal de una columna de la tabla en la distancia s"""
+        idx, frac = self._segmento(s)
+        return valores[idx] + frac * (valores[idx + 1] - valores[idx])
+
+    def posicion(self, s):
+        """Posición del centro de la curva a una distancia s del inicio"""
+        idx, frac = self._segmento(s)
+        frac = np.expand_dims(frac, -1)
+        return self.posiciones[idx] + frac * (self.posiciones[idx + 1] - self.posiciones[idx])
+
+    def pendiente(self, s):
+        """Pendiente Δy/Δx a una distancia s del inicio"""
+        return self._interpolar(self.pendientes, s)
+
+    def angulo(self, s):
+        """Seno y coseno del ángulo de la pendiente a una distancia s del inicio"""
+        idx, frac = self._segmento(s)
+        seno = self.seno[idx] + frac * (self.seno[idx + 1] - self.seno[idx])
+        coseno = self.coseno[idx] + frac * (self.coseno[idx + 1] - self.coseno[idx])
+        return seno, coseno
+
+class MuestrasCurva:
+    """Curva muestreada en t equiespaciado: rails, centro y longitud acumulada"""
+
+    def __init__(self, curve_func, z_offset=0.0, segmentos=100):
+        self.t = np.linspace(0.0, 1.0, segmentos + 1)
+        self.rail_left, self.rail_right = curve_func(self.t, z_offset=z_offset)
+        self.centro = (self.rail_left + self.rail_right) / 2.0
+        self.longitudes = np.concatenate(([0.0], np.cumsum(np.linalg.norm(np.diff(self.centro, axis=0), axis=1))))
+        self.longitud = self.longitudes[-1]  # Longitud total de la poligonal
+
+class CacheGeometria:
+    """Caché LRU de geometría de curvas compartida por rampas, esferas y escena"""
+
+    def __init__(self, capacidad=CAPACIDAD_CACHE_GEOMETRIA):
+        self.capacidad = capacidad  # Entradas máximas antes de expulsar la menos usada
+        self.version = 0  # Aumenta en cada invalidación (para cachés derivadas, p. ej. de render)
+        self.aciertos = 0
+        self.fallos = 0
+        self._entradas = OrderedDict()
+
+    def _obtener(self, tipo, curve_func, z_offset, resolucion, crear):
+        """Entrada de la caché; la clave incluye los puntos A y B vigentes"""
+        clave = (tipo, curve_func, tuple(A_METERS), tuple(B_METERS), float(z_offset), resolucion)
+        entrada = self._entradas.get(clave)
+        if entrada is not None:
+            self.aciertos += 1
+            self._entradas.move_to_end(clave)
+            return entrada
+
+        self.fallos += 1
+        entrada = crear()
+        # Arrays compartidos entre todos los consumidores: solo lectura
+        for valor in vars(entrada).values():
+            if isinstance(valor, np.ndarray):
+                valor.flags.writeable = False
+        self._entradas[clave] = entrada
+        while len(self._entradas) > self.capacidad:
+            self._entradas.popitem(last=False)
+        return entrada
+
+    def muestras(self, curve_func, z_offset=0.0, segmentos=100):
+        """Curva muestreada en segmentos+1 puntos de t equiespaciado (MuestrasCurva)"""
+        return self._obtener("muestras", curve_func, z_offset, segmentos,
+                             lambda: MuestrasCurva(curve_func, z_offset=z_offset, segmentos=segmentos))
+
+    def tabla_arco(self, curve_func, z_offset=0.0, resolucion=RESOLUCION_TABLA_ARCO):
+        """Tabla de longitud de arco compartida (TablaArco)"""
+        return self._obtener("tabla", curve_func, z_offset, resolucion,
+                             lambda: TablaArco(curve_func, z_offset=z_offset, resolucion=resolucion))
+
+    def invalidar(self, todo=False):
+        """Marcar un cambio de geometría (nueva version); con todo=True vaciar también las entradas"""
+        # Las entradas de otros puntos A/B no se sirven nunca con los puntos vigentes (forman parte
+        # de la clave), así que se conservan para barridos que vuelven a ellos hasta que las expulse la LRU
+        self.version += 1
+        if todo:
+            self._entradas.clear()
+
+# Caché única del proceso
+CACHE_GEOMETRIA = CacheGeometria()
 
 class RampaManager:
-    def __init__(self):
+    def __init__(self, verbose=True):
         # Inicializar con valores por defecto
+        self.verbose = verbose  # Mostrar mensajes por consola
         self.punto_A = A_METERS_DEFAULT.copy()
         self.punto_B = B_METERS_DEFAULT.copy()
         self.separacion = RAMP_SEPARATION_DEFAULT
+        self.rampa_optima = None  # Parámetros de la rampa óptima (None = desactivada)
         self.rampas = {}  # Diccionario para almacenar rampas
         self.generar_rampas()  # Generar rampas iniciales
 
@@ -83,12 +226,15 @@ class RampaManager:
         
         # Actualizar variables globales para las funciones de curva - ESTO ES CRÍTICO
         global A_METERS, B_METERS, RAMP_SEPARATION
+        if not (np.array_equal(A_METERS, self.punto_A) and np.array_equal(B_METERS, self.punto_B)):
+            CACHE_GEOMETRIA.invalidar()
         A_METERS = self.punto_A.copy()
         B_METERS = self.punto_B.copy()
         RAMP_SEPARATION = self.separacion
         
         self.generar_rampas()  # Regenerar rampas con nuevos puntos
-        print(f"Rampas generadas: A{self.punto_A} -> B{self.punto_B}, separación: {self.separacion}m")
+        if self.verbose:
+            print(f"Rampas generadas: A{self.punto_A} -> B{self.punto_B}, separación: {self.separacion}m")
 
     def generar_rampas(self):
         """Genera automáticamente las tres rampas en orden: Cicloide, Parábola, Recta"""
@@ -112,21 +258,46 @@ class RampaManager:
                 "color": (1.0, 1.0, 0.0)  # Amarillo
             }
         }
+        if self.rampa_optima is not None:
+            self.rampas["Óptima"] = self._generar_rampa_optima()
+
+    def activar_rampa_optima(self, mu=None, masa=1.0):
+        """Añadir como cuarta rampa la curva de tiempo mínimo para este rozamiento y masa"""
+        self.rampa_optima = {"mu": mu, "masa": masa}
+        self.generar_rampas()
+
+    def _generar_rampa_optima(self):
+        """Optimizar el perfil entre los puntos actuales y generar su rampa"""
+        from Optimizador import optimizar_perfil  # Optimizador depende de Esferas, que importa este módulo
+        
+        parametros = {k: v for k, v in self.rampa_optima.items() if v is not None}
+        perfil = optimizar_perfil(self.punto_A, self.punto_B, **parametros)
+        funcion = crear_curva_perfil(perfil.u, perfil.altura)
+        if self.verbose:
+            print(f"Rampa óptima: {perfil.tiempo:.3f} s de descenso ({perfil.iteraciones} iteraciones)")
+        return {
+            "geometria": self._generar_geometria_rampa(funcion, z_offset=2 * self.separacion),
+            "funcion": funcion,
+            "z_offset": 2 * self.separacion,
+            "color": (1.0, 0.4, 0.8),  # Rosa
+            "perfil": perfil
+        }
 
     def _generar_geometria_rampa(self, curve_func, z_offset=0.0, segments=100):
         """Genera la geometría completa de una rampa"""
-        vertices = []
-        # Generar puntos a lo largo de la curva
-        for i in range(segments + 1):
-            t = i / segments  # Parámetro de 0 a 1
-            left, right = curve_func(t, z_offset=z_offset)
-            vertices.append((left, right))  # Almacenar par de rails
-        return vertices
+        # Puntos de la curva compartidos con la escena (parámetro de 0 a 1)
+        muestras = CACHE_GEOMETRIA.muestras(curve_func, z_offset=z_offset, segmentos=segments)
+        return list(zip(muestras.rail_left, muestras.rail_right))  # Pares de rails
 
     def get_geometria_rampas(self):
         """Devuelve la geometría completa de cada rampa"""
         return self.rampas
 
+    def get_rampas_adicionales(self):
+        """Rampas además de las tres clásicas como (funcion, color, z_offset), para la escena"""
+        return [(rampa["funcion"], rampa["color"], rampa["z_offset"])
+                for nombre, rampa in self.rampas.items() if nombre not in ("Cicloide", "Parábola", "Recta")]
+
     def get_info_tapas(self):
         """Devuelve información necesaria para generar tapas sin huecos"""
         return {
@@ -141,7 +312,7 @@ class RampaManager:
 
     def get_curvas_para_esferas(self):
         """Devuelve la información necesaria para crear las esferas"""
-        return [
+        curvas = [
             {
                 "curve_func": self.rampas["Recta"]["funcion"],
                 "color": self.rampas["Recta"]["color"],
@@ -163,4 +334,17 @@ class RampaManager:
                 "z_offset": self.rampas["Cicloide"]["z_offset"],
                 "radius": 0.15
             }
-        ]
\ No newline at end of file
+        ]
+        if "Óptima" in self.rampas:
+            # Misma fricción y masa con las que se optimizó el perfil
+            perfil = self.rampas["Óptima"]["perfil"]
+            curvas.append({
+                "curve_func": self.rampas["Óptima"]["funcion"],
+                "color": self.rampas["Óptima"]["color"],
+                "name": "Óptima",
+                "z_offset": self.rampas["Óptima"]["z_offset"],
+                "radius": 0.15,
+                "rozamiento": perfil.mu,
+                "masa": perfil.masa
+            })
+        return curvas
\ No newline at end of file
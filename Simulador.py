@@ -0,0 +1,122 @@
+import argparse
+
+from Esferas import get_esferas
+from Fisica import MotorFisicoLote
+from Rampas import RampaManager
+
+# Configuración por defecto de una simulación sin ventana
+CONFIG_SIMULACION_DEFAULT = {
+    "punto_A": (1.0, 5.0, 0.0),  # Punto inicial alto de las rampas
+    "separacion": None,  # Separación entre rampas (None = valor por defecto)
+    "dt": 1.0 / 240.0,  # Paso de tiempo simulado en segundos
+    "tiempo_max": 60.0,  # Límite de tiempo simulado
+    "retardo_plataforma": 2.0,  # Segundos hasta que la plataforma empieza a moverse
+    "velocidad_plataforma": 2.0,  # Velocidad de retroceso de la plataforma
+    "esferas": None,  # Configuración de esferas (None = una por rampa)
+    "rampa_optima": False,  # Añadir la rampa de tiempo mínimo (Optimizador.py) como cuarta curva
+    "integrador": None,  # None = motor por lotes (Euler); "euler"/"rk4"/"rk45" = Esfera.update por bola
+    "verbose": False,  # Mensajes de depuración por consola
+}
+
+def simular_esferas(config=None):
+    """Simulación completa sin pygame ni OpenGL; devuelve las esferas con su estado final"""
+    cfg = dict(CONFIG_SIMULACION_DEFAULT)
+    if config is not None:
+        cfg.update(config)
+    verbose = cfg["verbose"]
+    dt = cfg["dt"]
+
+    # Rampas y esferas igual que en main.py, pero sin escena
+    rampa_manager = RampaManager(verbose=verbose)
+    rampa_manager.set_puntos(cfg["punto_A"], separacion=cfg["separacion"])
+    if cfg["rampa_optima"]:
+        rampa_manager.activar_rampa_optima()
+    config_esferas = cfg["esferas"]
+    if config_esferas is None:
+        config_esferas = rampa_manager.get_curvas_para_esferas()
+    config_esferas = [dict(c, verbose=verbose) for c in config_esferas]
+    if cfg["integrador"] is not None:
+        config_esferas = [dict(c, integrador=cfg["integrador"]) for c in config_esferas]
+    esferas = get_esferas(config_esferas)
+    for esfera in esferas:
+        esfera.initialize_position()
+    motor = MotorFisicoLote(esferas, verbose=verbose) if cfg["integrador"] is None else None
+
+    # Plataforma: espera, retrocede 1.5 m y libera las bolas en ese instante exacto
+    tiempo_liberacion = cfg["retardo_plataforma"] + 1.5 / cfg["velocidad_plataforma"]
+    liberadas = False
+
+    n_pasos = int(round(cfg["tiempo_max"] / dt))
+    for paso in range(1, n_pasos + 1):
+        current_time = paso * dt
+        if current_time < tiempo_liberacion:
+            continue
+
+        # El paso de la liberación solo integra el tiempo transcurrido desde ella
+        dt_paso = dt
+        if not liberadas:
+            liberadas = True
+            dt_paso = current_time - tiempo_liberacion
+            if motor is None:
+                for esfera in esferas:
+                    esfera.release_from_platform()
+            else:
+                motor.liberar()
+
+        if motor is None:
+            # Integrador elegido: cada esfera integra su propio paso con detección de choques
+            for esfera in esferas:
+                esfera.update(dt_paso, current_time)
+            if all(esfera.finished for esfera in esferas):
+                break
+        else:
+            motor.paso(dt_paso, current_time)
+            if motor.finished.all():
+                break
+
+    if motor is not None:
+        motor.sincronizar()
+    return esferas
+
+def simular_sin_ventana(config=None):
+    """Simulación completa sin pygame ni OpenGL, a dt fijo y tan rápido como permita la CPU"""
+    # Devuelve {nombre_esfera: {"primer_impacto": s, "parada_final": s}} (None si no ocurrió)
+    esferas = simular_esferas(config)
+    return {
+        esfera.name: {
+            "primer_impacto": esfera.first_impact_time,
+            "parada_final": esfera.final_stop_time,
+        }
+        for esfera in esferas
+    }
+
+def main():
+    """Punto de entrada por línea de comandos"""
+    parser = argparse.ArgumentParser(description="Simulación braquistócrona sin ventana")
+    parser.add_argument("--x", type=float, default=1.0, help="Coordenada X del punto A")
+    parser.add_argument("--y", type=float, default=5.0, help="Altura del punto A")
+    parser.add_argument("--dt", type=float, default=CONFIG_SIMULACION_DEFAULT["dt"], help="Paso de tiempo simulado")
+    parser.add_argument("--tiempo-max", type=float, default=CONFIG_SIMULACION_DEFAULT["tiempo_max"])
+    parser.add_argument("--integrador", choices=["euler", "rk4", "rk45"], default=None,
+                        help="Integrar cada esfera con este esquema en lugar del motor por lotes")
+    parser.add_argument("--optima", action="store_true", help="Añadir la rampa óptima como cuarta curva")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    resultados = simular_sin_ventana({
+        "punto_A": (args.x, args.y, 0.0),
+        "dt": args.dt,
+        "tiempo_max": args.tiempo_max,
+        "integrador": args.integrador,
+        "rampa_optima": args.optima,
+        "verbose": args.verbose,
+    })
+    for nombre, tiempos in resultados.items():
+        impacto = tiempos["primer_impacto"]
+        parada = tiempos["parada_final"]
+        print(f"{nombre}: primer impacto "
+              f"{'-' if impacto is None else f'{impacto:.3f} s'}, "
+              f"parada final {'-' if parada is None else f'{parada:.3f} s'}")
+
+if __name__ == "__main__":
+    main()
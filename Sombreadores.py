@@ -0,0 +1,215 @@
+import ctypes
+
+import numpy as np
+from OpenGL.GL import *
+
+# Posiciones de GL_LIGHT0 y GL_LIGHT1 (configurar_opengl en Escena.py); se fijan con la modelview
+# identidad, así que están en coordenadas de ojo y el shader las usa tal cual
+POSICIONES_LUCES = ((5.0, 15.0, 5.0, 1.0), (-5.0, 10.0, -5.0, 1.0))
+
+# Sondas de reflejo enlazadas a la vez (unidades de textura 1..MAX_SONDAS; la 0 es el entorno estático)
+MAX_SONDAS = 8
+
+VERTICES_GLSL = """
+#version 330 core
+layout(location = 0) in vec3 vertice;       // Esfera unitaria: la posición es también la normal
+layout(location = 1) in vec4 centro_radio;  // Por instancia: centro y radio
+layout(location = 2) in vec4 color_sonda;   // Por instancia: color y sonda (-1 = entorno estático)
+
+uniform mat4 vista;
+uniform mat4 proyeccion;
+
+out vec3 posicion_ojo;
+out vec3 normal_ojo;
+out vec3 color;
+flat out int sonda;
+
+void main() {
+    vec4 ojo = vista * vec4(centro_radio.xyz + centro_radio.w * vertice, 1.0);
+    posicion_ojo = ojo.xyz;
+    normal_ojo = mat3(vista) * vertice;
+    color = color_sonda.rgb;
+    sonda = int(floor(color_sonda.a + 0.5));
+    gl_Position = proyeccion * ojo;
+}
+"""
+
+FRAGMENTOS_GLSL = """
+#version 330 core
+in vec3 posicion_ojo;
+in vec3 normal_ojo;
+in vec3 color;
+flat in int sonda;
+
+uniform mat4 vista;
+uniform vec3 luces[2];  // Posiciones de las dos luces en coordenadas de ojo
+uniform samplerCube entorno;
+uniform samplerCube sondas[MAX_SONDAS];
+
+out vec4 fragmento;
+
+vec3 reflejo(vec3 r) {
+    // Los índices de un array de samplers deben ser constantes en GLSL 3.30
+SELECCION_SONDA    return textureLod(entorno, r, 0.0).rgb;
+}
+
+void main() {
+    vec3 n = normalize(normal_ojo);
+    vec3 l0 = normalize(luces[0] - posicion_ojo);
+    vec3 l1 = normalize(luces[1] - posicion_ojo);
+    float d0 = max(dot(n, l0), 0.0);
+    float d1 = max(dot(n, l1), 0.0);
+    float s0 = d0 > 0.0 ? pow(max(dot(n, normalize(l0 + vec3(0.0, 0.0, 1.0))), 0.0), 50.0) : 0.0;
+    float s1 = d1 > 0.0 ? pow(max(dot(n, normalize(l1 + vec3(0.0, 0.0, 1.0))), 0.0), 50.0) : 0.0;
+
+    // Mismo modelo que la tubería fija: ambiente global 0.2, luz 0 (ambiente 0.6, difusa 1.2),
+    // luz 1 (difusa 1.0), especular 0.3 con brillo 50 y el reflejo modulando el resultado
+    vec3 luz = color * (0.2 + 0.6 + 1.2 * d0 + 1.0 * d1) + 0.3 * (s0 + s1);
+    vec3 r = transpose(mat3(vista)) * reflect(normalize(posicion_ojo), n);  // Dirección en coordenadas de mundo
+    fragmento = vec4(min(luz, vec3(1.0)) * reflejo(r), 1.0);
+}
+"""
+
+def _texto(registro):
+    """Registro de compilación o enlace de OpenGL como texto"""
+    return registro.decode(errors="replace") if isinstance(registro, bytes) else str(registro)
+
+def _compilar(tipo, fuente):
+    """Compilar un shader; RuntimeError con el registro del compilador si falla"""
+    shader = glCreateShader(tipo)
+    glShaderSource(shader, fuente)
+    glCompileShader(shader)
+    if not glGetShaderiv(shader, GL_COMPILE_STATUS):
+        registro = glGetShaderInfoLog(shader)
+        glDeleteShader(shader)
+        raise RuntimeError(f"Error al compilar el shader: {_texto(registro)}")
+    return shader
+
+def compilar_programa(vertices, fragmentos):
+    """Programa GLSL enlazado a partir de las fuentes de vértices y fragmentos"""
+    shaders = [_compilar(GL_VERTEX_SHADER, vertices), _compilar(GL_FRAGMENT_SHADER, fragmentos)]
+    programa = glCreateProgram()
+    for shader in shaders:
+        glAttachShader(programa, shader)
+    glLinkProgram(programa)
+    for shader in shaders:
+        glDetachShader(programa, shader)
+        glDeleteShader(shader)
+    if not glGetProgramiv(programa, GL_LINK_STATUS):
+        registro = glGetProgramInfoLog(programa)
+        glDeleteProgram(programa)
+        raise RuntimeError(f"Error al enlazar el programa: {_texto(registro)}")
+    return programa
+
+def fuente_fragmentos(max_sondas=MAX_SONDAS):
+    """Shader de fragmentos con la selección de sonda desplegada para max_sondas"""
+    seleccion = "".join(f"    if (sonda == {i}) return textureLod(sondas[{i}], r, 0.0).rgb;\n" for i in range(max_sondas))
+    return FRAGMENTOS_GLSL.replace("MAX_SONDAS", str(max_sondas)).replace("SELECCION_SONDA", seleccion)
+
+class BolasInstanciadas:
+    """Todas las bolas en una sola llamada instanciada con GLSL (color, radio y sonda por instancia)"""
+    STRIDE = 8 * 4  # Centro (3), radio (1), color (3) y sonda (1) en float32
+
+    def __init__(self, mallas_esfera, max_sondas=MAX_SONDAS, luces=POSICIONES_LUCES):
+        # Requiere OpenGL 3.3 (instanciado, VAO, divisores); si falta algo se lanza RuntimeError
+        if not (bool(glDrawElementsInstanced) and bool(glVertexAttribDivisor) and bool(glGenVertexArrays)):
+            raise RuntimeError("El contexto no soporta dibujo instanciado (se necesita OpenGL 3.3)")
+        self.mallas_esfera = mallas_esfera  # MallasEsfera cuyos buffers se reutilizan
+        self.max_sondas = max_sondas
+        self.luces = np.array([luz[:3] for luz in luces], dtype=np.float32)  # Posiciones en coordenadas de ojo
+        self.programa = compilar_programa(VERTICES_GLSL, fuente_fragmentos(max_sondas))
+        self.ubicaciones = {nombre: glGetUniformLocation(self.programa, nombre)
+                            for nombre in ("vista", "proyeccion", "luces")}
+        glUseProgram(self.programa)
+        glUniform1i(glGetUniformLocation(self.programa, "entorno"), 0)
+        glUniform1iv(glGetUniformLocation(self.programa, "sondas"), max_sondas,
+                     np.arange(1, max_sondas + 1, dtype=np.int32))
+        glUseProgram(0)
+        self.instancias = glGenBuffers(1)  # Atributos por instancia, reescritos cada frame
+        self.vaos = {}  # VAO por nivel de detalle
+
+    def _vao(self, nivel):
+        """VAO con la malla del nivel (buffers de MallaEsfera) y los atributos por instancia"""
+        vao = self.vaos.get(nivel)
+        if vao is not None:
+            return vao
+        malla = self.mallas_esfera.malla(nivel)
+        if malla.vbo is None:
+            raise RuntimeError("Las mallas de esfera no están en buffers de la GPU")
+        vao = glGenVertexArrays(1)
+        glBindVertexArray(vao)
+        glBindBuffer(GL_ARRAY_BUFFER, malla.vbo)
+        glEnableVertexAttribArray(0)
+        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 0, ctypes.c_void_p(0))
+        glBindBuffer(GL_ARRAY_BUFFER, self.instancias)
+        for ubicacion in (1, 2):
+            glEnableVertexAttribArray(ubicacion)
+            glVertexAttribPointer(ubicacion, 4, GL_FLOAT, GL_FALSE, self.STRIDE, ctypes.c_void_p(16 * (ubicacion - 1)))
+            glVertexAttribDivisor(ubicacion, 1)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, malla.ibo)
+        glBindVertexArray(0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+        self.vaos[nivel] = vao
+        return vao
+
+    def dibujar(self, balls, radios, reflejos, entorno=None, camara=None):
+        """Dibujar las bolas (radios: radio en pantalla por id(ball); reflejos: ProgramadorReflejos; camara: (vista, proyección))"""
+        if not balls:
+            return
+        # Las bolas más grandes en pantalla usan su sonda; el resto, el entorno estático
+        orden = sorted(range(len(balls)), key=lambda i: -radios.get(id(balls[i]), np.inf))
+        con_sonda = orden[:self.max_sondas]
+        datos = np.empty((len(balls), 8), dtype=np.float32)
+        for i, ball in enumerate(balls):
+            datos[i, :3] = ball.get_render_position()
+            datos[i, 3] = ball.radius
+            datos[i, 4:7] = ball.color
+            datos[i, 7] = -1.0
+        for unidad, i in enumerate(con_sonda):
+            datos[i, 7] = unidad
+        glBindBuffer(GL_ARRAY_BUFFER, self.instancias)
+        glBufferData(GL_ARRAY_BUFFER, datos.nbytes, datos, GL_STREAM_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+        # Un único nivel de detalle para todas: el de la bola más grande en pantalla
+        nivel = self.mallas_esfera.nivel_para(max(radios.get(id(ball), np.inf) for ball in balls))
+        vao = self._vao(nivel)
+
+        glUseProgram(self.programa)
+        if camara is not None:
+            # Matrices calculadas en Python (fila mayor): válido también en un contexto core
+            vista, proyeccion = camara
+            glUniformMatrix4fv(self.ubicaciones["vista"], 1, GL_TRUE, np.asarray(vista, dtype=np.float32))
+            glUniformMatrix4fv(self.ubicaciones["proyeccion"], 1, GL_TRUE, np.asarray(proyeccion, dtype=np.float32))
+        else:
+            # Sin cámara explícita se leen de la tubería fija (solo en un contexto de compatibilidad)
+            glUniformMatrix4fv(self.ubicaciones["vista"], 1, GL_FALSE, glGetFloatv(GL_MODELVIEW_MATRIX))
+            glUniformMatrix4fv(self.ubicaciones["proyeccion"], 1, GL_FALSE, glGetFloatv(GL_PROJECTION_MATRIX))
+        glUniform3fv(self.ubicaciones["luces"], 2, self.luces)
+        glActiveTexture(GL_TEXTURE0)
+        glBindTexture(GL_TEXTURE_CUBE_MAP, entorno.cube_map if entorno is not None else 0)
+        for unidad, i in enumerate(con_sonda):
+            glActiveTexture(GL_TEXTURE1 + unidad)
+            glBindTexture(GL_TEXTURE_CUBE_MAP, reflejos.sonda(balls[i]).cube_map)
+
+        glBindVertexArray(vao)
+        glDrawElementsInstanced(GL_TRIANGLES, len(self.mallas_esfera.malla(nivel).indices), GL_UNSIGNED_INT,
+                                ctypes.c_void_p(0), len(balls))
+        glBindVertexArray(0)
+
+        # Restaurar el estado que espera la tubería fija
+        for unidad in range(len(con_sonda)):
+            glActiveTexture(GL_TEXTURE1 + unidad)
+            glBindTexture(GL_TEXTURE_CUBE_MAP, 0)
+        glActiveTexture(GL_TEXTURE0)
+        glBindTexture(GL_TEXTURE_CUBE_MAP, 0)
+        glUseProgram(0)
+
+    def liberar(self):
+        """Liberar los recursos de la GPU"""
+        if self.vaos:
+            glDeleteVertexArrays(len(self.vaos), list(self.vaos.values()))
+        glDeleteBuffers(1, [self.instancias])
+        glDeleteProgram(self.programa)
+        self.vaos = {}
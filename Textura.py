@@ -1,294 +1,596 @@
+import hashlib
+import os
+import re
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+
 import numpy as np
 from OpenGL.GL import *
 
-def load_ppm_texture(filename):
-    """Cargar textura desde archivo PPM"""
+# Caché en disco de las texturas procedurales (compartible entre procesos)
+DIRECTORIO_CACHE_TEXTURAS = os.environ.get(
+    "BRAQUISTOCRONA_CACHE_TEXTURAS", os.path.join(os.path.expanduser("~"), ".cache", "braquistocrona", "texturas"))
+VERSION_GENERADORES = 1  # Aumentar al cambiar un generador para no servir imágenes antiguas
+SEMILLA_TEXTURAS = 0  # Semilla por defecto: la misma textura en cada arranque (y reutilizable de la caché)
+# Memoria de GPU (estimada) que pueden ocupar las texturas del gestor antes de expulsar las que no se usan
+PRESUPUESTO_TEXTURAS = int(os.environ.get("BRAQUISTOCRONA_PRESUPUESTO_TEXTURAS", 256 * 2 ** 20))
+# Carga en segundo plano: hilos de decodificación/generación y bytes subidos a la GPU por frame
+HILOS_CARGA_TEXTURAS = 2
+BYTES_SUBIDA_POR_FRAME = 2 ** 20
+COLOR_PROVISIONAL = (0.5, 0.5, 0.5)  # Color del texel provisional mientras llega la imagen
+
+# Configuración de cada material de las rampas (opciones del menú de seleccionar_textura)
+TEXTURAS_RAMPA = {
+    1: {
+        "archivo": "hierro.ppm",
+        "tipo": "Hierro",
+        "friccion": 0.008,
+        "color_base": (0.7, 0.7, 0.8),
+        "reflectividad": 0.8
+    },
+    2: {
+        "archivo": "madera.ppm",
+        "tipo": "Madera",
+        "friccion": 0.012,
+        "color_base": (0.6, 0.4, 0.2),
+        "reflectividad": 0.3
+    },
+    3: {
+        "archivo": "plastico.ppm",
+        "tipo": "Plástico",
+        "friccion": 0.005,
+        "color_base": (0.8, 0.8, 0.9),
+        "reflectividad": 0.6
+    },
+}
+
+# Lado máximo de las texturas cargadas de archivo (las mayores se reducen al cargarlas)
+MAX_LADO_TEXTURA = 1024
+
+# Token de la cabecera PNM: espacios y comentarios (# hasta fin de línea) seguidos del valor
+_TOKEN_PNM = re.compile(rb"(?:\s|#[^\r\n]*[\r\n])*([^\s#]+)")
+
+def _cabecera_pnm(inicio):
+    """(formato, ancho, alto, maxval, desplazamiento de los píxeles) a partir de los primeros bytes del archivo"""
+    tokens, pos = [], 0
+    for _ in range(4):
+        m = _TOKEN_PNM.match(inicio, pos)
+        if m is None:
+            raise ValueError("Cabecera PNM incompleta")
+        tokens.append(m.group(1))
+        pos = m.end()
+    formato = tokens[0]
+    if formato not in (b"P3", b"P5", b"P6"):
+        raise ValueError(f"Formato PNM no soportado: {formato!r}")
+    width, height, maxval = map(int, tokens[1:])
+    if width <= 0 or height <= 0 or not 0 < maxval < 65536:
+        raise ValueError(f"Cabecera PNM inválida: {width}x{height}, maxval {maxval}")
+    # Un único carácter de espacio separa maxval de los píxeles
+    return formato, width, height, maxval, pos + 1
+
+def leer_ppm(filename):
+    """Imagen RGB uint8 (height, width, 3) de un PPM/PGM P3, P5 o P6 de 8 o 16 bits"""
+    # P5/P6 de 8 bits: vista de NumPy sobre el archivo mapeado en memoria, sin copiar los píxeles
+    mapa = np.memmap(filename, dtype=np.uint8, mode="r")
+    formato, width, height, maxval, inicio = _cabecera_pnm(bytes(mapa[:4096]))
+    canales = 1 if formato == b"P5" else 3
+    n = height * width * canales
+    if formato == b"P3":
+        texto = re.sub(rb"#[^\r\n]*", b" ", bytes(mapa[inicio - 1:]))
+        valores = np.fromstring(texto, dtype=np.int64, sep=" ")
+        if valores.size < n:
+            raise ValueError(f"PPM truncado: {valores.size} de {n} valores")
+        imagen = valores[:n].reshape(height, width, canales)
+    else:
+        dtype = np.dtype(np.uint8) if maxval < 256 else np.dtype(">u2")  # 16 bits: big-endian
+        if mapa.size < inicio + n * dtype.itemsize:
+            raise ValueError(f"PNM truncado: {mapa.size - inicio} de {n * dtype.itemsize} bytes")
+        imagen = np.ndarray((height, width, canales), dtype=dtype, buffer=mapa, offset=inicio)
+
+    # Normalizar a 8 bits con redondeo cuando maxval no es 255
+    if maxval != 255 or imagen.dtype != np.uint8:
+        imagen = ((imagen.astype(np.uint32) * 255 + maxval // 2) // maxval).astype(np.uint8)
+    if canales == 1:
+        imagen = np.repeat(imagen, 3, axis=2)
+    return imagen
+
+def _remuestrear_eje(imagen, n, eje):
+    """Remuestreo a n píxeles en un eje por promedio de áreas (sirve para reducir y ampliar)"""
+    m = imagen.shape[eje]
+    # Cada píxel nuevo cubre [bordes[k], bordes[k+1]] y solapa como mucho ceil(m/n)+1 píxeles originales
+    bordes = np.linspace(0.0, m, n + 1)[:, None]
+    j = np.floor(bordes[:-1]).astype(int) + np.arange(int(np.ceil(m / n)) + 1)
+    pesos = np.maximum(np.minimum(bordes[1:], j + 1) - np.maximum(bordes[:-1], j), 0.0) * (n / m)
+    j = np.minimum(j, m - 1)  # Los índices fuera de la imagen tienen peso 0
+    forma = [1] * imagen.ndim
+    forma[eje] = n
+    salida = 0.0
+    for t in range(j.shape[1]):
+        salida = salida + np.take(imagen, j[:, t], axis=eje) * pesos[:, t].astype(np.float32).reshape(forma)
+    return salida
+
+def redimensionar(imagen, width, height):
+    """Imagen RGB uint8 remuestreada a width×height por promedio de áreas"""
+    if imagen.shape[:2] == (height, width):
+        return imagen
+    salida = _remuestrear_eje(_remuestrear_eje(imagen, height, 0), width, 1)
+    return np.clip(np.rint(salida), 0, 255).astype(np.uint8)
+
+def _reducir_mitad(imagen):
+    """Siguiente nivel de mipmap: promedio de bloques 2×2 (1×2 o 2×1 si un lado ya es 1)"""
+    height, width = imagen.shape[:2]
+    fy, fx = (2 if height > 1 else 1), (2 if width > 1 else 1)
+    suma = np.full((height // fy, width // fx, 3), fy * fx // 2, dtype=np.uint16)  # Redondeo
+    for dy in range(fy):
+        for dx in range(fx):
+            suma += imagen[dy::fy, dx::fx]
+    return (suma // (fy * fx)).astype(np.uint8)
+
+def _potencia_de_dos(n, max_lado):
+    """Potencia de dos más cercana a n (en escala logarítmica) que no supere max_lado"""
+    return min(2 ** int(round(np.log2(n))), 2 ** int(np.log2(max_lado)))
+
+def cadena_mip(imagen, max_lado=MAX_LADO_TEXTURA, potencia_de_dos=True, mipmaps=True):
+    """Niveles de la textura (nivel 0 primero) ajustados a potencia de dos y a max_lado"""
+    height, width = imagen.shape[:2]
+    if potencia_de_dos:
+        width, height = _potencia_de_dos(width, max_lado), _potencia_de_dos(height, max_lado)
+    else:
+        # Sin potencia de dos se conserva la proporción
+        escala = min(1.0, max_lado / max(width, height))
+        width, height = max(1, round(width * escala)), max(1, round(height * escala))
+    # Si no hay que remuestrear, el nivel 0 es la propia vista del archivo mapeado
+    niveles = [redimensionar(imagen, width, height)]
+    while mipmaps and (width > 1 or height > 1):
+        if width % 2 and width > 1 or height % 2 and height > 1:
+            # Lados impares (sin potencia de dos): remuestreo general
+            width, height = max(1, width // 2), max(1, height // 2)
+            niveles.append(redimensionar(niveles[-1], width, height))
+        else:
+            niveles.append(_reducir_mitad(niveles[-1]))
+            height, width = niveles[-1].shape[:2]
+    return niveles
+
+def load_ppm_texture(filename, max_lado=MAX_LADO_TEXTURA, potencia_de_dos=True, mipmaps=True):
+    """Cargar textura desde archivo PPM (P3/P5/P6, 8 o 16 bits) con su cadena de mipmaps"""
     try:
-        with open(filename, 'rb') as f:
-            header = f.readline().strip()
-            if header != b'P6':
-                return None
-            
-            dimensions = f.readline().strip()
-            while dimensions.startswith(b'#'):
-                dimensions = f.readline().strip()
-            
-            width, height = map(int, dimensions.split())
-            max_val = f.readline().strip()
-            data = f.read(width * height * 3)
-            
-            expected_size = width * height * 3
-            if len(data) != expected_size:
-                return None
-            
-        texture_id = glGenTextures(1)
-        glBindTexture(GL_TEXTURE_2D, texture_id)
-        
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_REPEAT)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT)
-        
-        try:
-            glTexImage2D(GL_TEXTURE_2D, 0, GL_RGB, width, height, 0, 
-                        GL_RGB, GL_UNSIGNED_BYTE, data)
-        except Exception as e:
-            try:
-                glTexImage2D(GL_TEXTURE_2D, 0, GL_RGB, width, height, 0, 
-                            GL_BGR, GL_UNSIGNED_BYTE, data)
-            except Exception as e2:
-                return None
-        
-        return texture_id
-        
+        niveles = cadena_mip(leer_ppm(filename), max_lado, potencia_de_dos, mipmaps)
+        return _subir_textura(niveles)
     except Exception as e:
         return None
 
-def create_improved_wood_texture():
-    """Crear textura procedural de madera MEJORADA"""
-    texture_id = glGenTextures(1)
-    glBindTexture(GL_TEXTURE_2D, texture_id)
+def _rejilla(width, height):
+    """Índices de fila (y) y columna (x) de la imagen, preparados para operar sobre ella entera"""
+    return np.arange(height)[:, None], np.arange(width)[None, :]
+
+def generar_madera(rng=None, width=256, height=256):
+    """Imagen RGB de madera (anillos, veta y ruido) como array uint8 de forma (height, width, 3)"""
+    # rng: np.random.Generator o semilla (None = no reproducible)
+    rng = np.random.default_rng(rng)
+    y, x = _rejilla(width, height)
+    distance = np.hypot((x - width / 2) * 0.02, (y - height / 2) * 0.02)
     
-    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
-    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
-    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_REPEAT)
-    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT)
+    base_r = 150 + np.trunc(30 * np.sin(distance * 15 + x * 0.1))
+    base_g = 100 + np.trunc(20 * np.sin(distance * 12 + y * 0.08))
+    base_b = 50 + np.trunc(15 * np.sin(distance * 10))
     
-    width, height = 256, 256
-    texture_data = np.zeros((height, width, 3), dtype=np.uint8)
+    grain = np.sin(x * 0.05) * np.cos(y * 0.03) * 25
+    noise = rng.normal(0, 5, (height, width))
     
-    for y in range(height):
-        for x in range(width):
-            dx = (x - width / 2) * 0.02
-            dy = (y - height / 2) * 0.02
-            distance = np.sqrt(dx*dx + dy*dy)
-            
-            base_r = 150 + int(30 * np.sin(distance * 15 + x * 0.1))
-            base_g = 100 + int(20 * np.sin(distance * 12 + y * 0.08))
-            base_b = 50 + int(15 * np.sin(distance * 10))
-            
-            grain = np.sin(x * 0.05) * np.cos(y * 0.03) * 25
-            noise = np.random.normal(0, 5)
-            
-            r = max(80, min(200, base_r + grain + noise))
-            g = max(50, min(150, base_g + grain * 0.7 + noise * 0.8))
-            b = max(20, min(100, base_b + grain * 0.5 + noise * 0.6))
-            
-            texture_data[y, x] = [r, g, b]
+    texture_data = np.empty((height, width, 3), dtype=np.uint8)
+    texture_data[..., 0] = np.clip(base_r + grain + noise, 80, 200)
+    texture_data[..., 1] = np.clip(base_g + grain * 0.7 + noise * 0.8, 50, 150)
+    texture_data[..., 2] = np.clip(base_b + grain * 0.5 + noise * 0.6, 20, 100)
+    return texture_data
+
+def generar_hierro(rng=None, width=512, height=512):
+    """Imagen RGB de hierro (veta cruzada, óxido y brillo metálico) como array uint8"""
+    rng = np.random.default_rng(rng)
+    y, x = _rejilla(width, height)
+    base_value = 100 + rng.normal(0, 8, (height, width))
+    noise1 = rng.normal(0, 6, (height, width))
+    noise2 = rng.normal(0, 4, (height, width))
     
-    glTexImage2D(GL_TEXTURE_2D, 0, GL_RGB, width, height, 0, 
-                GL_RGB, GL_UNSIGNED_BYTE, texture_data)
+    grain_x = np.sin(x * 0.02) * np.cos(y * 0.015) * 12
+    grain_y = np.sin(y * 0.025) * np.cos(x * 0.01) * 10
     
-    return texture_id
-
-def create_improved_iron_texture():
-    """Crear textura procedural de hierro MEJORADA"""
-    texture_id = glGenTextures(1)
-    glBindTexture(GL_TEXTURE_2D, texture_id)
+    # Manchas de óxido en los píxeles con (x·y) mod 200 < 15
+    rust = np.where((x * y) % 200 < 15, rng.normal(8, 3, (height, width)), 0.0)
     
-    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR_MIPMAP_LINEAR)
-    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
-    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_REPEAT)
-    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT)
+    metallic = np.sin(x * 0.1 + y * 0.05) * 5
+    r = np.clip(base_value + grain_x + noise1 - rust, 70, 130) + metallic
+    g = np.clip(base_value + grain_y + noise1 * 0.9 - rust * 0.6, 80, 140) + metallic
+    b = np.clip(base_value + (grain_x + grain_y) * 0.5 + noise2 - rust * 0.4, 90, 150) + metallic
     
-    width, height = 512, 512
-    texture_data = np.zeros((height, width, 3), dtype=np.uint8)
+    texture_data = np.empty((height, width, 3), dtype=np.uint8)
+    texture_data[..., 0] = np.minimum(r, 150)
+    texture_data[..., 1] = np.minimum(g, 150)
+    texture_data[..., 2] = np.minimum(b, 160)
+    return texture_data
+
+def generar_plastico(rng=None, width=256, height=256):
+    """Imagen RGB de plástico (azul grisáceo claro con grano suave y brillos) como array uint8"""
+    rng = np.random.default_rng(rng)
+    y, x = _rejilla(width, height)
+    base_color = [180, 190, 210]
     
-    for y in range(height):
-        for x in range(width):
-            base_value = 100 + np.random.normal(0, 8)
-            noise1 = np.random.normal(0, 6)
-            noise2 = np.random.normal(0, 4)
-            
-            grain_x = np.sin(x * 0.02) * np.cos(y * 0.015) * 12
-            grain_y = np.sin(y * 0.025) * np.cos(x * 0.01) * 10
-            
-            rust = 0
-            if (x * y) % 200 < 15:
-                rust = np.random.normal(8, 3)
-            
-            r = max(70, min(130, base_value + grain_x + noise1 - rust))
-            g = max(80, min(140, base_value + grain_y + noise1 * 0.9 - rust * 0.6))
-            b = max(90, min(150, base_value + (grain_x + grain_y) * 0.5 + noise2 - rust * 0.4))
-            
-            metallic = np.sin(x * 0.1 + y * 0.05) * 5
-            r = min(150, r + metallic)
-            g = min(150, g + metallic)
-            b = min(160, b + metallic)
-            
-            texture_data[y, x] = [int(r), int(g), int(b)]
+    # Patrón sutil para plástico con ruido y grano
+    noise = rng.normal(0, 6, (height, width))
+    grain = np.sin(x * 0.05) * np.cos(y * 0.05) * 8
+    r = np.clip(base_color[0] + grain + noise, 150, 220)
+    g = np.clip(base_color[1] + grain * 0.8 + noise * 0.9, 160, 230)
+    b = np.clip(base_color[2] + grain * 0.6 + noise * 0.8, 170, 240)
     
-    glTexImage2D(GL_TEXTURE_2D, 0, GL_RGB, width, height, 0, 
-                GL_RGB, GL_UNSIGNED_BYTE, texture_data)
-    glGenerateMipmap(GL_TEXTURE_2D)
-    import numpy as np
-from OpenGL.GL import *
+    # Brillo plástico sutil en diagonales
+    brillo = np.where((x + y) % 80 < 3, 40, 0)
+    texture_data = np.empty((height, width, 3), dtype=np.uint8)
+    texture_data[..., 0] = np.minimum(r + brillo, 255)
+    texture_data[..., 1] = np.minimum(g + brillo, 255)
+    texture_data[..., 2] = np.minimum(b + brillo, 255)
+    return texture_data
 
-def load_ppm_texture(filename):
-    """Cargar textura desde archivo PPM"""
-    try:
-        with open(filename, 'rb') as f:
-            header = f.readline().strip()
-            if header != b'P6':
-                return None
-            
-            dimensions = f.readline().strip()
-            while dimensions.startswith(b'#'):
-                dimensions = f.readline().strip()
-            
-            width, height = map(int, dimensions.split())
-            max_val = f.readline().strip()
-            data = f.read(width * height * 3)
-            
-            expected_size = width * height * 3
-            if len(data) != expected_size:
-                return None
-            
-        texture_id = glGenTextures(1)
-        glBindTexture(GL_TEXTURE_2D, texture_id)
-        
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_REPEAT)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT)
-        
+class CacheTexturas:
+    """Imágenes procedurales guardadas como .npy por generador, tamaño, parámetros y semilla"""
+
+    def __init__(self, directorio=DIRECTORIO_CACHE_TEXTURAS):
+        self.directorio = directorio  # None = sin caché (se genera siempre)
+        self.aciertos = 0
+        self.fallos = 0
+
+    def archivo(self, nombre, semilla, width, height, **parametros):
+        """Ruta de la entrada; los parámetros y la versión de los generadores van en un resumen"""
+        firma = repr((VERSION_GENERADORES, sorted(parametros.items()))).encode()
+        resumen = hashlib.sha1(firma).hexdigest()[:12]
+        return os.path.join(self.directorio, f"{nombre}_{width}x{height}_s{semilla}_{resumen}.npy")
+
+    def obtener(self, nombre, generador, semilla, width, height, **parametros):
+        """Imagen de la caché (mapeada en memoria, solo lectura) o generada y guardada"""
+        # Sin semilla la imagen no es reproducible y no tiene sentido guardarla
+        if self.directorio is None or semilla is None:
+            return generador(semilla, width, height, **parametros)
+        archivo = self.archivo(nombre, semilla, width, height, **parametros)
         try:
-            glTexImage2D(GL_TEXTURE_2D, 0, GL_RGB, width, height, 0, 
-                        GL_RGB, GL_UNSIGNED_BYTE, data)
-        except Exception as e:
-            try:
-                glTexImage2D(GL_TEXTURE_2D, 0, GL_RGB, width, height, 0, 
-                            GL_BGR, GL_UNSIGNED_BYTE, data)
-            except Exception as e2:
-                return None
-        
-        return texture_id
-        
-    except Exception as e:
-        return None
+            datos = np.load(archivo, mmap_mode="r")
+            if datos.shape == (height, width, 3) and datos.dtype == np.uint8:
+                self.aciertos += 1
+                return datos
+        except (OSError, ValueError):
+            pass  # No existe o está dañada: se regenera
+        self.fallos += 1
+        datos = generador(semilla, width, height, **parametros)
+        self._guardar(archivo, datos)
+        return datos
 
-def create_improved_wood_texture():
-    """Crear textura procedural de madera MEJORADA"""
+    def _guardar(self, archivo, datos):
+        """Escritura atómica: archivo temporal en el mismo directorio y os.replace"""
+        # Otro proceso que genere la misma entrada a la vez la sustituye por una idéntica;
+        # nadie llega a leer un archivo a medio escribir
+        temporal = None
+        try:
+            os.makedirs(self.directorio, exist_ok=True)
+            fd, temporal = tempfile.mkstemp(dir=self.directorio, prefix=".tmp_", suffix=".npy")
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, datos)
+            os.chmod(temporal, 0o644)  # mkstemp crea el archivo solo para su dueño
+            os.replace(temporal, archivo)
+        except OSError as error:
+            print(f"ADVERTENCIA: No se pudo guardar la textura en la caché ({error})")
+            if temporal is not None and os.path.exists(temporal):
+                os.remove(temporal)
+
+# Caché única del proceso
+CACHE_TEXTURAS = CacheTexturas()
+
+def _subir_textura(texture_data, mipmaps=False):
+    """Crear una textura 2D repetible a partir de una imagen RGB uint8 o de su cadena de mipmaps (lista)"""
+    niveles = texture_data if isinstance(texture_data, list) else [texture_data]
     texture_id = glGenTextures(1)
     glBindTexture(GL_TEXTURE_2D, texture_id)
     
-    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+    con_mipmaps = mipmaps or len(niveles) > 1
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR_MIPMAP_LINEAR if con_mipmaps else GL_LINEAR)
     glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
     glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_REPEAT)
     glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT)
     
-    width, height = 256, 256
-    texture_data = np.zeros((height, width, 3), dtype=np.uint8)
-    
-    for y in range(height):
-        for x in range(width):
-            dx = (x - width / 2) * 0.02
-            dy = (y - height / 2) * 0.02
-            distance = np.sqrt(dx*dx + dy*dy)
-            
-            base_r = 150 + int(30 * np.sin(distance * 15 + x * 0.1))
-            base_g = 100 + int(20 * np.sin(distance * 12 + y * 0.08))
-            base_b = 50 + int(15 * np.sin(distance * 10))
-            
-            grain = np.sin(x * 0.05) * np.cos(y * 0.03) * 25
-            noise = np.random.normal(0, 5)
-            
-            r = max(80, min(200, base_r + grain + noise))
-            g = max(50, min(150, base_g + grain * 0.7 + noise * 0.8))
-            b = max(20, min(100, base_b + grain * 0.5 + noise * 0.6))
-            
-            texture_data[y, x] = [r, g, b]
-    
-    glTexImage2D(GL_TEXTURE_2D, 0, GL_RGB, width, height, 0, 
-                GL_RGB, GL_UNSIGNED_BYTE, texture_data)
+    # Filas RGB de cualquier ancho sin relleno (p. ej. madera.ppm, 270 píxeles de ancho)
+    glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+    for nivel, imagen in enumerate(niveles):
+        height, width = imagen.shape[:2]
+        glTexImage2D(GL_TEXTURE_2D, nivel, GL_RGB, width, height, 0, 
+                    GL_RGB, GL_UNSIGNED_BYTE, imagen)
+    if len(niveles) > 1:
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAX_LEVEL, len(niveles) - 1)
+    elif mipmaps:
+        glGenerateMipmap(GL_TEXTURE_2D)
     
     return texture_id
 
-def create_improved_iron_texture():
+# Generador, tamaño y mipmaps de cada textura procedural
+TEXTURAS_PROCEDURALES = {
+    "madera": (generar_madera, 256, 256, False),
+    "hierro": (generar_hierro, 512, 512, True),
+    "plastico": (generar_plastico, 256, 256, False),
+}
+
+def _imagen_procedural(nombre, semilla, cache):
+    """Imagen de una textura procedural (desde la caché en disco si ya se generó)"""
+    generador, width, height, _ = TEXTURAS_PROCEDURALES[nombre]
+    return cache.obtener(nombre, generador, semilla, width, height)
+
+def create_improved_wood_texture(semilla=SEMILLA_TEXTURAS, cache=CACHE_TEXTURAS):
+    """Crear textura procedural de madera MEJORADA"""
+    return _subir_textura(_imagen_procedural("madera", semilla, cache))
+
+def create_improved_iron_texture(semilla=SEMILLA_TEXTURAS, cache=CACHE_TEXTURAS):
     """Crear textura procedural de hierro MEJORADA"""
-    texture_id = glGenTextures(1)
-    glBindTexture(GL_TEXTURE_2D, texture_id)
-    
-    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR_MIPMAP_LINEAR)
-    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
-    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_REPEAT)
-    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT)
-    
-    width, height = 512, 512
-    texture_data = np.zeros((height, width, 3), dtype=np.uint8)
-    
-    for y in range(height):
-        for x in range(width):
-            base_value = 100 + np.random.normal(0, 8)
-            noise1 = np.random.normal(0, 6)
-            noise2 = np.random.normal(0, 4)
-            
-            grain_x = np.sin(x * 0.02) * np.cos(y * 0.015) * 12
-            grain_y = np.sin(y * 0.025) * np.cos(x * 0.01) * 10
-            
-            rust = 0
-            if (x * y) % 200 < 15:
-                rust = np.random.normal(8, 3)
-            
-            r = max(70, min(130, base_value + grain_x + noise1 - rust))
-            g = max(80, min(140, base_value + grain_y + noise1 * 0.9 - rust * 0.6))
-            b = max(90, min(150, base_value + (grain_x + grain_y) * 0.5 + noise2 - rust * 0.4))
-            
-            metallic = np.sin(x * 0.1 + y * 0.05) * 5
-            r = min(150, r + metallic)
-            g = min(150, g + metallic)
-            b = min(160, b + metallic)
-            
-            texture_data[y, x] = [int(r), int(g), int(b)]
-    
-    glTexImage2D(GL_TEXTURE_2D, 0, GL_RGB, width, height, 0, 
-                GL_RGB, GL_UNSIGNED_BYTE, texture_data)
-    glGenerateMipmap(GL_TEXTURE_2D)
-    
-    return texture_id
+    return _subir_textura(_imagen_procedural("hierro", semilla, cache), mipmaps=True)
 
-def seleccionar_textura():
-    """Muestra opciones y devuelve diccionario con textura y parámetros"""
-    print("\n" + "="*50)
-    print("SELECCIÓN DE TEXTURA PARA LAS RAMPAS")
-    print("="*50)
-    print("(1) Hierro")
-    print("(2) Madera")
-    print("(3) Plástico")
-    print("="*50)
-    
-    while True:
-        try:
-            opcion = int(input("Seleccione textura (1-3): "))
-            if opcion == 1:
-                return {
-                    "archivo": "hierro.ppm",
-                    "tipo": "Hierro",
-                    "friccion": 0.008,
-                    "color_base": (0.7, 0.7, 0.8),
-                    "reflectividad": 0.8
-                }
-            elif opcion == 2:
-                return {
-                    "archivo": "madera2.ppm",  # Cambiado a madera2.ppm para las superficies de las rampas
-                    "tipo": "Madera",
-                    "friccion": 0.012,
-                    "color_base": (0.6, 0.4, 0.2),
-                    "reflectividad": 0.3
-                }
-            elif opcion == 3:
-                return {
-                    "archivo": "plastico.ppm",
-                    "tipo": "Plástico",
-                    "friccion": 0.005,
-                    "color_base": (0.8, 0.8, 0.9),
-                    "reflectividad": 0.6
-                }
+def create_plastic_texture(semilla=SEMILLA_TEXTURAS, cache=CACHE_TEXTURAS):
+    """Crear textura procedural de plástico para superficies de curvas"""
+    return _subir_textura(_imagen_procedural("plastico", semilla, cache))
+
+class CargaTextura:
+    """Subida progresiva de una cadena de mipmaps terminada en segundo plano: del nivel menor al mayor, por bandas de filas"""
+
+    def __init__(self, futuro):
+        self.futuro = futuro  # Future con la imagen o la lista de niveles (None = no hay)
+        self.niveles = None
+        self.nivel = None  # Nivel que se está subiendo (-1 = terminada)
+        self.fila = 0  # Primera fila del nivel aún sin subir
+
+    def iniciar(self, niveles):
+        """Empezar la subida por el nivel más pequeño"""
+        self.niveles = niveles if isinstance(niveles, list) else [niveles]
+        self.nivel = len(self.niveles) - 1
+        self.fila = 0
+
+    @property
+    def terminada(self):
+        return self.nivel is not None and self.nivel < 0
+
+    def subir(self, texture_id, presupuesto):
+        """Subir hasta presupuesto bytes (al menos una fila) en el hilo de OpenGL; devuelve los bytes subidos"""
+        # Solo se muestrean los niveles completos (GL_TEXTURE_BASE_LEVEL); hasta completar el más pequeño
+        # se sigue viendo el texel provisional del nivel 0
+        glBindTexture(GL_TEXTURE_2D, texture_id)
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+        ultimo = len(self.niveles) - 1
+        subidos = 0
+        while self.nivel >= 0 and subidos < presupuesto:
+            imagen = self.niveles[self.nivel]
+            height, width = imagen.shape[:2]
+            if ultimo == 0:
+                # Sin mipmaps el nivel 0 es a la vez el provisional: se sube entero de una vez
+                filas = height
             else:
-                print("Por favor, seleccione 1, 2 o 3")
-        except ValueError:
-            print("Entrada inválida. Por favor ingrese un número.")
-    return texture_id
+                filas = int(min(height - self.fila, max(1, (presupuesto - subidos) // (width * 3))))
+            if self.fila == 0:
+                glTexImage2D(GL_TEXTURE_2D, self.nivel, GL_RGB, width, height, 0, GL_RGB, GL_UNSIGNED_BYTE,
+                             imagen if filas == height else None)
+            if filas < height or self.fila > 0:
+                glTexSubImage2D(GL_TEXTURE_2D, self.nivel, 0, self.fila, width, filas, GL_RGB, GL_UNSIGNED_BYTE,
+                                np.ascontiguousarray(imagen[self.fila:self.fila + filas]))
+            subidos += filas * width * 3
+            self.fila += filas
+            if self.fila < height:
+                continue
+            # Nivel completo: pasa a ser el más detallado que se muestrea
+            if self.nivel == ultimo and ultimo > 0:
+                glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR_MIPMAP_LINEAR)
+                glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAX_LEVEL, ultimo)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_BASE_LEVEL, self.nivel)
+            self.nivel -= 1
+            self.fila = 0
+        glBindTexture(GL_TEXTURE_2D, 0)
+        return subidos
+
+class GestorTexturas:
+    """Texturas compartidas por (origen, parámetros) con contador de referencias y presupuesto de memoria"""
+
+    def __init__(self, presupuesto=PRESUPUESTO_TEXTURAS, hilos=HILOS_CARGA_TEXTURAS):
+        self.presupuesto = presupuesto  # Bytes residentes a partir de los que se expulsan texturas sin uso
+        self.hilos = hilos  # Hilos para decodificar y generar imágenes en segundo plano
+        self.bytes_residentes = 0  # Estimación: 4 bytes por texel (RGB se guarda como RGBA) más los mipmaps
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsadas = 0
+        self._entradas = OrderedDict()  # clave -> [texture_id, bytes, referencias], de la menos a la más usada
+        self._claves = {}  # texture_id -> clave
+        self._cargas = {}  # texture_id -> CargaTextura de las texturas que aún muestran el texel provisional
+        self._pool = None  # ThreadPoolExecutor (se crea con la primera carga en segundo plano)
+        self.version = 0  # Aumenta cada vez que termina una carga (para cachés derivadas, p. ej. cubemaps)
+
+    def _acierto(self, clave):
+        """Textura ya residente: una referencia más"""
+        entrada = self._entradas.get(clave)
+        if entrada is None:
+            return None
+        self.aciertos += 1
+        entrada[2] += 1
+        self._entradas.move_to_end(clave)
+        return entrada[0]
+
+    def _registrar(self, clave, texture_id, tamano):
+        """Nueva entrada con una referencia"""
+        self.fallos += 1
+        self._entradas[clave] = [texture_id, tamano, 1]
+        self._claves[texture_id] = clave
+        self.bytes_residentes += tamano
+        self._recortar()
+
+    @staticmethod
+    def _tamano(niveles, mipmaps):
+        """Bytes estimados en la GPU de una imagen o de su cadena de niveles"""
+        niveles = niveles if isinstance(niveles, list) else [niveles]
+        tamano = sum(nivel.shape[0] * nivel.shape[1] * 4 for nivel in niveles)
+        return tamano * 4 // 3 if mipmaps and len(niveles) == 1 else tamano  # Cadena generada en la GPU
+
+    def obtener(self, clave, crear, mipmaps=False):
+        """Textura compartida de la clave con una referencia más; crear() da la imagen o sus niveles (None = no hay)"""
+        texture_id = self._acierto(clave)
+        if texture_id is not None:
+            return texture_id
+        imagen = crear()
+        if imagen is None:
+            return None
+        texture_id = _subir_textura(imagen, mipmaps)
+        self._registrar(clave, texture_id, self._tamano(imagen, mipmaps))
+        return texture_id
+
+    def obtener_en_segundo_plano(self, clave, crear, provisional=COLOR_PROVISIONAL):
+        """Como obtener, pero crear() se ejecuta en el pool de hilos; hasta subir la imagen se ve un texel de color provisional"""
+        # crear() debe devolver la cadena de niveles completa: los mipmaps no se pueden generar en la GPU
+        # mientras la textura aún se está subiendo
+        texture_id = self._acierto(clave)
+        if texture_id is not None:
+            return texture_id
+        texel = np.rint(np.clip(provisional, 0.0, 1.0) * 255).astype(np.uint8).reshape(1, 1, 3)
+        texture_id = _subir_textura(texel)
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.hilos, thread_name_prefix="texturas")
+        self._cargas[texture_id] = CargaTextura(self._pool.submit(crear))
+        self._registrar(clave, texture_id, 4)
+        return texture_id
+
+    def procesar_cargas(self, presupuesto=BYTES_SUBIDA_POR_FRAME):
+        """Subir hasta presupuesto bytes de las cargas ya decodificadas (en el hilo de OpenGL, una vez por frame)"""
+        for texture_id, carga in list(self._cargas.items()):
+            if presupuesto <= 0:
+                break
+            # (una entrada puede haberse expulsado al ajustar el tamaño de otra)
+            if texture_id not in self._cargas or not carga.futuro.done():
+                continue
+            if carga.niveles is None:
+                try:
+                    niveles = carga.futuro.result()
+                except Exception as error:
+                    print(f"ADVERTENCIA: Error al cargar la textura ({error})")
+                    niveles = None
+                if niveles is None:
+                    print(f"ADVERTENCIA: Ninguna fuente de la textura {texture_id} se pudo cargar. "
+                          f"Se mantiene el color provisional.")
+                    del self._cargas[texture_id]
+                    continue
+                carga.iniciar(niveles)
+                self._ajustar(texture_id, self._tamano(carga.niveles, False))
+                if texture_id not in self._cargas:
+                    continue
+            presupuesto -= carga.subir(texture_id, presupuesto)
+            if carga.terminada:
+                del self._cargas[texture_id]
+                self.version += 1
+        return len(self._cargas)
+
+    def cargas_pendientes(self):
+        """Texturas que aún muestran el texel provisional"""
+        return len(self._cargas)
+
+    def completar(self):
+        """Esperar a todas las cargas en segundo plano y subirlas enteras (p. ej. antes de grabar un vídeo)"""
+        wait([carga.futuro for carga in self._cargas.values()])
+        self.procesar_cargas(float("inf"))
+
+    def _ajustar(self, texture_id, tamano):
+        """Cambiar los bytes estimados de una entrada (texel provisional -> imagen real)"""
+        entrada = self._entradas[self._claves[texture_id]]
+        self.bytes_residentes += tamano - entrada[1]
+        entrada[1] = tamano
+        self._recortar()
+
+    def ppm(self, filename, max_lado=MAX_LADO_TEXTURA, potencia_de_dos=True, mipmaps=True,
+            en_segundo_plano=False, provisional=COLOR_PROVISIONAL):
+        """Textura de un archivo PPM (como load_ppm_texture), compartida mientras el archivo no cambie"""
+        return self.material((filename,), None, max_lado=max_lado, potencia_de_dos=potencia_de_dos, mipmaps=mipmaps,
+                             en_segundo_plano=en_segundo_plano, provisional=provisional)
+
+    def material(self, archivos, procedural=None, semilla=SEMILLA_TEXTURAS, cache=CACHE_TEXTURAS,
+                 max_lado=MAX_LADO_TEXTURA, potencia_de_dos=True, mipmaps=True,
+                 en_segundo_plano=False, provisional=COLOR_PROVISIONAL):
+        """Textura del primer archivo PPM que se pueda leer; si no hay ninguno, la procedural (None = sin respaldo)"""
+        # La cadena completa (archivos y procedural) se recorre dentro de crear(), también en segundo plano:
+        # un archivo dañado pasa a la siguiente fuente en lugar de quedarse con el texel provisional
+        fuentes = []
+        for archivo in dict.fromkeys(archivos):
+            try:
+                fuentes.append((archivo, os.stat(archivo).st_mtime_ns))
+            except OSError:
+                print(f"ADVERTENCIA: No se encontró {archivo}.")
+        if not fuentes and procedural is None:
+            return None
+        # La clave es la cadena entera: el resultado depende también de los respaldos si un archivo está dañado
+        clave = ("material", tuple((os.path.abspath(archivo), modificado) for archivo, modificado in fuentes),
+                 procedural, semilla, max_lado, potencia_de_dos, mipmaps)
+
+        def crear():
+            for archivo, _ in fuentes:
+                try:
+                    niveles = cadena_mip(leer_ppm(archivo), max_lado, potencia_de_dos, mipmaps)
+                    print(f"Textura cargada ({archivo})")
+                    return niveles
+                except (OSError, ValueError) as error:
+                    print(f"ADVERTENCIA: No se pudo leer {archivo} ({error}).")
+            if procedural is None:
+                return None
+            print(f"Usando textura procedural de {procedural}.")
+            # Los tamaños procedurales ya son potencias de dos: el nivel 0 es la imagen tal cual
+            return cadena_mip(_imagen_procedural(procedural, semilla, cache), mipmaps=TEXTURAS_PROCEDURALES[procedural][3])
+
+        if en_segundo_plano:
+            return self.obtener_en_segundo_plano(clave, crear, provisional)
+        return self.obtener(clave, crear)
+
+    def procedural(self, nombre, semilla=SEMILLA_TEXTURAS, cache=CACHE_TEXTURAS,
+                   en_segundo_plano=False, provisional=COLOR_PROVISIONAL):
+        """Textura procedural de TEXTURAS_PROCEDURALES ("madera", "hierro" o "plastico")"""
+        mipmaps = TEXTURAS_PROCEDURALES[nombre][3]
+        clave = ("procedural", nombre, semilla)
+        if en_segundo_plano:
+            # La cadena de mipmaps se calcula en el hilo (los tamaños ya son potencias de dos)
+            return self.obtener_en_segundo_plano(
+                clave, lambda: cadena_mip(_imagen_procedural(nombre, semilla, cache), mipmaps=mipmaps), provisional)
+        return self.obtener(clave, lambda: _imagen_procedural(nombre, semilla, cache), mipmaps)
+
+    def soltar(self, texture_id):
+        """Quitar una referencia; sin referencias la textura sigue residente hasta que la expulse el presupuesto"""
+        clave = self._claves.get(texture_id)
+        if clave is None:
+            return
+        entrada = self._entradas[clave]
+        entrada[2] = max(entrada[2] - 1, 0)
+        self._recortar()
+
+    def _recortar(self):
+        """Expulsar texturas sin referencias, de la menos a la más recientemente usada, hasta caber en el presupuesto"""
+        # Las texturas con referencias nunca se borran: el presupuesto puede superarse si todas están en uso
+        for clave in [clave for clave, entrada in self._entradas.items() if entrada[2] == 0]:
+            if self.bytes_residentes <= self.presupuesto:
+                return
+            self._borrar(clave)
+            self.expulsadas += 1
+
+    def _borrar(self, clave):
+        """Borrar la textura de la GPU y olvidar su entrada"""
+        texture_id, tamano, _ = self._entradas.pop(clave)
+        del self._claves[texture_id]
+        carga = self._cargas.pop(texture_id, None)
+        if carga is not None:
+            carga.futuro.cancel()  # Si ya está en marcha, su resultado se descarta
+        self.bytes_residentes -= tamano
+        glDeleteTextures([texture_id])
+
+    def residentes(self):
+        """Número de texturas residentes en la GPU"""
+        return len(self._entradas)
+
+    def liberar(self):
+        """Borrar todas las texturas (p. ej. antes de destruir el contexto OpenGL)"""
+        for clave in list(self._entradas):
+            self._borrar(clave)
+
+# Gestor único del proceso
+GESTOR_TEXTURAS = GestorTexturas()
 
 def seleccionar_textura():
     """Muestra opciones y devuelve diccionario con textura y parámetros"""
@@ -303,31 +605,9 @@ def seleccionar_textura():
     while True:
         try:
             opcion = int(input("Seleccione textura (1-3): "))
-            if opcion == 1:
-                return {
-                    "archivo": "hierro.ppm",
-                    "tipo": "Hierro",
-                    "friccion": 0.008,
-                    "color_base": (0.7, 0.7, 0.8),
-                    "reflectividad": 0.8
-                }
-            elif opcion == 2:
-                return {
-                    "archivo": "madera.ppm", 
-                    "tipo": "Madera",
-                    "friccion": 0.012,
-                    "color_base": (0.6, 0.4, 0.2),
-                    "reflectividad": 0.3
-                }
-            elif opcion == 3:
-                return {
-                    "archivo": "plastico.ppm",
-                    "tipo": "Plástico",
-                    "friccion": 0.005,
-                    "color_base": (0.8, 0.8, 0.9),
-                    "reflectividad": 0.6
-                }
+            if opcion in TEXTURAS_RAMPA:
+                return dict(TEXTURAS_RAMPA[opcion])
             else:
                 print("Por favor, seleccione 1, 2 o 3")
         except ValueError:
-            print("Entrada inválida. Por favor ingrese un número.")
\ No newline at end of file
+            print("Entrada inválida. Por favor ingrese un número.")
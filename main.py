@@ -1,3 +1,4 @@
+import argparse
 import pygame
 import sys
 import numpy as np
@@ -5,22 +6,27 @@ from OpenGL.GL import *
 from OpenGL.GLU import *
 
 from Esferas import get_esferas
+from Fisica import MotorFisicoLote, BucleFisico
 from Rampas import RampaManager
 from Textura import seleccionar_textura
-from Escena import Escena
+from Escena import Escena, cargar_camara, configurar_opengl, matrices_camara
+from Perfilador import Perfilador
+from Simulador import CONFIG_SIMULACION_DEFAULT
 
 # Constantes de la ventana
 WIDTH, HEIGHT = 1200, 800
 FPS = 60
+DT_FISICA = CONFIG_SIMULACION_DEFAULT["dt"]  # Paso fijo de la física, independiente de los FPS
 
 class Brachistochrone3DSimulation:
-    def __init__(self):
+    def __init__(self, fisica_en_hilo=False, usar_glsl=False):
         # Inicializar pygame y OpenGL
         pygame.init()
         self.screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.DOUBLEBUF | pygame.OPENGL)
         pygame.display.set_caption("BRAQUISTÓCRONA 3D - SISTEMA GENERAL")
         self.clock = pygame.time.Clock()
         self.running = True
+        self.fisica_en_hilo = fisica_en_hilo  # Integrar la física en su propio hilo
         
         # 1. FLUJO OBLIGATORIO: Pedir textura usando Textura.py
         print("=" * 60)
@@ -34,12 +40,17 @@ class Brachistochrone3DSimulation:
         # 3. FLUJO OBLIGATORIO: Generar rampas usando Rampas.py
         self.rampa_manager = RampaManager()
         self.rampa_manager.set_puntos(self.punto_A)
+        if self._solicitar_rampa_optima():
+            self.rampa_manager.activar_rampa_optima()
         
         # Obtener información de las rampas para las esferas
         config_esferas = self.rampa_manager.get_curvas_para_esferas()
         
         # 4. FLUJO OBLIGATORIO: Crear escena usando Escena.py
-        self.escena = Escena(self.config_textura)
+        self.escena = Escena(self.config_textura, usar_glsl=usar_glsl)
+        self.perfilador = Perfilador()  # Tiempos por etapa de cada frame (P: mostrar, F: exportar CSV)
+        self.escena.perfilador = self.perfilador
+        self.escena.rampas_adicionales = self.rampa_manager.get_rampas_adicionales()
         
         # 5. IMPORTANTE: Crear esferas DESPUÉS de actualizar las rampas
         self.balls = get_esferas(config_esferas)
@@ -47,6 +58,9 @@ class Brachistochrone3DSimulation:
         # FORZAR INICIALIZACIÓN INMEDIATA DE POSICIONES CON LA ALTURA CORRECTA
         self._forzar_inicializacion_esferas()
         
+        # Motor de física vectorizado para todas las bolas
+        self.motor = MotorFisicoLote(self.balls)
+        
         # Inicializar variables de simulación
         self.start_time = None  # Tiempo de inicio de simulación
         self.simulation_started = False  # Estado de simulación
@@ -60,6 +74,11 @@ class Brachistochrone3DSimulation:
         self.platform_moving = False  # Estado de movimiento
         self.platform_speed = 2.0  # Velocidad de retroceso
         
+        # Física a paso fijo; se dibuja el estado interpolado entre sus dos últimos pasos
+        self.platform_render_x = self.platform_position_x  # Posición dibujada de la plataforma
+        self.tiempo_render = 0.0  # Tiempo simulado del estado dibujado
+        self._crear_bucle()
+        
         # Variables de cámara
         self.camera_distance = 18.0  # Distancia de la cámara
         self.camera_angle_x = 35.0  # Ángulo vertical
@@ -111,6 +130,11 @@ class Brachistochrone3DSimulation:
             print("Entrada inválida. Usando valores por defecto (1.0, 5.0, 0.0)")
             return (1.0, 5.0, 0.0)
 
+    def _solicitar_rampa_optima(self):
+        """Pregunta si añadir la rampa óptima calculada numéricamente"""
+        respuesta = input("¿Añadir la rampa óptima (braquistócrona con rozamiento)? [s/N]: ")
+        return respuesta.strip().lower() in ("s", "si", "sí")
+
     def _forzar_inicializacion_esferas(self):
         """FORZAR inicialización de las esferas con la altura ACTUALIZADA"""
         print("FORZANDO inicialización de esferas con altura actual...")
@@ -156,34 +180,7 @@ class Brachistochrone3DSimulation:
 
     def setup_opengl(self):
         """Configuración de OpenGL - MEJORADA: iluminación más brillante"""
-        # Habilitar características
-        glEnable(GL_DEPTH_TEST)  # Prueba de profundidad
-        glEnable(GL_LIGHTING)  # Iluminación
-        glEnable(GL_LIGHT0)  # Luz 0
-        glEnable(GL_LIGHT1)  # Luz 1
-        glEnable(GL_COLOR_MATERIAL)  # Material de color
-        glColorMaterial(GL_FRONT_AND_BACK, GL_AMBIENT_AND_DIFFUSE)
-        
-        # MEJORA: Iluminación más brillante
-        # Luz principal
-        glLightfv(GL_LIGHT0, GL_POSITION, [5.0, 15.0, 5.0, 1.0])
-        glLightfv(GL_LIGHT0, GL_AMBIENT, [0.6, 0.6, 0.6, 1.0])  # Más brillante
-        glLightfv(GL_LIGHT0, GL_DIFFUSE, [1.2, 1.2, 1.2, 1.0])  # Más brillante
-        glLightfv(GL_LIGHT0, GL_SPECULAR, [1.0, 1.0, 1.0, 1.0])
-        
-        # Luz secundaria
-        glLightfv(GL_LIGHT1, GL_POSITION, [-5.0, 10.0, -5.0, 1.0])
-        glLightfv(GL_LIGHT1, GL_DIFFUSE, [1.0, 1.0, 1.0, 1.0])  # Más brillante
-        glLightfv(GL_LIGHT1, GL_SPECULAR, [1.0, 1.0, 1.0, 1.0])  # Más brillante
-        
-        # Material especular
-        glMaterialfv(GL_FRONT, GL_SPECULAR, [1.0, 1.0, 1.0, 1.0])
-        glMaterialf(GL_FRONT, GL_SHININESS, 128.0)
-        
-        # MEJORA: Fondo más claro
-        glClearColor(0.5, 0.5, 0.6, 1.0)  # Más claro
-        glEnable(GL_NORMALIZE)  # Normalizar normales
-        glShadeModel(GL_SMOOTH)  # Sombreado suave
+        configurar_opengl()  # Luces, materiales y fondo (compartido con Grabador.py)
 
     def handle_events(self):
         """Manejar eventos de entrada"""
@@ -195,6 +192,7 @@ class Brachistochrone3DSimulation:
                     # Iniciar simulación
                     self.simulation_started = True
                     self.start_time = pygame.time.get_ticks()
+                    self.bucle.iniciar()
                     print("¡Simulación iniciada! Las bolas bajarán por las rampas...")
                 elif event.key == pygame.K_r:
                     self.restart_simulation()  # Reiniciar
@@ -202,6 +200,11 @@ class Brachistochrone3DSimulation:
                     self.running = False  # Salir
                 elif event.key == pygame.K_c:
                     self.mostrar_controles()  # Mostrar controles
+                elif event.key == pygame.K_p:
+                    self.perfilador.mostrar = not self.perfilador.mostrar  # Percentiles en pantalla
+                elif event.key == pygame.K_f:
+                    n = self.perfilador.exportar_csv("perfil_frames.csv")
+                    print(f"{n} frames exportados a perfil_frames.csv")
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 1:
                     self.dragging = True  # Iniciar arrastre
@@ -285,14 +288,18 @@ class Brachistochrone3DSimulation:
         print("ESPACIO - Iniciar simulación")
         print("R - Reiniciar simulación")
         print("C - Mostrar controles")
+        print("P - Mostrar/ocultar perfilador")
+        print("F - Exportar tiempos por frame a CSV")
         print("ESC - Salir")
         print("="*50)
 
     def restart_simulation(self):
         """Reiniciar simulación"""
+        self.bucle.detener()
         config_esferas = self.rampa_manager.get_curvas_para_esferas()
         self.balls = get_esferas(config_esferas)
         self._forzar_inicializacion_esferas()  # FORZAR REINICIALIZACIÓN
+        self.motor = MotorFisicoLote(self.balls)
         self.simulation_started = False
         self.start_time = None
         self.finished_balls = 0
@@ -301,22 +308,18 @@ class Brachistochrone3DSimulation:
         self.platform_position_x = self.punto_A[0]
         self.platform_height = self.punto_A[1] + 0.3
         self.platform_moving = False
+        self.platform_render_x = self.platform_position_x
+        self.tiempo_render = 0.0
+        self._crear_bucle()
         print("Simulación reiniciada")
 
     def setup_camera(self):
         """Configurar vista de cámara"""
-        glMatrixMode(GL_PROJECTION)
-        glLoadIdentity()
-        gluPerspective(45, WIDTH/HEIGHT, 0.1, 100.0)  # Proyección perspectiva
-        
-        glMatrixMode(GL_MODELVIEW)
-        glLoadIdentity()
-        
-        # Aplicar transformaciones de cámara
-        glTranslatef(0.0, -2.0, -self.camera_distance)  # Alejar
-        glRotatef(self.camera_angle_x, 1.0, 0.0, 0.0)  # Rotar X
-        glRotatef(self.camera_angle_y, 0.0, 1.0, 0.0)  # Rotar Y
-        glTranslatef(-self.camera_position[0], -self.camera_position[1], -self.camera_position[2])  # Mover
+        # Perspectiva de 45°, alejar, rotar en X e Y y mover (matrices calculadas en Python, ver matrices_camara)
+        camara = matrices_camara(self.camera_distance, self.camera_angle_x, self.camera_angle_y,
+                                 self.camera_position, WIDTH / HEIGHT)
+        cargar_camara(*camara)
+        return camara
 
     def run(self):
         """Bucle principal"""
@@ -331,47 +334,18 @@ class Brachistochrone3DSimulation:
         print(f"   Presiona ESPACIO para iniciar la simulación\n")
         
         while self.running:
-            dt = self.clock.tick(FPS) / 1000.0  # Delta time
-            self.handle_events()  # Procesar eventos
+            self.clock.tick(FPS)  # Limitar los FPS del render (la física va a paso fijo)
+            self.perfilador.inicio_frame()
+            with self.perfilador.etapa("eventos"):
+                self.handle_events()  # Procesar eventos
             
-            if self.simulation_started:
-                # CORRECCIÓN: Cambiar start_time por self.start_time
-                current_time = (pygame.time.get_ticks() - self.start_time) / 1000.0
-                
-                # Plataforma se mueve y libera bolas
-                if current_time >= 2.0 and not self.platform_moving:
-                    self.platform_moving = True
-                    print("¡La plataforma se está moviendo hacia atrás!")
-                
-                if self.platform_moving and self.platform_position_x > self.punto_A[0] - 3.0:
-                    self.platform_position_x -= self.platform_speed * dt
-                
-                # Liberar bolas cuando la plataforma se ha movido lo suficiente
-                if self.platform_position_x <= self.punto_A[0] - 1.5 and not all(ball.platform_released for ball in self.balls):
-                    for ball in self.balls:
-                        if not ball.platform_released:
-                            ball.release_from_platform()
-                            print(f"{ball.name} liberada!")
-                
-                # Actualizar física de las bolas
-                stopped_balls = 0
-                for ball in self.balls:
-                    if not ball.on_platform:
-                        ball.update(dt, current_time)
-                    
-                    if ball.wall_stopped:
-                        stopped_balls += 1
-                
-                # Verificar si todas las bolas se han detenido
-                if not self.all_balls_stopped and stopped_balls == len(self.balls):
-                    self.all_balls_stopped = True
-                    self.last_ball_stop_time = current_time
-                    print(f"¡TODAS LAS BOLAS DETENIDAS! Tiempo final: {self.last_ball_stop_time:.2f}s")
+            with self.perfilador.etapa("fisica"):
+                self.actualizar_simulacion()
             
             # Renderizar la escena completa
             self.escena.render(
                 setup_camera_func=self.setup_camera,
-                platform_position_x=self.platform_position_x,
+                platform_position_x=self.platform_render_x,
                 platform_height=self.platform_height,
                 balls=self.balls,
                 simulation_started=self.simulation_started,
@@ -379,17 +353,71 @@ class Brachistochrone3DSimulation:
                 all_balls_stopped=self.all_balls_stopped,
                 last_ball_stop_time=self.last_ball_stop_time,
                 font=self.font,
-                small_font=self.small_font
+                small_font=self.small_font,
+                tiempo_simulado=self.tiempo_render
             )
             
-            pygame.display.flip()  # Actualizar pantalla
+            with self.perfilador.etapa("swap"):
+                pygame.display.flip()  # Actualizar pantalla
+            self.perfilador.fin_frame()
         
+        self.bucle.detener()
         pygame.quit()
         sys.exit()
 
+    def _crear_bucle(self):
+        """Bucle de física a paso fijo con posiciones de render separadas de las de la física"""
+        self.posiciones_render = self.motor.posiciones.copy()
+        for i, ball in enumerate(self.balls):
+            ball.base_pos = self.posiciones_render[i]  # Las bolas se dibujan en el estado interpolado
+        self.bucle = BucleFisico(self.paso_fisica, self.estado_visual, dt=DT_FISICA, en_hilo=self.fisica_en_hilo)
+
+    def estado_visual(self):
+        """Estado que se interpola para dibujar (copias: la física sigue avanzando)"""
+        return {"posiciones": self.motor.posiciones.copy(), "plataforma": self.platform_position_x}
+
+    def actualizar_simulacion(self):
+        """Avanzar la física (si no va en su hilo) y tomar el estado interpolado para dibujar"""
+        if not self.simulation_started:
+            return
+        if not self.bucle.en_hilo:
+            self.bucle.avanzar()
+        estado, self.tiempo_render = self.bucle.interpolado()
+        self.posiciones_render[:] = estado["posiciones"]
+        self.platform_render_x = estado["plataforma"]
+
+    def paso_fisica(self, dt, current_time):
+        """Un paso fijo: mover la plataforma, liberar las bolas y avanzar la física (tiempo simulado)"""
+        # Plataforma se mueve y libera bolas
+        if current_time >= 2.0 and not self.platform_moving:
+            self.platform_moving = True
+            print("¡La plataforma se está moviendo hacia atrás!")
+        
+        if self.platform_moving and self.platform_position_x > self.punto_A[0] - 3.0:
+            self.platform_position_x -= self.platform_speed * dt
+        
+        # Liberar bolas cuando la plataforma se ha movido lo suficiente
+        if self.platform_position_x <= self.punto_A[0] - 1.5 and not self.motor.platform_released.all():
+            for i in self.motor.liberar():
+                print(f"{self.balls[i].name} liberada!")
+        
+        # Actualizar física de todas las bolas en un único paso vectorizado
+        self.motor.paso(dt, current_time)
+        
+        # Verificar si todas las bolas se han detenido
+        if not self.all_balls_stopped and self.motor.finished.all():
+            self.all_balls_stopped = True
+            self.last_ball_stop_time = current_time
+            print(f"¡TODAS LAS BOLAS DETENIDAS! Tiempo final: {self.last_ball_stop_time:.2f}s")
+
 if __name__ == "__main__":
     print("=" * 60)
     print("BRAQUISTÓCRONA 3D - SISTEMA GENERAL MODULAR")
     print("=" * 60)
-    sim = Brachistochrone3DSimulation()
+    parser = argparse.ArgumentParser(description="Simulación interactiva de la braquistócrona en 3D")
+    parser.add_argument("--hilo-fisica", action="store_true", help="Integrar la física en su propio hilo")
+    parser.add_argument("--glsl", action="store_true",
+                        help="Dibujar las bolas con shaders en una llamada instanciada (si no hay soporte, tubería fija)")
+    args = parser.parse_args()
+    sim = Brachistochrone3DSimulation(fisica_en_hilo=args.hilo_fisica, usar_glsl=args.glsl)
     sim.run()
\ No newline at end of file